@@ -0,0 +1,630 @@
+"""Benchmarks do OLT Command Manager
+
+Cada benchmark dos caminhos críticos roda em vários tamanhos de dados
+sintéticos (synthetic_data.py, sempre com a mesma semente). Os que
+precisam de Tk usam o display atual ou, sem display, um Xvfb se estiver
+instalado; caso contrário são pulados.
+
+Uso:
+    python benchmark.py                       # todos os benchmarks
+    python benchmark.py tree history --quick  # só o menor tamanho
+    python benchmark.py --output atual.json --compare base.json
+    python benchmark.py log --size-mb 200
+    python benchmark.py memory --olts 50
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from olt_manager import (
+    CommandHistory,
+    CommandValidator,
+    CompactCatalog,
+    FavoriteCommands,
+    OLTCommandManager,
+    PersistenceService,
+    SessionLogConverter,
+    ViewportHighlighter,
+    VirtualListView,
+    build_zte_removal_batch,
+    parse_onu_dump,
+    parse_template,
+    tokenize_json_line,
+)
+from synthetic_data import (
+    generate_catalog,
+    generate_catalog_text,
+    generate_favorites,
+    generate_history,
+    generate_onu_lines,
+    generate_session_log,
+    iter_catalog_commands,
+    random_param,
+)
+
+# Tamanhos de cada benchmark, do menor ao maior
+SIZES = {
+    "load": [4, 50, 200],  # OLTs no catálogo
+    "tree": [4, 8, 16],  # categorias por nível (2 níveis, 10 comandos cada)
+    "render": [4, 50, 200],  # OLTs no catálogo
+    "validate": [1000, 10000, 100000],  # conjuntos de parâmetros
+    "convert": [1000, 10000, 100000],  # linhas de ONU
+    "history": [1000, 10000, 100000],  # entradas no histórico
+    "favorites": [100, 1000, 10000],  # favoritos
+}
+# Métricas comparadas com a linha de base: sufixo -> maior é melhor?
+COMPARED_SUFFIXES = {"_ms": False, "_kb": False, "_per_second": True}
+# Diferenças de tempo menores que isto são ruído de medição
+NOISE_FLOOR_MS = 1.0
+
+
+def timed(func, repeat=5):
+    """Mediana e mínimo (ms) de repeat execuções de func"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3), round(min(samples), 3)
+
+
+@contextmanager
+def working_directory(path):
+    """Os arquivos do aplicativo são relativos ao diretório atual"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def start_virtual_display():
+    """Iniciar um Xvfb quando não há display (Linux sem interface gráfica)"""
+    if sys.platform.startswith("win") or sys.platform == "darwin":
+        return
+    if os.environ.get("DISPLAY") or not shutil.which("Xvfb"):
+        return
+    display = f":{90 + os.getpid() % 100}"
+    process = subprocess.Popen(
+        ["Xvfb", display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    atexit.register(process.terminate)
+    os.environ["DISPLAY"] = display
+    time.sleep(0.5)
+
+
+def open_tk():
+    """Janela raiz do Tk (escondida) ou None se não houver display"""
+    start_virtual_display()
+    try:
+        import tkinter as tk
+
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    return root
+
+
+def bare_manager(**attributes):
+    """OLTCommandManager sem interface, só com os atributos que o método usa"""
+    manager = OLTCommandManager.__new__(OLTCommandManager)
+    manager.__dict__.update(attributes)
+    return manager
+
+
+def bench_log_converter(size_mb=50):
+    """Vazão do conversor de log de sessão para script"""
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "session.log")
+        script_path = os.path.join(tmp, "script.txt")
+        generate_session_log(log_path, size_mb)
+        size = os.path.getsize(log_path)
+
+        converter = SessionLogConverter()
+        start = time.perf_counter()
+        converter.convert_file(log_path, script_path)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "log_mb": round(size / (1024 * 1024), 1),
+        "lines": converter.lines,
+        "commands": converter.commands,
+        "templates": len(converter.templates),
+        "seconds": round(elapsed, 3),
+        "mb_per_second": round(size / (1024 * 1024) / elapsed, 1),
+    }
+
+
+# Estimativa (sem display) do custo no Tcl de um valor de item do
+# Treeview: um Tcl_Obj (48 bytes em 64 bits) mais o texto em UTF-8
+TCL_OBJ_BYTES = 48
+
+
+def process_rss():
+    """Memória residente do processo em bytes (None se indisponível)"""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def measure_treeview_values(compact):
+    """Memória (RSS) dos "values" com o comando em cada item do Treeview
+
+    Monta a árvore de todas as OLTs duas vezes, como a árvore antiga (com
+    o comando em "values") e como a atual (só o iid), e devolve a
+    diferença. None se não houver display ou medição de RSS.
+    """
+    root = open_tk()
+    if root is None or process_rss() is None:
+        if root is not None:
+            root.destroy()
+        return None
+
+    from tkinter import ttk
+
+    def fill(with_values):
+        tree = ttk.Treeview(root)
+        for node_id, node in enumerate(compact.nodes):
+            parent = "" if node.parent is None else str(node.parent)
+            command = node.template
+            if with_values and command is not None:
+                tree.insert(parent, "end", iid=str(node_id), values=(command,))
+            else:
+                tree.insert(parent, "end", iid=str(node_id))
+        root.update_idletasks()
+        return tree
+
+    try:
+        # Aquecer o alocador do Tcl antes das medições
+        fill(False).destroy()
+        start = process_rss()
+        ids_only = fill(False)
+        ids_bytes = process_rss() - start
+        start = process_rss()
+        with_values = fill(True)
+        values_bytes = process_rss() - start
+        ids_only.destroy()
+        with_values.destroy()
+        return max(0, values_bytes - ids_bytes)
+    finally:
+        root.destroy()
+
+
+def bench_memory(olts=50):
+    """Memória que o aplicativo mantém para o catálogo e a árvore
+
+    Antes: dicts do JSON + uma cópia de cada comando em "values" do
+    Treeview (memória do Tcl, fora do tracemalloc: medida pelo RSS com
+    display, estimada sem display).
+    Agora: dicts do JSON + CompactCatalog (medido com tracemalloc desde
+    antes do json.loads, então strings compartilhadas contam uma vez só).
+    """
+    # 300 comandos por OLT, de 4 conjuntos de comandos
+    catalog = generate_catalog(olts, depth=1, fanout=10, commands=30, models=4)
+    text = json.dumps(catalog, ensure_ascii=False)
+    del catalog
+
+    tracemalloc.start()
+    data = json.loads(text)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    compact = CompactCatalog(data)
+    with_compact_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    treeview_bytes = measure_treeview_values(compact)
+    measured = treeview_bytes is not None
+    if not measured:
+        treeview_bytes = sum(
+            len(compact.command(node_id).encode("utf-8")) + 1 + TCL_OBJ_BYTES
+            for node_id in range(len(compact.nodes))
+            if compact.is_command(node_id)
+        )
+    before = dict_bytes + treeview_bytes
+    after = with_compact_bytes
+    return {
+        "olts": olts,
+        "nodes": len(compact.nodes),
+        "dict_model_kb": round(dict_bytes / 1024, 1),
+        "compact_overhead_kb": round((with_compact_bytes - dict_bytes) / 1024, 1),
+        "treeview_values_kb": round(treeview_bytes / 1024, 1),
+        "treeview_values": "medido (RSS)" if measured else "estimado (sem display)",
+        "total_before_kb": round(before / 1024, 1),
+        "total_after_kb": round(after / 1024, 1),
+        "after_before_ratio": round(after / before, 2),
+    }
+
+
+def bench_highlight(size_mb=5, viewport_lines=50):
+    """Custo do realce de sintaxe: arquivo inteiro x janela visível"""
+    text = generate_catalog_text(size_mb)
+    lines = text.split("\n")
+    window = viewport_lines + 2 * ViewportHighlighter.MARGIN
+
+    start = time.perf_counter()
+    for line in lines:
+        tokenize_json_line(line)
+    full_seconds = time.perf_counter() - start
+
+    rng = random.Random(0)
+    events = 200
+    start = time.perf_counter()
+    for _ in range(events):
+        first = rng.randrange(len(lines) - window)
+        for line in lines[first:first + window]:
+            tokenize_json_line(line)
+    per_event_ms = (time.perf_counter() - start) / events * 1000
+
+    result = {
+        "file_mb": round(len(text.encode("utf-8")) / (1024 * 1024), 1),
+        "lines": len(lines),
+        "tokenize_full_file_ms": round(full_seconds * 1000, 1),
+        "tokenize_per_event_ms": round(per_event_ms, 3),
+        "lines_per_event": window,
+    }
+    result.update(bench_highlight_widget(text, viewport_lines))
+    return result
+
+
+def bench_highlight_widget(text, viewport_lines):
+    """Custo por evento no widget Text de verdade (só com display)"""
+    root = open_tk()
+    if root is None:
+        return {"widget": "sem display, medido só o tokenizador"}
+
+    try:
+        import tkinter as tk
+
+        root.deiconify()
+        widget = tk.Text(root, height=viewport_lines)
+        widget.pack()
+        widget.insert("1.0", text)
+        root.update()
+        highlighter = ViewportHighlighter(widget)
+        total = int(widget.index("end-1c").split(".")[0])
+
+        rng = random.Random(0)
+        events = 100
+        start = time.perf_counter()
+        for _ in range(events):
+            widget.yview(f"{rng.randrange(total)}.0")
+            # Como após uma edição: a janela inteira é recolorida
+            highlighter.clean_range = None
+            highlighter.highlight()
+        per_event_ms = (time.perf_counter() - start) / events * 1000
+        return {"widget_per_event_ms": round(per_event_ms, 3)}
+    finally:
+        root.destroy()
+
+
+def bench_load(olts):
+    """load_data: leitura e json.load do catálogo"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "olt_commands.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(generate_catalog(olts), f, indent=2, ensure_ascii=False)
+        manager = bare_manager(data_file=path, persistence=PersistenceService())
+        median, best = timed(manager.load_data)
+        return {
+            "file_kb": round(os.path.getsize(path) / 1024, 1),
+            "load_data_ms": median,
+            "load_data_min_ms": best,
+        }
+
+
+def bench_tree(fanout, root):
+    """CompactCatalog e populate_tree de uma OLT com fanout² categorias"""
+    from tkinter import ttk
+
+    data = generate_catalog(olts=4, depth=2, fanout=fanout, commands=10)
+    olt_name = next(iter(data["olts"]))
+    build_median, _ = timed(lambda: CompactCatalog(data))
+
+    manager = bare_manager(data=data, compact_catalog=None, tree=ttk.Treeview(root))
+    manager.get_compact_catalog()
+    median, best = timed(lambda: manager.populate_tree(olt_name))
+    manager.tree.destroy()
+    return {
+        "items": fanout + fanout * fanout + fanout * fanout * 10,
+        "compact_catalog_ms": build_median,
+        "populate_tree_ms": median,
+        "populate_tree_min_ms": best,
+    }
+
+
+def bench_render(olts):
+    """ParsedTemplate: análise (sem cache) e renderização de todo o catálogo"""
+    rng = random.Random(0)
+    commands = [
+        command for _, _, command in iter_catalog_commands(generate_catalog(olts))
+    ]
+
+    def parse_all():
+        parse_template.cache_clear()
+        return [parse_template(command) for command in commands]
+
+    templates = parse_all()
+    values = [
+        {param: random_param(rng, param) for param in template.params}
+        for template in templates
+    ]
+    parse_median, _ = timed(parse_all)
+    render_median, render_best = timed(
+        lambda: [t.render(v) for t, v in zip(templates, values)]
+    )
+    return {
+        "commands": len(commands),
+        "parse_ms": parse_median,
+        "render_ms": render_median,
+        "render_min_ms": render_best,
+    }
+
+
+def bench_validate(count):
+    """CommandValidator.validate_params com parâmetros válidos e inválidos"""
+    rng = random.Random(0)
+    params = ["slot", "porta", "pon", "id", "sn", "mac"]
+    sets = []
+    for i in range(count):
+        values = {param: random_param(rng, param) for param in params}
+        if i % 10 == 0:
+            values["sn"] = "inválido!"
+        sets.append(values)
+    median, best = timed(
+        lambda: [CommandValidator.validate_params(values) for values in sets]
+    )
+    return {"validate_params_ms": median, "validate_params_min_ms": best}
+
+
+def bench_convert(lines):
+    """Conversor de ONUs: parse_onu_dump + build_zte_removal_batch"""
+    dump = "\n".join(generate_onu_lines("zte", lines))
+
+    def convert():
+        build_zte_removal_batch(parse_onu_dump(dump.split("\n")))
+
+    median, best = timed(convert)
+    return {"convert_onus_ms": median, "convert_onus_min_ms": best}
+
+
+def bench_history(entries):
+    """Abrir o histórico, add_command e get_recent_commands"""
+    catalog = generate_catalog()
+    with tempfile.TemporaryDirectory() as tmp, working_directory(tmp):
+        with open("command_history.jsonl", "w", encoding="utf-8") as f:
+            for entry in generate_history(catalog, entries):
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        persistence = PersistenceService()
+        start = time.perf_counter()
+        history = CommandHistory(persistence)
+        open_ms = (time.perf_counter() - start) * 1000
+        # A sincronização do SQLite roda na thread de gravação
+        start = time.perf_counter()
+        persistence.flush(history.db_file)
+        index_sync_ms = (time.perf_counter() - start) * 1000
+
+        adds = 200
+        start = time.perf_counter()
+        for i in range(adds):
+            history.add_command(f"show gpon onu by sn ZTEG{i:08X}", "OLT 1", "Geral")
+        add_ms = (time.perf_counter() - start) * 1000 / adds
+        persistence.flush()
+
+        recent_20, _ = timed(lambda: history.get_recent_commands(20))
+        recent_1000, _ = timed(lambda: history.get_recent_commands(1000), repeat=3)
+        if history.database is not None:
+            history.database.close()
+        return {
+            "open_ms": round(open_ms, 3),
+            "index_sync_ms": round(index_sync_ms, 3),
+            "add_command_ms": round(add_ms, 3),
+            "recent_20_ms": recent_20,
+            "recent_1000_ms": recent_1000,
+        }
+
+
+def bench_favorites(entries, root):
+    """update_favorites_list com a lista virtual já montada"""
+    catalog = generate_catalog()
+    with tempfile.TemporaryDirectory() as tmp, working_directory(tmp):
+        with open("favorite_commands.json", "w", encoding="utf-8") as f:
+            json.dump(generate_favorites(catalog, entries), f, ensure_ascii=False)
+
+        persistence = PersistenceService()
+        start = time.perf_counter()
+        favorites = FavoriteCommands(persistence)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        manager = bare_manager(favorites=favorites)
+        manager.favorites_view = VirtualListView(
+            root, ("nome", "comando", "olt"), manager.get_favorite_row, style="Treeview"
+        )
+        manager.favorites_view.tree.pack()
+
+        def refresh():
+            manager.update_favorites_list()
+            root.update_idletasks()
+
+        median, best = timed(refresh)
+        manager.favorites_view.tree.destroy()
+        return {
+            "load_ms": round(load_ms, 3),
+            "refresh_ms": median,
+            "refresh_min_ms": best,
+        }
+
+
+def run_sized(name, func, quick, *args):
+    """Executar func para cada tamanho de SIZES[name]"""
+    sizes = SIZES[name][:1] if quick else SIZES[name]
+    results = {}
+    for size in sizes:
+        results[str(size)] = func(size, *args)
+        print(f"{name} [{size}]: {results[str(size)]}")
+    return results
+
+
+def run_tk(name, func, quick):
+    """Como run_sized, para benchmarks que precisam de uma janela Tk"""
+    root = open_tk()
+    if root is None:
+        print(f"{name}: pulado (sem display e sem Xvfb)")
+        return {"skipped": "sem display"}
+    try:
+        return run_sized(name, func, quick, root)
+    finally:
+        root.destroy()
+
+
+def flatten(results, prefix=""):
+    """{"tree": {"4": {"populate_tree_ms": 1.0}}} -> {"tree.4.populate_tree_ms": 1.0}"""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(results, baseline, threshold):
+    """Imprimir as diferenças para a linha de base; retorna as regressões"""
+    current = flatten(results)
+    previous = flatten(baseline.get("results", {}))
+    regressions = []
+    for key in sorted(current.keys() & previous.keys()):
+        higher_is_better = next(
+            (better for suffix, better in COMPARED_SUFFIXES.items()
+             if key.endswith(suffix)),
+            None,
+        )
+        old, new = previous[key], current[key]
+        if higher_is_better is None or not isinstance(new, (int, float)) or not old:
+            continue
+        ratio = new / old
+        worse = 1 / ratio if higher_is_better else ratio
+        mark = ""
+        if key.endswith("_ms") and abs(new - old) < NOISE_FLOOR_MS:
+            pass
+        elif worse > threshold:
+            mark = "  <-- REGRESSÃO"
+            regressions.append(key)
+        elif worse < 1 / threshold:
+            mark = "  (melhorou)"
+        print(f"{key}: {old} -> {new} ({ratio:.2f}x){mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do OLT Command Manager")
+    benchmarks = [
+        "load", "tree", "render", "validate", "convert", "history", "favorites",
+        "log", "highlight", "memory",
+    ]
+    parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        metavar="benchmark",
+        help=f"all (padrão) ou: {', '.join(benchmarks)}",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Rodar só o menor tamanho de cada um"
+    )
+    parser.add_argument(
+        "--size-mb", type=int, help="Tamanho dos dados de log/highlight (MB)"
+    )
+    parser.add_argument(
+        "--olts", type=int, default=50, help="OLTs no benchmark de memória"
+    )
+    parser.add_argument("--output", help="Gravar os resultados neste JSON")
+    parser.add_argument("--compare", help="JSON de uma execução anterior (base)")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Razão a partir da qual uma métrica conta como regressão",
+    )
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(benchmarks) - {"all"}
+    if unknown:
+        parser.error(f"benchmark desconhecido: {', '.join(sorted(unknown))}")
+    if not args.benchmarks or "all" in args.benchmarks:
+        selected = benchmarks
+    else:
+        selected = args.benchmarks
+
+    results = {}
+    if "load" in selected:
+        results["load"] = run_sized("load", bench_load, args.quick)
+    if "tree" in selected:
+        results["tree"] = run_tk("tree", bench_tree, args.quick)
+    if "render" in selected:
+        results["render"] = run_sized("render", bench_render, args.quick)
+    if "validate" in selected:
+        results["validate"] = run_sized("validate", bench_validate, args.quick)
+    if "convert" in selected:
+        results["convert"] = run_sized("convert", bench_convert, args.quick)
+    if "history" in selected:
+        results["history"] = run_sized("history", bench_history, args.quick)
+    if "favorites" in selected:
+        results["favorites"] = run_tk("favorites", bench_favorites, args.quick)
+    if "log" in selected:
+        size_mb = args.size_mb or (5 if args.quick else 50)
+        results["log"] = bench_log_converter(size_mb)
+        print("log_converter:", results["log"])
+    if "highlight" in selected:
+        results["highlight"] = bench_highlight(args.size_mb or 5)
+        print("highlight:", results["highlight"])
+    if "memory" in selected:
+        results["memory"] = bench_memory(args.olts)
+        print("memory:", results["memory"])
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressão(ões) acima de {args.threshold}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
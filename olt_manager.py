@@ -1,11 +1,49 @@
-from tkinter import ttk, messagebox, scrolledtext, simpledialog
+import time
+
+# Início da importação do módulo (para o perfil de inicialização)
+IMPORT_STARTED = time.perf_counter()
+
+from tkinter import ttk, filedialog, messagebox, scrolledtext, simpledialog
 import tkinter as tk
-from datetime import datetime
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache, wraps
+from itertools import islice
+import bisect
+import csv
+import gzip
+import hashlib
+import heapq
 import json
+import math
 import os
+import queue
 import re
 import textwrap
 import sys
+import tempfile
+import threading
+import unicodedata
+import uuid
+
+try:
+    import sqlite3
+except ImportError:  # Python compilado sem SQLite
+    sqlite3 = None
+
+try:
+    import jsonschema
+except ImportError:  # Validação do catálogo usa a verificação embutida
+    jsonschema = None
+
+
+def ensure_entry_id(entry, *fields):
+    """Garantir um ID estável para entradas gravadas antes da existência de IDs"""
+    if "id" not in entry:
+        key = "|".join(str(entry.get(field, "")) for field in fields)
+        entry["id"] = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return entry
 
 
 class CommandValidator:
@@ -113,58 +151,842 @@ class CommandDocumentation:
         return issues
 
 
-class CommandHistory:
+def atomic_write_text(path, text):
+    """Gravar num arquivo temporário e substituir o destino de uma vez"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_file = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, path)
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
+
+
+def backup_corrupt_file(path):
+    """Preservar um arquivo ilegível antes que ele seja sobrescrito"""
+    backup = f"{path}.corrupt-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    try:
+        os.replace(path, backup)
+        print(f"Arquivo ilegível preservado em {backup}")
+    except OSError:
+        pass
+
+
+class PendingWrite:
+    """Alterações ainda não gravadas de um arquivo"""
+
+    __slots__ = (
+        "snapshot", "appends", "tasks", "callbacks", "first_marked", "due", "marks"
+    )
+
+    def __init__(self, due, now):
+        # Conteúdo completo do arquivo (callable que devolve texto) ou None
+        self.snapshot = None
+        # Trechos a acrescentar depois do snapshot (ou ao final do arquivo)
+        self.appends = []
+        # Tarefas executadas depois da gravação, na mesma thread e em ordem
+        self.tasks = []
+        # Funções chamadas na thread de gravação com o erro (ou None)
+        self.callbacks = []
+        self.first_marked = now
+        self.due = due
+        self.marks = 0
+
+
+class PersistenceService:
+    """Gravação em segundo plano de todos os arquivos da aplicação
+
+    Uma única thread grava os arquivos marcados como alterados. Várias
+    alterações do mesmo arquivo dentro do intervalo de espera viram uma só
+    gravação, e arquivos completos são sempre gravados de forma atômica.
+    """
+
+    DEFAULT_DELAY = 0.5
+
     def __init__(self):
-        self.history = []
+        self.pending = {}
+        self.metrics = {}
+        self.flush_on_exit_ms = None
+        self.condition = threading.Condition()
+        # Garante que nunca há duas gravações ao mesmo tempo
+        self.write_lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self.run, name="persistence-writer", daemon=True
+        )
+        self.thread.start()
+
+    # Agendamento
+    def write_json(self, path, snapshot, indent=2, delay=None, on_done=None):
+        """Agendar a gravação completa de um JSON; snapshot() devolve os dados"""
+        self.write_text(
+            path,
+            lambda: json.dumps(snapshot(), indent=indent, ensure_ascii=False),
+            delay,
+            on_done,
+        )
+
+    def write_text(self, path, snapshot, delay=None, on_done=None):
+        """Agendar a gravação completa de um arquivo de texto"""
+        with self.condition:
+            pending = self.mark(path, delay)
+            pending.snapshot = snapshot
+            # O novo conteúdo completo já inclui o que estava para ser acrescentado
+            pending.appends = []
+            if on_done is not None:
+                pending.callbacks.append(on_done)
+            self.condition.notify()
+
+    def append_text(self, path, text, delay=None, on_done=None):
+        """Agendar um acréscimo ao final do arquivo (ex.: JSONL)"""
+        with self.condition:
+            pending = self.mark(path, delay)
+            pending.appends.append(text)
+            if on_done is not None:
+                pending.callbacks.append(on_done)
+            self.condition.notify()
+
+    def run_task(self, path, task, delay=None):
+        """Agendar uma tarefa na thread de gravação, após as gravações do arquivo
+
+        Tarefas do mesmo arquivo executam na ordem em que foram agendadas e
+        nunca ao mesmo tempo que uma gravação ou rotação.
+        """
+        with self.condition:
+            pending = self.mark(path, delay)
+            pending.tasks.append(task)
+            self.condition.notify()
+
+    def mark(self, path, delay):
+        now = time.monotonic()
+        due = now + (self.DEFAULT_DELAY if delay is None else delay)
+        pending = self.pending.get(path)
+        if pending is None:
+            pending = self.pending[path] = PendingWrite(due, now)
+        else:
+            # Novas alterações nunca adiam o prazo já combinado para o arquivo
+            pending.due = min(pending.due, due)
+        pending.marks += 1
+        return pending
+
+    # Gravação
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                wait = min(p.due for p in self.pending.values()) - time.monotonic()
+                if wait > 0:
+                    self.condition.wait(wait)
+                    continue
+
+            with self.write_lock:
+                now = time.monotonic()
+                with self.condition:
+                    ready = [path for path, p in self.pending.items() if p.due <= now]
+                    jobs = [(path, self.pending.pop(path)) for path in ready]
+                for path, pending in jobs:
+                    self.execute(path, pending)
+
+    def execute(self, path, pending):
+        error = None
+        try:
+            if pending.snapshot is not None:
+                atomic_write_text(path, pending.snapshot())
+            if pending.appends:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(pending.appends))
+        except Exception as e:
+            error = e
+            print(f"Error saving {path}: {e}")
+        for task in pending.tasks:
+            try:
+                task()
+            except Exception as e:
+                print(f"Error running task for {path}: {e}")
+
+        self.record(path, pending, error)
+        for callback in pending.callbacks:
+            try:
+                callback(error)
+            except Exception as e:
+                print(f"Error after saving {path}: {e}")
+
+    def flush(self, path=None):
+        """Gravar agora as alterações pendentes (de um arquivo ou de todos)"""
+        with self.write_lock:
+            with self.condition:
+                paths = [path] if path is not None else list(self.pending)
+                jobs = [(p, self.pending.pop(p)) for p in paths if p in self.pending]
+            for job_path, pending in jobs:
+                self.execute(job_path, pending)
+
+    def flush_on_exit(self):
+        started = time.perf_counter()
+        self.flush()
+        self.flush_on_exit_ms = (time.perf_counter() - started) * 1000
+
+    # Métricas
+    def record(self, path, pending, error):
+        latency_ms = (time.monotonic() - pending.first_marked) * 1000
+        with self.condition:
+            self.update_stats(path, pending, latency_ms, error)
+
+    def update_stats(self, path, pending, latency_ms, error):
+        stats = self.metrics.setdefault(
+            path,
+            {
+                "writes": 0,
+                "marks": 0,
+                "errors": 0,
+                "last_error": None,
+                "last_latency_ms": 0.0,
+                "max_latency_ms": 0.0,
+                "total_latency_ms": 0.0,
+            },
+        )
+        stats["writes"] += 1
+        stats["marks"] += pending.marks
+        stats["last_latency_ms"] = latency_ms
+        stats["max_latency_ms"] = max(stats["max_latency_ms"], latency_ms)
+        stats["total_latency_ms"] += latency_ms
+        if error is not None:
+            stats["errors"] += 1
+            stats["last_error"] = str(error)
+
+    def get_metrics(self):
+        """Contadores e latência (da primeira alteração até a gravação) por arquivo"""
+        with self.condition:
+            result = {}
+            for path, stats in self.metrics.items():
+                result[path] = dict(
+                    stats,
+                    avg_latency_ms=stats["total_latency_ms"] / stats["writes"],
+                    coalesced=stats["marks"] - stats["writes"],
+                )
+            return {
+                "files": result,
+                "pending": len(self.pending),
+                "flush_on_exit_ms": self.flush_on_exit_ms,
+            }
+
+
+class HistoryDatabase:
+    """Índice SQLite do histórico, com busca textual (FTS5) e paginação"""
+
+    # Alterar ao mudar o esquema; o banco é reconstruído a partir do JSONL
+    SCHEMA_VERSION = "2"
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        # Usado pela thread de gravação (inserções) e pela interface (buscas)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+    @staticmethod
+    def is_available():
+        """Verificar se o SQLite embutido foi compilado com FTS5"""
+        if sqlite3 is None:
+            return False
+        try:
+            conn = sqlite3.connect(":memory:")
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+            conn.close()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def create_schema(self):
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            if self.get_meta("schema_version") not in (None, self.SCHEMA_VERSION):
+                self.conn.execute("DROP TABLE IF EXISTS history_fts")
+                self.conn.execute("DROP TABLE IF EXISTS history")
+                self.conn.execute("DELETE FROM meta")
+
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS history (
+                    seq INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    command TEXT NOT NULL,
+                    olt_model TEXT,
+                    category TEXT,
+                    timestamp TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_history_timestamp
+                    ON history(timestamp);
+                CREATE INDEX IF NOT EXISTS idx_history_olt_timestamp
+                    ON history(olt_model, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_history_category_timestamp
+                    ON history(category, timestamp);
+                CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+                    command, content='history', content_rowid='seq'
+                );
+                CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+                    INSERT INTO history_fts(rowid, command)
+                    VALUES (new.seq, new.command);
+                END;
+                CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+                    INSERT INTO history_fts(history_fts, rowid, command)
+                    VALUES ('delete', old.seq, old.command);
+                END;
+                """
+            )
+            self.set_meta("schema_version", self.SCHEMA_VERSION)
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def insert_entries(self, entries):
+        """Inserir entradas (em ordem cronológica) numa única transação"""
+        last_timestamp = None
+        with self.lock, self.conn:
+            for entry in entries:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO history "
+                    "(id, command, olt_model, category, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        entry["id"],
+                        entry.get("command", ""),
+                        entry.get("olt_model"),
+                        entry.get("category"),
+                        entry["timestamp"],
+                    ),
+                )
+                last_timestamp = entry["timestamp"]
+            if last_timestamp is not None:
+                self.set_meta("last_timestamp", last_timestamp)
+
+    def sync_from_log(self, history):
+        """Importar do JSONL apenas as entradas posteriores à última sincronizada"""
+        last_timestamp = self.get_last_timestamp()
+        pending = []
+        for entry in history.iter_all_reversed(flush=False):
+            if last_timestamp is not None and entry["timestamp"] <= last_timestamp:
+                break
+            pending.append(entry)
+        if pending:
+            self.insert_entries(reversed(pending))
+
+    def get_last_timestamp(self):
+        """Timestamp da entrada mais nova já sincronizada"""
+        with self.lock:
+            return self.get_meta("last_timestamp")
+
+    def usage_counts(self):
+        """Quantidade de cópias por (OLT, categoria)"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT olt_model, category, COUNT(*) FROM history "
+                "GROUP BY olt_model, category"
+            ).fetchall()
+        return {(olt_model, category): count for olt_model, category, count in rows}
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM history")
+            self.conn.execute("DELETE FROM meta WHERE key = 'last_timestamp'")
+
+    @staticmethod
+    def build_match_query(text):
+        """Transformar o texto digitado numa frase FTS5 com prefixo no último termo"""
+        return '"' + text.replace('"', '""') + '" *'
+
+    def search(
+        self,
+        text=None,
+        olt_model=None,
+        category=None,
+        since=None,
+        until=None,
+        before=None,
+        limit=50,
+    ):
+        """Buscar entradas, da mais nova para a mais antiga
+
+        before: (timestamp, id) da última linha da página anterior, para
+        paginação por chave em vez de OFFSET.
+        """
+        conditions = []
+        params = []
+        if text:
+            conditions.append(
+                "h.seq IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)"
+            )
+            params.append(self.build_match_query(text))
+        if olt_model:
+            conditions.append("h.olt_model = ?")
+            params.append(olt_model)
+        if category:
+            conditions.append("h.category = ?")
+            params.append(category)
+        if since:
+            conditions.append("h.timestamp >= ?")
+            params.append(since)
+        if until:
+            conditions.append("h.timestamp < ?")
+            params.append(until)
+        if before:
+            conditions.append("(h.timestamp, h.id) < (?, ?)")
+            params.extend(before)
+
+        query = (
+            "SELECT h.id, h.command, h.olt_model, h.category, h.timestamp "
+            "FROM history h"
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY h.timestamp DESC, h.id DESC LIMIT ?"
+        params.append(limit)
+
+        try:
+            with self.lock:
+                rows = self.conn.execute(query, params).fetchall()
+        except sqlite3.OperationalError:
+            # Consulta FTS malformada: tratar como sem resultados
+            return []
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class CommandHistory:
+    # Tamanho máximo do arquivo ativo antes de rotacionar para um arquivo .gz
+    MAX_FILE_SIZE = 1024 * 1024
+    # Entradas mais recentes que permanecem no arquivo ativo após a rotação
+    ROTATE_KEEP_ENTRIES = 200
+    # Quantidade máxima de arquivos compactados mantidos em disco
+    MAX_ARCHIVES = 50
+    # Entradas recentes mantidas em memória; as mais antigas são lidas do disco
+    RECENT_WINDOW = 200
+
+    def __init__(self, persistence=None):
+        self.persistence = persistence or PersistenceService()
+        self.history = deque(maxlen=self.RECENT_WINDOW)
         # Definir caminho do arquivo de histórico
         if hasattr(sys, "_MEIPASS"):
             # Se estiver rodando como executável PyInstaller
             exe_dir = os.path.dirname(sys.executable)
-            self.history_file = os.path.join(exe_dir, "command_history.json")
+            self.history_file = os.path.join(exe_dir, "command_history.jsonl")
+            self.legacy_history_file = os.path.join(exe_dir, "command_history.json")
         else:
             # Se estiver rodando como script
-            self.history_file = "command_history.json"
+            self.history_file = "command_history.jsonl"
+            self.legacy_history_file = "command_history.json"
+        self.db_file = os.path.splitext(self.history_file)[0] + ".db"
+        self.migrate_legacy_history()
         self.load_history()
+        # Índice SQLite; fica None até a sincronização terminar
+        self.database = None
+        self.database_enabled = HistoryDatabase.is_available()
+        self.open_database()
+        # Contagem de uso por (OLT, categoria), calculada na primeira consulta
+        self.usage_counts = None
+        # Resultado da contagem completa: (contagem, timestamp mais novo contado)
+        self.usage_scan = None
+        self.usage_scan_pending = False
+        # Incrementado por clear_all para descartar contagens em andamento
+        self.usage_generation = 0
+
+    def open_database(self):
+        """Abrir o índice SQLite opcional, sincronizando-o com o JSONL
+
+        A importação roda na thread de gravação; até ela terminar, search()
+        usa a varredura sequencial.
+        """
+        if not self.database_enabled:
+            return
+
+        def task():
+            try:
+                database = HistoryDatabase(self.db_file)
+            except Exception as e:
+                print(f"Error opening history database: {e}")
+                return
+            try:
+                database.sync_from_log(self)
+            except Exception as e:
+                print(f"Error syncing history database: {e}")
+                database.close()
+                return
+            self.database = database
+
+        self.persistence.run_task(self.db_file, task, delay=0)
+
+    def index_entries(self, entries):
+        """Inserir entradas no SQLite (executa na thread de gravação)"""
+        if self.database is not None:
+            try:
+                self.database.insert_entries(entries)
+            except sqlite3.Error as e:
+                print(f"Error indexing history: {e}")
 
     def add_command(self, command, olt_model, category):
         entry = {
+            "id": uuid.uuid4().hex,
             "command": command,
             "olt_model": olt_model,
             "category": category,
             "timestamp": datetime.now().isoformat(),
         }
         self.history.append(entry)
-        self.save_history()
+        self.append_entry(entry)
+        if self.usage_counts is not None:
+            key = (olt_model, category)
+            self.usage_counts[key] = self.usage_counts.get(key, 0) + 1
+        if self.database_enabled:
+            self.persistence.run_task(
+                self.db_file, lambda: self.index_entries([entry])
+            )
+        return entry
+
+    def append_entry(self, entry):
+        """Agendar o acréscimo de uma entrada ao final do arquivo JSONL"""
+        self.persistence.append_text(
+            self.history_file,
+            json.dumps(entry, ensure_ascii=False) + "\n",
+            on_done=self.check_rotation,
+        )
+
+    def check_rotation(self, error):
+        """Rotacionar o arquivo, se necessário (executa na thread de gravação)"""
+        if error is not None:
+            return
+        try:
+            if os.path.getsize(self.history_file) > self.MAX_FILE_SIZE:
+                self.rotate()
+        except Exception as e:
+            print(f"Error rotating history: {e}")
 
     def load_history(self):
+        """Carregar apenas a janela recente, lendo o final do arquivo"""
+        self.history.clear()
+        if not os.path.exists(self.history_file):
+            return
+
+        try:
+            self.repair_tail()
+            recent = []
+            for entry in self.iter_file_reversed(self.history_file):
+                recent.append(entry)
+                if len(recent) >= self.RECENT_WINDOW:
+                    break
+            self.history.extend(reversed(recent))
+        except Exception:
+            self.history.clear()
+
+    def repair_tail(self):
+        """Isolar uma última linha truncada (ex.: queda durante a escrita)"""
+        with open(self.history_file, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    @staticmethod
+    def parse_line(line):
+        """Converter uma linha JSONL em entrada, ignorando linhas inválidas"""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return None
+        return ensure_entry_id(entry, "timestamp", "command")
+
+    @classmethod
+    def iter_file_reversed(cls, path, block_size=64 * 1024):
+        """Ler entradas de um arquivo JSONL do fim para o início"""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            remainder = b""
+            while position > 0:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                lines = (f.read(read_size) + remainder).split(b"\n")
+                # A primeira linha do bloco pode estar incompleta
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    entry = cls.parse_line(line.decode("utf-8", errors="replace"))
+                    if entry is not None:
+                        yield entry
+            entry = cls.parse_line(remainder.decode("utf-8", errors="replace"))
+            if entry is not None:
+                yield entry
+
+    def iter_all_reversed(self, flush=True):
+        """Percorrer todo o histórico, do mais novo ao mais antigo, sob demanda
+
+        flush=False dentro de tarefas da thread de gravação, que já detém a
+        trava de gravação.
+        """
+        # Garantir que acréscimos ainda pendentes já estejam no arquivo
+        if flush:
+            self.persistence.flush(self.history_file)
         if os.path.exists(self.history_file):
+            yield from self.iter_file_reversed(self.history_file)
+
+        for archive_file in reversed(self.get_archive_files()):
             try:
-                with open(self.history_file, "r", encoding="utf-8") as f:
-                    self.history = json.load(f)
-            except Exception:
-                self.history = []
-        else:
-            self.history = []
+                with gzip.open(archive_file, "rt", encoding="utf-8") as f:
+                    entries = [self.parse_line(line) for line in f]
+            except (OSError, EOFError):
+                continue
+            for entry in reversed(entries):
+                if entry is not None:
+                    yield entry
+
+    def write_entries(self, path, entries):
+        """Gravar entradas em um arquivo JSONL de forma atômica"""
+        atomic_write_text(
+            path,
+            "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries),
+        )
+
+    def rotate(self):
+        """Mover as entradas antigas para um arquivo .gz e compactar o arquivo ativo"""
+        archive_file = os.path.join(
+            self.history_dir(),
+            f"{self.archive_prefix()}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.jsonl.gz",
+        )
+
+        # Percorrer o arquivo em fluxo, mantendo apenas as últimas entradas
+        kept = deque(maxlen=self.ROTATE_KEEP_ENTRIES)
+        archived = 0
+        with open(self.history_file, "r", encoding="utf-8", errors="replace") as src:
+            with gzip.open(archive_file, "wt", encoding="utf-8") as dst:
+                for line in src:
+                    if self.parse_line(line) is None:
+                        continue
+                    if len(kept) == kept.maxlen:
+                        dst.write(kept[0])
+                        archived += 1
+                    kept.append(line if line.endswith("\n") else line + "\n")
+
+        if not archived:
+            os.remove(archive_file)
+            return
+
+        atomic_write_text(self.history_file, "".join(kept))
+
+        # Descartar os arquivos compactados mais antigos
+        for old_archive in self.get_archive_files()[: -self.MAX_ARCHIVES]:
+            try:
+                os.remove(old_archive)
+            except OSError:
+                pass
+
+    def history_dir(self):
+        return os.path.dirname(os.path.abspath(self.history_file))
+
+    def archive_prefix(self):
+        return os.path.splitext(os.path.basename(self.history_file))[0] + "-"
+
+    def get_archive_files(self):
+        """Listar arquivos compactados do histórico, do mais antigo ao mais novo"""
+        prefix = self.archive_prefix()
+        try:
+            names = os.listdir(self.history_dir())
+        except OSError:
+            return []
+        return sorted(
+            os.path.join(self.history_dir(), name)
+            for name in names
+            if name.startswith(prefix) and name.endswith(".jsonl.gz")
+        )
+
+    def migrate_legacy_history(self):
+        """Converter o antigo command_history.json para o formato JSONL"""
+        if os.path.exists(self.history_file) or not os.path.exists(
+            self.legacy_history_file
+        ):
+            return
 
-    def save_history(self):
         try:
-            with open(self.history_file, "w", encoding="utf-8") as f:
-                json.dump(self.history, f, indent=2, ensure_ascii=False)
+            with open(self.legacy_history_file, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            legacy.sort(key=lambda x: x["timestamp"])
+            self.write_entries(self.history_file, legacy)
         except Exception:
+            # Arquivo antigo ilegível: manter intacto e começar vazio
+            return
+
+        try:
+            os.replace(self.legacy_history_file, self.legacy_history_file + ".bak")
+        except OSError:
             pass
 
     def get_recent_commands(self, limit=20):
-        return sorted(self.history, key=lambda x: x["timestamp"], reverse=True)[:limit]
+        """Comandos mais recentes primeiro; além da janela em memória, lê do disco"""
+        # Janela incompleta significa que todo o histórico já está em memória
+        # (a rotação sempre mantém pelo menos RECENT_WINDOW entradas no arquivo)
+        if limit <= len(self.history) or len(self.history) < self.history.maxlen:
+            return list(islice(reversed(self.history), limit))
+        return list(islice(self.iter_all_reversed(), limit))
+
+    def search(
+        self,
+        text=None,
+        olt_model=None,
+        category=None,
+        since=None,
+        until=None,
+        before=None,
+        limit=50,
+    ):
+        """Buscar no histórico completo; usa o SQLite quando disponível"""
+        if self.database is not None:
+            # Garantir que inserções ainda pendentes já estejam no índice
+            self.persistence.flush(self.db_file)
+            return self.database.search(
+                text, olt_model, category, since, until, before, limit
+            )
+
+        # Sem SQLite: varredura sequencial do JSONL e dos arquivos compactados
+        text = text.lower() if text else None
+        results = []
+        for entry in self.iter_all_reversed():
+            timestamp = entry["timestamp"]
+            if before and (timestamp, entry["id"]) >= tuple(before):
+                continue
+            if until and timestamp >= until:
+                continue
+            if since and timestamp < since:
+                break
+            if olt_model and entry.get("olt_model") != olt_model:
+                continue
+            if category and entry.get("category") != category:
+                continue
+            if text and text not in entry.get("command", "").lower():
+                continue
+            results.append(entry)
+            if len(results) >= limit:
+                break
+        return results
+
+    def get_usage_counts(self):
+        """Quantas vezes comandos de cada (OLT, categoria) foram copiados
+
+        A contagem de todo o histórico é feita uma vez na thread de gravação;
+        até ela terminar, conta apenas a janela recente em memória.
+        """
+        if self.usage_counts is not None:
+            return self.usage_counts
+
+        scan = self.usage_scan
+        if scan is None:
+            if not self.usage_scan_pending:
+                self.usage_scan_pending = True
+                generation = self.usage_generation
+                self.persistence.run_task(
+                    self.history_file, lambda: self.scan_usage(generation), delay=0
+                )
+            return self.count_window()
+
+        counts, newest = scan
+        # Somar as entradas acrescentadas depois da contagem
+        self.usage_counts = self.count_window(newest, counts)
+        return self.usage_counts
+
+    def count_window(self, after=None, counts=None):
+        """Contar por (OLT, categoria) as entradas da janela em memória"""
+        counts = dict(counts or {})
+        for entry in self.history:
+            if after is not None and entry["timestamp"] <= after:
+                continue
+            key = (entry.get("olt_model"), entry.get("category"))
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def scan_usage(self, generation):
+        """Contar o uso em todo o histórico (executa na thread de gravação)"""
+        counts = None
+        newest = None
+        if self.database is not None:
+            try:
+                counts = self.database.usage_counts()
+                newest = self.database.get_last_timestamp()
+            except sqlite3.Error:
+                counts = None
+        if counts is None:
+            counts = {}
+            newest = None
+            for entry in self.iter_all_reversed(flush=False):
+                if newest is None:
+                    newest = entry["timestamp"]
+                key = (entry.get("olt_model"), entry.get("category"))
+                counts[key] = counts.get(key, 0) + 1
+        if generation == self.usage_generation:
+            self.usage_scan = (counts, newest)
+        self.usage_scan_pending = False
 
     def clear_all(self):
         """Limpar todo o histórico de comandos"""
-        self.history = []
-        self.save_history()
+        self.history.clear()
+        self.usage_counts = None
+        self.usage_scan = None
+        self.usage_generation += 1
+        if self.database_enabled:
+            self.persistence.run_task(self.db_file, self.clear_database)
+        self.persistence.write_text(
+            self.history_file, lambda: "", on_done=self.remove_archives
+        )
+
+    def clear_database(self):
+        """Esvaziar o índice SQLite (executa na thread de gravação)"""
+        if self.database is not None:
+            try:
+                self.database.clear()
+            except sqlite3.Error as e:
+                print(f"Error clearing history database: {e}")
+
+    def remove_archives(self, error=None):
+        """Apagar os arquivos compactados (executa na thread de gravação)"""
+        for archive_file in self.get_archive_files():
+            try:
+                os.remove(archive_file)
+            except OSError:
+                pass
 
 
 class FavoriteCommands:
-    def __init__(self):
-        self.favorites = []
+    def __init__(self, persistence=None):
+        self.persistence = persistence or PersistenceService()
+        # Favoritos por ID estável (também usado como iid na lista de favoritos);
+        # o dict preserva a ordem de inserção
+        self.by_id = {}
+        # Índices para consultas O(1) por comando e por nome
+        self.by_command = {}
+        self.by_name = {}
+        self.lock = threading.Lock()
         # Definir caminho do arquivo de favoritos
         if hasattr(sys, "_MEIPASS"):
             # Se estiver rodando como executável PyInstaller
@@ -175,8 +997,13 @@ class FavoriteCommands:
             self.favorites_file = "favorite_commands.json"
         self.load_favorites()
 
+    @property
+    def favorites(self):
+        return self.by_id.values()
+
     def add_favorite(self, command, name, olt_model, category, params=None):
         entry = {
+            "id": uuid.uuid4().hex,
             "name": name,
             "command": command,
             "olt_model": olt_model,
@@ -184,32 +1011,2000 @@ class FavoriteCommands:
             "params": params or {},
             "added_on": datetime.now().isoformat(),
         }
-        self.favorites.append(entry)
+        with self.lock:
+            self.index_entry(entry)
         self.save_favorites()
+        return entry
 
     def remove_favorite(self, command):
-        self.favorites = [f for f in self.favorites if f["command"] != command]
+        with self.lock:
+            for fav_id in list(self.by_command.get(command, ())):
+                self.unindex_entry(self.by_id[fav_id])
         self.save_favorites()
 
+    def remove_favorite_by_id(self, fav_id):
+        """Remover um único favorito pelo seu ID"""
+        with self.lock:
+            entry = self.by_id.get(fav_id)
+            if entry is None:
+                return
+            self.unindex_entry(entry)
+        self.save_favorites()
+
+    def get(self, fav_id):
+        return self.by_id.get(fav_id)
+
+    def find_by_name(self, name):
+        return [self.by_id[fav_id] for fav_id in self.by_name.get(name, ())]
+
+    def index_entry(self, entry):
+        self.by_id[entry["id"]] = entry
+        self.by_command.setdefault(entry["command"], set()).add(entry["id"])
+        self.by_name.setdefault(entry["name"], set()).add(entry["id"])
+
+    def unindex_entry(self, entry):
+        del self.by_id[entry["id"]]
+        for index, key in (
+            (self.by_command, entry["command"]),
+            (self.by_name, entry["name"]),
+        ):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(entry["id"])
+                if not ids:
+                    del index[key]
+
     def load_favorites(self):
+        favorites = []
         if os.path.exists(self.favorites_file):
             try:
                 with open(self.favorites_file, "r", encoding="utf-8") as f:
-                    self.favorites = json.load(f)
+                    favorites = json.load(f)
             except Exception:
-                self.favorites = []
-        else:
-            self.favorites = []
+                # Não deixar a próxima gravação apagar o arquivo danificado
+                backup_corrupt_file(self.favorites_file)
+                favorites = []
+
+        with self.lock:
+            self.by_id = {}
+            self.by_command = {}
+            self.by_name = {}
+            for fav in favorites:
+                ensure_entry_id(fav, "added_on", "name", "command")
+                self.index_entry(fav)
+
+    def snapshot(self):
+        """Cópia da lista de favoritos para gravação em segundo plano"""
+        with self.lock:
+            return list(self.by_id.values())
 
     def save_favorites(self):
-        try:
-            with open(self.favorites_file, "w", encoding="utf-8") as f:
-                json.dump(self.favorites, f, indent=2, ensure_ascii=False)
-        except Exception:
-            pass
+        """Agendar a gravação; alterações em sequência viram uma só escrita"""
+        self.persistence.write_json(self.favorites_file, self.snapshot)
+
+    def flush(self):
+        self.persistence.flush(self.favorites_file)
 
     def is_favorite(self, command):
-        return any(f["command"] == command for f in self.favorites)
+        return command in self.by_command
+
+
+# Interface da ONU: gpon-onu_1/2/6:3 (ZTE) ou 1/2/6:3 nas telas de estado
+ONU_INTERFACE_PATTERN = re.compile(r"(?:gpon[-_]onu_)?(\d+)/(\d+)/(\d+):(\d+)")
+# Huawei "display ont info": F/ S/P  ONT-ID  SN (ex.: "0/ 1/0    0  48575443ABCDEF01")
+HUAWEI_ONT_PATTERN = re.compile(
+    r"^\s*(\d+)\s*/\s*(\d+)\s*/\s*(\d+)\s+(\d+)\s+([0-9A-Fa-f]{16}|[A-Za-z]{4}[0-9A-Fa-f]{8})\b"
+)
+ONU_SN_PATTERN = re.compile(r"(?:SN:)?\b([A-Za-z]{4}[0-9A-Fa-f]{8}|[0-9A-Fa-f]{16})\b")
+ONU_MAC_PATTERN = re.compile(
+    r"\b([0-9A-Fa-f]{2}(?:[:-][0-9A-Fa-f]{2}){5}|[0-9A-Fa-f]{4}(?:\.[0-9A-Fa-f]{4}){2})\b"
+)
+ONU_STATE_PATTERN = re.compile(
+    r"\b(working|ready|online|offline|los|dyinggasp|logging|syncmib|authpass|"
+    r"disable|power[-_ ]?off)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_sn(sn):
+    """Serial em maiúsculas; o formato hexadecimal (Huawei) vira o textual
+
+    "48575443ABCDEF01" e "HWTCABCDEF01" são a mesma ONU.
+    """
+    sn = sn.strip().upper()
+    if sn.startswith("SN:"):
+        sn = sn[3:]
+    if len(sn) == 16 and all(c in "0123456789ABCDEF" for c in sn):
+        vendor = bytes.fromhex(sn[:8]).decode("ascii", "replace")
+        if vendor.isalpha() and vendor.isupper():
+            sn = vendor + sn[8:]
+    return sn
+
+
+def normalize_mac(mac):
+    """MAC como 12 dígitos hexadecimais minúsculos, sem separadores"""
+    digits = re.sub(r"[^0-9A-Fa-f]", "", mac).lower()
+    return digits if len(digits) == 12 else ""
+
+
+def parse_onu_line(line):
+    """Extrair uma ONU de uma linha de dump de estado (ZTE ou Huawei)
+
+    Retorna um dict com slot, porta, pon, id e, quando presentes, sn, mac
+    e state; ou None se a linha não descreve uma ONU.
+    """
+    match = HUAWEI_ONT_PATTERN.match(line)
+    if match:
+        slot, porta, pon, onu_id, sn = match.groups()
+        rest = line[match.end():]
+    else:
+        match = ONU_INTERFACE_PATTERN.search(line)
+        if not match:
+            return None
+        slot, porta, pon, onu_id = match.groups()
+        rest = line[match.end():]
+        sn_match = ONU_SN_PATTERN.search(rest)
+        sn = sn_match.group(1) if sn_match else ""
+
+    record = {"slot": slot, "porta": porta, "pon": pon, "id": onu_id}
+    if sn:
+        record["sn"] = normalize_sn(sn)
+    mac_match = ONU_MAC_PATTERN.search(rest)
+    if mac_match:
+        record["mac"] = normalize_mac(mac_match.group(1))
+    state_match = ONU_STATE_PATTERN.search(rest)
+    if state_match:
+        record["state"] = state_match.group(1).lower()
+    return record
+
+
+def parse_onu_dump(lines):
+    """Gerar os registros de ONU encontrados em um dump de estado"""
+    for line in lines:
+        record = parse_onu_line(line)
+        if record is not None:
+            yield record
+
+
+def parse_onu_csv(lines):
+    """Gerar registros de ONU de um CSV com cabeçalho
+
+    Colunas aceitas (sem diferenciar maiúsculas): sn, mac, state, id e
+    slot/porta/pon ou uma coluna única pon_id/interface ("1/2/6").
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        row = {
+            (key or "").strip().lower(): (value or "").strip()
+            for key, value in row.items()
+        }
+        interface = row.get("pon_id") or row.get("interface") or ""
+        if interface:
+            match = ONU_INTERFACE_PATTERN.search(interface)
+            if match:
+                slot, porta, pon, onu_id = match.groups()
+                if not row.get("id"):
+                    row["id"] = onu_id
+            else:
+                parts = interface.split("/")
+                if len(parts) != 3:
+                    continue
+                slot, porta, pon = (part.strip() for part in parts)
+        else:
+            slot, porta, pon = row.get("slot"), row.get("porta"), row.get("pon")
+        if not (slot and porta and pon and row.get("id")):
+            continue
+
+        record = {"slot": slot, "porta": porta, "pon": pon, "id": row["id"]}
+        if row.get("sn"):
+            record["sn"] = normalize_sn(row["sn"])
+        if row.get("mac"):
+            record["mac"] = normalize_mac(row["mac"])
+        if row.get("state"):
+            record["state"] = row["state"].lower()
+        yield record
+
+
+class OnuInventory:
+    """Inventário local de ONUs indexado por SN, MAC e interface+id
+
+    Os três índices são dicts, então as consultas são O(1) mesmo com
+    centenas de milhares de ONUs. Importações fazem upsert registro a
+    registro: só o que mudou é reindexado, e um arquivo já importado com
+    o mesmo conteúdo é ignorado.
+    """
+
+    def __init__(self, persistence=None):
+        self.persistence = persistence or PersistenceService()
+        # (slot, porta, pon, id) -> registro
+        self.by_key = {}
+        # SN normalizado -> chave; MAC normalizado -> chave
+        self.by_sn = {}
+        self.by_mac = {}
+        # Impressão digital (sha1) de cada origem já importada
+        self.sources = {}
+        # Funções chamadas com cada registro novo ou alterado
+        self.listeners = []
+        self.lock = threading.Lock()
+        if hasattr(sys, "_MEIPASS"):
+            # Se estiver rodando como executável PyInstaller
+            exe_dir = os.path.dirname(sys.executable)
+            self.inventory_file = os.path.join(exe_dir, "onu_inventory.json")
+        else:
+            # Se estiver rodando como script
+            self.inventory_file = "onu_inventory.json"
+        self.load_inventory()
+
+    @staticmethod
+    def record_key(record):
+        return (record["slot"], record["porta"], record["pon"], record["id"])
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def find_by_sn(self, sn):
+        key = self.by_sn.get(normalize_sn(sn))
+        return self.by_key.get(key) if key else None
+
+    def find_by_mac(self, mac):
+        key = self.by_mac.get(normalize_mac(mac))
+        return self.by_key.get(key) if key else None
+
+    def find_by_interface(self, slot, porta, pon, onu_id):
+        return self.by_key.get((str(slot), str(porta), str(pon), str(onu_id)))
+
+    def unindex(self, key):
+        record = self.by_key.pop(key)
+        if self.by_sn.get(record.get("sn")) == key:
+            del self.by_sn[record["sn"]]
+        if self.by_mac.get(record.get("mac")) == key:
+            del self.by_mac[record["mac"]]
+
+    def upsert(self, record):
+        """Inserir/atualizar um registro; retorna "added", "updated" ou "unchanged" """
+        key = self.record_key(record)
+        current = self.by_key.get(key)
+        if current is not None:
+            merged = dict(current)
+            merged.update(record)
+            if merged == current:
+                return "unchanged"
+            record = merged
+
+        # Um SN/MAC que aparece em outra interface foi movido: sai da antiga
+        for index, field in ((self.by_sn, "sn"), (self.by_mac, "mac")):
+            value = record.get(field)
+            old_key = index.get(value) if value else None
+            if old_key is not None and old_key != key:
+                self.unindex(old_key)
+        if current is not None:
+            self.unindex(key)
+
+        self.by_key[key] = record
+        if record.get("sn"):
+            self.by_sn[record["sn"]] = key
+        if record.get("mac"):
+            self.by_mac[record["mac"]] = key
+        for listener in self.listeners:
+            listener(record)
+        return "updated" if current is not None else "added"
+
+    def import_records(self, records, source=None, fingerprint=None):
+        """Importar registros de forma incremental
+
+        Retorna um dict com as contagens de added/updated/unchanged, ou
+        None se a origem já foi importada com o mesmo conteúdo.
+        """
+        if source and fingerprint and self.sources.get(source) == fingerprint:
+            return None
+
+        stats = {"added": 0, "updated": 0, "unchanged": 0}
+        with self.lock:
+            for record in records:
+                stats[self.upsert(record)] += 1
+            if source and fingerprint:
+                self.sources[source] = fingerprint
+        if stats["added"] or stats["updated"] or source:
+            self.save_inventory()
+        return stats
+
+    def import_text(self, text, source=None):
+        """Importar um CSV (detectado pelo cabeçalho) ou um dump de estado"""
+        fingerprint = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        lines = text.splitlines()
+        first = next((line for line in lines if line.strip()), "")
+        header = re.search(r"\b(sn|mac|pon_id|interface|slot)\b", first, re.I)
+        if "," in first and header:
+            records = parse_onu_csv(lines)
+        else:
+            records = parse_onu_dump(lines)
+        return self.import_records(records, source, fingerprint)
+
+    def import_file(self, path):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        return self.import_text(text, source=os.path.abspath(path))
+
+    def load_inventory(self):
+        data = {}
+        if os.path.exists(self.inventory_file):
+            try:
+                with open(self.inventory_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                # Não deixar a próxima gravação apagar o arquivo danificado
+                backup_corrupt_file(self.inventory_file)
+                data = {}
+
+        with self.lock:
+            self.by_key = {}
+            self.by_sn = {}
+            self.by_mac = {}
+            self.sources = dict(data.get("sources", {}))
+            for record in data.get("onus", []):
+                self.upsert(record)
+
+    def snapshot(self):
+        """Cópia do inventário para gravação em segundo plano"""
+        with self.lock:
+            return {"sources": dict(self.sources), "onus": list(self.by_key.values())}
+
+    def save_inventory(self):
+        self.persistence.write_json(self.inventory_file, self.snapshot, indent=None)
+
+    def clear(self):
+        with self.lock:
+            self.by_key = {}
+            self.by_sn = {}
+            self.by_mac = {}
+            self.sources = {}
+        self.save_inventory()
+
+
+# Acima deste tamanho o editor abre uma OLT por vez em vez do arquivo todo
+LARGE_CATALOG_BYTES = 1024 * 1024
+
+
+def replace_catalog_node(data, path, value):
+    """Nova raiz com value no caminho, copiando só os dicts do caminho
+
+    O restante da árvore é compartilhado com a versão anterior, então as
+    partes que não mudaram mantêm a mesma identidade.
+    """
+    if not path:
+        return value
+    new_node = dict(data)
+    new_node[path[0]] = replace_catalog_node(data[path[0]], path[1:], value)
+    return new_node
+
+
+def get_catalog_node(data, path):
+    for key in path:
+        data = data[key]
+    return data
+
+
+class CatalogSerializer:
+    """Serializar o catálogo reaproveitando o JSON de OLTs que não mudaram
+
+    O texto de cada OLT fica em cache junto com o objeto que o gerou; como
+    as edições trocam apenas os dicts do caminho editado, só a OLT alterada
+    é serializada de novo. O resultado é idêntico ao de
+    json.dumps(data, indent=2, ensure_ascii=False).
+    """
+
+    def __init__(self):
+        # nome da OLT -> (objeto da OLT, JSON já indentado para o arquivo)
+        self.fragments = {}
+        self.lock = threading.Lock()
+
+    def fragment(self, name, olt):
+        with self.lock:
+            cached = self.fragments.get(name)
+        if cached is not None and cached[0] is olt:
+            return cached[1]
+        text = json.dumps(olt, indent=2, ensure_ascii=False).replace("\n", "\n    ")
+        with self.lock:
+            self.fragments[name] = (olt, text)
+        return text
+
+    def serialize(self, data):
+        olts = data.get("olts")
+        if not isinstance(olts, dict) or not olts or set(data) != {"olts"}:
+            return json.dumps(data, indent=2, ensure_ascii=False)
+
+        with self.lock:
+            # Descartar OLTs removidas ou renomeadas
+            for name in set(self.fragments) - set(olts):
+                del self.fragments[name]
+        parts = [
+            f"    {json.dumps(name, ensure_ascii=False)}: {self.fragment(name, olt)}"
+            for name, olt in olts.items()
+        ]
+        return '{\n  "olts": {\n' + ",\n".join(parts) + "\n  }\n}"
+
+
+# Estrutura esperada de olt_commands.json (JSON Schema, draft 7)
+CATALOG_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "required": ["olts"],
+    "properties": {
+        "olts": {
+            "type": "object",
+            "minProperties": 1,
+            "additionalProperties": {"$ref": "#/definitions/olt"},
+        }
+    },
+    "definitions": {
+        "olt": {
+            "type": "object",
+            "required": ["categories"],
+            "properties": {
+                "description": {"type": "string"},
+                "categories": {"$ref": "#/definitions/category"},
+            },
+        },
+        "category": {
+            "type": "object",
+            "additionalProperties": {
+                "anyOf": [
+                    {"type": "string"},
+                    {"type": "array", "items": {"type": "string"}},
+                    {"$ref": "#/definitions/category"},
+                ]
+            },
+        },
+    },
+}
+
+
+class CatalogValidator:
+    """Validar o catálogo (ou uma seção dele) contra CATALOG_SCHEMA
+
+    Usa o jsonschema quando instalado (validadores compilados uma vez) e
+    uma verificação equivalente em Python puro caso contrário; os erros do
+    jsonschema são traduzidos para as mesmas mensagens da verificação em
+    Python. O resultado fica em cache pelo texto da seção, então validar
+    de novo um texto que não mudou (ex.: ao salvar) não percorre nada.
+    """
+
+    # Tipo da seção pelo tamanho do caminho no catálogo
+    SECTION_KINDS = {0: "catalog", 2: "olt", 4: "category"}
+    CACHE_SIZE = 32
+    # Exemplo com um erro de cada tipo, para conferir as duas verificações
+    SELF_CHECK_SAMPLE = {
+        "description": 1,
+        "categories": {
+            "x": 5,
+            "z": ["a", 3],
+            "y": {"q": None, "ok": "show version"},
+            "w": {"v": {"u": {}}},
+        },
+    }
+
+    def __init__(self):
+        self.validators = {}
+        if jsonschema is not None:
+            for kind in ("olt", "category"):
+                schema = {"$ref": f"#/definitions/{kind}"}
+                schema["definitions"] = CATALOG_SCHEMA["definitions"]
+                cls = jsonschema.validators.validator_for(CATALOG_SCHEMA)
+                self.validators[kind] = cls(schema)
+            # Se a tradução dos erros divergir da verificação em Python (ex.:
+            # outra versão do jsonschema), usar só a verificação em Python
+            if not self.paths_agree(self.SELF_CHECK_SAMPLE):
+                self.validators = {}
+        # (caminho da seção, texto) -> erros, dos textos validados por último
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def validate(self, path, node, text=None):
+        """Lista de (caminho relativo à seção, mensagem) com os erros
+
+        text é o texto de onde node foi lido; quando informado, serve de
+        chave do cache.
+        """
+        key = None
+        if text is not None:
+            key = (tuple(path), text.strip())
+            with self.lock:
+                cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        errors = self.validate_section(path, node)
+        if key is not None:
+            with self.lock:
+                if len(self.cache) >= self.CACHE_SIZE:
+                    self.cache.clear()
+                self.cache[key] = errors
+        return errors
+
+    def validate_section(self, path, node):
+        kind = self.SECTION_KINDS.get(len(path), "category")
+        if kind != "catalog":
+            return self.check(kind, node)
+
+        if not isinstance(node, dict) or "olts" not in node:
+            return [((), 'O catálogo deve ser um objeto com a chave "olts".')]
+        olts = node["olts"]
+        if not isinstance(olts, dict):
+            return [(("olts",), '"olts" deve ser um objeto.')]
+        if not olts:
+            return [(("olts",), "O catálogo deve ter pelo menos uma OLT.")]
+        errors = []
+        for name, olt in olts.items():
+            errors += [
+                (("olts", name) + error_path, message)
+                for error_path, message in self.check("olt", olt)
+            ]
+        return errors
+
+    def check(self, kind, node):
+        if kind in self.validators:
+            errors = []
+            for error in self.validators[kind].iter_errors(node):
+                self.translate_error(kind, error, errors)
+            # O jsonschema não segue a ordem do documento
+            errors.sort(key=lambda error: self.document_order(node, error[0]))
+            return errors
+        return self.check_builtin(kind, node)
+
+    def check_builtin(self, kind, node):
+        errors = []
+        if kind == "olt":
+            self.check_olt(node, (), errors)
+        else:
+            self.check_category(node, (), errors)
+        return errors
+
+    def paths_agree(self, node):
+        """As duas verificações encontram os mesmos erros em node?"""
+        return sorted(self.check("olt", node)) == sorted(
+            self.check_builtin("olt", node)
+        )
+
+    @staticmethod
+    def document_order(node, path):
+        """Posição de cada chave de path no seu objeto (ordem do documento)"""
+        order = []
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                break
+            order.append(list(node).index(key))
+            node = node[key]
+        return order
+
+    @staticmethod
+    def translate_error(kind, error, errors):
+        """Erro do jsonschema -> (caminho, mensagem) da verificação em Python
+
+        Num "anyOf" (comando: texto, lista ou categoria) o jsonschema só
+        informa que nenhuma alternativa serviu; os erros internos de uma
+        subcategoria ficam em error.context e são percorridos aqui.
+        """
+        path = tuple(error.absolute_path)
+        if error.validator == "anyOf":
+            if isinstance(error.instance, dict):
+                # Alternativa 2 (subcategoria): os erros dos itens internos
+                for sub_error in error.context:
+                    if sub_error.relative_schema_path[0] == 2:
+                        CatalogValidator.translate_error(kind, sub_error, errors)
+            elif isinstance(error.instance, list):
+                errors.append((path, "Comandos em lista devem ser textos."))
+            else:
+                errors.append(
+                    (path, "O comando deve ser texto, lista ou categoria.")
+                )
+        elif error.validator == "required":
+            errors.append((path, 'A OLT deve ter a chave "categories".'))
+        elif kind == "olt" and path == ("description",):
+            errors.append((path, '"description" deve ser texto.'))
+        elif kind == "olt" and not path:
+            errors.append((path, "A OLT deve ser um objeto."))
+        else:
+            errors.append((path, "A categoria deve ser um objeto."))
+
+    def check_olt(self, node, path, errors):
+        if not isinstance(node, dict):
+            errors.append((path, "A OLT deve ser um objeto."))
+            return
+        if "description" in node and not isinstance(node["description"], str):
+            errors.append((path + ("description",), '"description" deve ser texto.'))
+        if "categories" not in node:
+            errors.append((path, 'A OLT deve ter a chave "categories".'))
+        else:
+            self.check_category(node["categories"], path + ("categories",), errors)
+
+    def check_category(self, node, path, errors):
+        if not isinstance(node, dict):
+            errors.append((path, "A categoria deve ser um objeto."))
+            return
+        for key, value in node.items():
+            if isinstance(value, dict):
+                self.check_category(value, path + (key,), errors)
+            elif isinstance(value, list):
+                if not all(isinstance(line, str) for line in value):
+                    errors.append(
+                        (path + (key,), "Comandos em lista devem ser textos.")
+                    )
+            elif not isinstance(value, str):
+                errors.append(
+                    (path + (key,), "O comando deve ser texto, lista ou categoria.")
+                )
+
+
+def locate_json_path(text, path):
+    """Linha (1-based) onde a chave mais profunda de path aparece no texto"""
+    position = 0
+    for key in path:
+        if not isinstance(key, str):
+            continue
+        found = text.find(json.dumps(key, ensure_ascii=False) + ":", position)
+        if found < 0:
+            break
+        position = found
+    return text.count("\n", 0, position) + 1
+
+
+# Tokens de JSON por linha (JSON não tem quebras de linha dentro de strings)
+JSON_TOKEN_PATTERN = re.compile(
+    r'(?P<string>"(?:[^"\\]|\\.)*")(?P<colon>\s*:)?'
+    r"|(?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)"
+    r"|(?P<literal>\b(?:true|false|null)\b)"
+)
+PARAM_PLACEHOLDER_PATTERN = re.compile(r"\{\w+\}")
+
+
+def tokenize_json_line(line):
+    """Lista de (tag, início, fim) para colorir uma linha de JSON
+
+    Tags: json_key, json_string, json_number, json_literal e json_param
+    (marcadores {param} dentro das strings).
+    """
+    tokens = []
+    for match in JSON_TOKEN_PATTERN.finditer(line):
+        if match.group("string") is not None:
+            start, end = match.span("string")
+            tag = "json_key" if match.group("colon") else "json_string"
+            tokens.append((tag, start, end))
+            if "{" in match.group("string"):
+                for param in PARAM_PLACEHOLDER_PATTERN.finditer(line, start, end):
+                    tokens.append(("json_param", param.start(), param.end()))
+        else:
+            tokens.append((f"json_{match.lastgroup}", match.start(), match.end()))
+    return tokens
+
+
+class ViewportHighlighter:
+    """Colorir JSON apenas nas linhas visíveis de um Text (mais uma margem)
+
+    Cada passada custa no máximo as linhas da janela mais 2 × MARGIN,
+    independente do tamanho do arquivo. Passadas são agrupadas em um
+    after_idle e disparadas por edição, rolagem e redimensionamento; como
+    as tags acompanham o texto, linhas já coloridas fora da janela
+    continuam corretas quando linhas são inseridas acima delas.
+    """
+
+    MARGIN = 50
+    TAGS = ("json_key", "json_string", "json_number", "json_literal", "json_param")
+
+    def __init__(self, text):
+        self.text = text
+        self.job = None
+        # Faixa de linhas já colorida desde a última edição
+        self.clean_range = None
+
+        # Interceptar a rolagem (a barra continua recebendo as posições)
+        scroll_command = text.cget("yscrollcommand")
+
+        def on_scroll(first, last):
+            if scroll_command:
+                text.tk.call(scroll_command, first, last)
+            self.schedule()
+
+        text.configure(yscrollcommand=on_scroll)
+        text.bind("<KeyRelease>", self.invalidate, add="+")
+        text.bind("<<Paste>>", self.invalidate, add="+")
+        text.bind("<Configure>", lambda e: self.schedule(), add="+")
+
+    def set_colors(self, theme):
+        self.text.tag_configure("json_key", foreground=theme["syntax_key"])
+        self.text.tag_configure("json_string", foreground=theme["syntax_string"])
+        self.text.tag_configure("json_number", foreground=theme["syntax_number"])
+        self.text.tag_configure("json_literal", foreground=theme["syntax_literal"])
+        self.text.tag_configure(
+            "json_param", foreground=theme["syntax_param"], underline=True
+        )
+        # Placeholders ficam por cima da cor da string
+        self.text.tag_raise("json_param")
+
+    def invalidate(self, event=None):
+        """O texto mudou: recolorir a janela visível"""
+        self.clean_range = None
+        self.schedule()
+
+    def schedule(self):
+        if self.job is None:
+            self.job = self.text.after_idle(self.highlight)
+
+    def visible_range(self):
+        first = int(self.text.index("@0,0").split(".")[0])
+        last = int(self.text.index(f"@0,{self.text.winfo_height()}").split(".")[0])
+        total = int(self.text.index("end-1c").split(".")[0])
+        return max(1, first - self.MARGIN), min(total, last + self.MARGIN)
+
+    def highlight(self):
+        self.job = None
+        start, end = self.visible_range()
+        if self.clean_range is not None:
+            clean_start, clean_end = self.clean_range
+            if clean_start <= start and end <= clean_end:
+                return
+            # Só colorir o que ainda não foi colorido, ampliando a faixa limpa
+            if clean_start <= start <= clean_end:
+                start = clean_end + 1
+                self.clean_range = (clean_start, end)
+            elif clean_start <= end <= clean_end:
+                end = clean_start - 1
+                self.clean_range = (start, clean_end)
+            else:
+                self.clean_range = (start, end)
+        else:
+            self.clean_range = (start, end)
+        if start > end:
+            return
+        self.highlight_lines(start, end)
+
+    def highlight_lines(self, start, end):
+        """Recolorir as linhas start..end (inclusive)"""
+        for tag in self.TAGS:
+            self.text.tag_remove(tag, f"{start}.0", f"{end}.end")
+
+        ranges = {tag: [] for tag in self.TAGS}
+        content = self.text.get(f"{start}.0", f"{end}.end")
+        for offset, line in enumerate(content.split("\n")):
+            number = start + offset
+            for tag, token_start, token_end in tokenize_json_line(line):
+                ranges[tag].append(f"{number}.{token_start}")
+                ranges[tag].append(f"{number}.{token_end}")
+
+        # Uma chamada ao Tk por tag, com todas as faixas
+        for tag, indices in ranges.items():
+            if indices:
+                self.text.tag_add(tag, *indices)
+
+
+TEMPLATE_PARAM_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+class ParsedTemplate:
+    """Modelo de comando já separado em trechos fixos e parâmetros
+
+    segments alterna texto literal (posições pares) e nomes de parâmetro
+    (posições ímpares); params lista os parâmetros sem repetição, na ordem
+    em que aparecem. A renderização é uma única passada pelos trechos, sem
+    ler o texto de volta do widget.
+    """
+
+    __slots__ = ("text", "segments", "params")
+
+    def __init__(self, text):
+        self.text = text
+        self.segments = TEMPLATE_PARAM_PATTERN.split(text)
+        self.params = tuple(dict.fromkeys(self.segments[1::2]))
+
+    def render(self, values):
+        """Substituir os parâmetros preenchidos; os vazios ficam como {param}"""
+        if len(self.segments) == 1:
+            return self.text
+        parts = self.segments[:]
+        for i in range(1, len(parts), 2):
+            value = values.get(parts[i])
+            parts[i] = value if value else f"{{{parts[i]}}}"
+        return "".join(parts)
+
+
+@lru_cache(maxsize=1024)
+def parse_template(text):
+    """ParsedTemplate compartilhado por texto de comando"""
+    return ParsedTemplate(text)
+
+
+class CatalogNode:
+    __slots__ = ("name", "parent", "children", "template")
+
+    def __init__(self, name, parent, template=None):
+        self.name = name
+        self.parent = parent
+        # range com os ids dos filhos (categorias) ou None (comandos)
+        self.children = None
+        # Texto do comando (o mesmo objeto str de self.data) nos comandos
+        self.template = template
+
+
+class CompactCatalog:
+    """Índice da árvore de navegação sobre o catálogo carregado
+
+    O catálogo (dicts do JSON) continua sendo a fonte dos dados; este
+    índice só acrescenta um nó com __slots__ por item, guardado numa
+    lista (o id do nó é o índice e o iid na árvore da interface). Nomes e
+    comandos são os mesmos objetos str do catálogo, sem cópias. Os filhos
+    de cada categoria ocupam ids consecutivos, então a categoria guarda
+    só um range. Como a árvore guarda apenas o id, os itens do Treeview
+    não carregam mais uma cópia de cada comando na memória do Tcl.
+    """
+
+    def __init__(self, data):
+        # Referência ao mesmo dict de self.data, para detectar a troca do
+        # catálogo (não duplica nada)
+        self.source = data
+        self.nodes = []
+        # nome da OLT -> id do nó raiz
+        self.olts = {}
+        # Comandos em lista: linhas -> texto, para juntar cada um uma vez só
+        # (usado apenas durante a construção)
+        joined = {}
+        for olt_name, olt in data.get("olts", {}).items():
+            root = len(self.nodes)
+            self.nodes.append(CatalogNode(olt_name, None))
+            categories = olt.get("categories") if isinstance(olt, dict) else None
+            if isinstance(categories, dict):
+                self.add_children(root, categories, joined, top_level=True)
+            self.olts[olt_name] = root
+
+    @staticmethod
+    def command_text(command, joined):
+        if isinstance(command, str):
+            return command
+        if isinstance(command, list):
+            lines = tuple(str(line) for line in command)
+            return joined.setdefault(lines, "\n".join(lines))
+        return str(command)
+
+    def add_children(self, parent, data, joined, top_level=False):
+        items = list(data.items())
+
+        # Criar todos os filhos antes dos netos para que fiquem consecutivos
+        first = len(self.nodes)
+        for key, value in items:
+            if isinstance(value, dict) or top_level:
+                template = None
+            else:
+                template = self.command_text(value, joined)
+            self.nodes.append(CatalogNode(key, parent, template))
+        self.nodes[parent].children = range(first, len(self.nodes))
+
+        for offset, (key, value) in enumerate(items):
+            if isinstance(value, dict):
+                self.add_children(first + offset, value, joined)
+            elif top_level:
+                # Categoria que aponta direto para um comando: pasta com um
+                # único item "⚡ comando"
+                folder = first + offset
+                command = self.command_text(value, joined)
+                child = len(self.nodes)
+                self.nodes[folder].children = range(child, child + 1)
+                self.nodes.append(CatalogNode(f"⚡ {command}", folder, command))
+
+    def is_command(self, node_id):
+        return self.nodes[node_id].template is not None
+
+    def command(self, node_id):
+        """Texto do comando (ou None se o nó for uma categoria)"""
+        return self.nodes[node_id].template
+
+    def parsed(self, node_id):
+        """ParsedTemplate do comando (ou None se o nó for uma categoria)"""
+        command = self.command(node_id)
+        return parse_template(command) if command is not None else None
+
+    def children(self, node_id):
+        return self.nodes[node_id].children or ()
+
+    def path(self, node_id):
+        """Nomes do caminho a partir da categoria (sem a OLT)"""
+        names = []
+        node = self.nodes[node_id]
+        while node.parent is not None:
+            names.append(node.name)
+            node = self.nodes[node.parent]
+        return names[::-1]
+
+
+class CatalogSearchIndex:
+    """Índice invertido dos comandos de todas as OLTs
+
+    Cada folha do catálogo vira um documento indexado pelo nome, pelos
+    segmentos do caminho (categoria/subcategoria), pelos nomes dos
+    parâmetros, pelo texto do modelo e pelo nome da OLT. Termos da busca
+    casam por palavra exata, por prefixo ou, como último recurso, por
+    semelhança de trigramas (erros de digitação).
+    """
+
+    # Peso de cada campo no ranking
+    FIELD_WEIGHTS = {
+        "name": 5.0,
+        "path": 3.0,
+        "param": 2.0,
+        "template": 1.0,
+        "olt": 1.0,
+    }
+    # Casamentos aproximados valem menos que o termo exato
+    PREFIX_FACTOR = 0.8
+    TRIGRAM_FACTOR = 0.5
+    MIN_TRIGRAM_SIMILARITY = 0.4
+    MAX_EXPANSIONS = 50
+
+    def __init__(self, data):
+        # Catálogo de origem (usado para saber quando o índice está desatualizado)
+        self.source = data
+        # Documentos: {"olt", "path" (tupla), "command"}
+        self.documents = []
+        # termo -> {doc_id: peso}
+        self.postings = {}
+        # trigrama -> conjunto de termos do vocabulário
+        self.trigram_terms = {}
+        self.vocabulary = []
+        self.build(data)
+
+    @staticmethod
+    def normalize(text):
+        """Minúsculas e sem acentos, para "diagnostico" achar "Diagnóstico" """
+        text = unicodedata.normalize("NFKD", text.lower())
+        return "".join(c for c in text if not unicodedata.combining(c))
+
+    @classmethod
+    def tokenize(cls, text):
+        return re.findall(r"[a-z0-9]+", cls.normalize(text))
+
+    @staticmethod
+    def trigrams(term):
+        padded = f"  {term} "
+        return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+    @classmethod
+    def iter_leaves(cls, data, path=()):
+        """Percorrer as folhas (comandos) de um ramo do catálogo"""
+        if isinstance(data, dict):
+            for key, value in data.items():
+                yield from cls.iter_leaves(value, path + (key,))
+        else:
+            if isinstance(data, list):
+                data = "\n".join(data)
+            yield path, data
+
+    def build(self, data):
+        for olt_name, olt_data in data.get("olts", {}).items():
+            for path, command in self.iter_leaves(olt_data.get("categories", {})):
+                self.add_document(olt_name, path, command)
+
+        self.vocabulary = sorted(self.postings)
+        for term in self.vocabulary:
+            for trigram in self.trigrams(term):
+                self.trigram_terms.setdefault(trigram, set()).add(term)
+
+    def add_document(self, olt_name, path, command):
+        doc_id = len(self.documents)
+        self.documents.append({"olt": olt_name, "path": path, "command": command})
+
+        fields = [("name", path[-1]), ("olt", olt_name)]
+        fields.extend(("path", segment) for segment in path[:-1])
+        # Ferramentas internas (ex.: conversor) não têm texto de comando útil
+        if command != "CONVERTER_ONU_TOOL":
+            fields.append(("template", command))
+            fields.extend(("param", param) for param in re.findall(r"\{(\w+)\}", command))
+
+        for field, text in fields:
+            weight = self.FIELD_WEIGHTS[field]
+            for term in self.tokenize(text):
+                postings = self.postings.setdefault(term, {})
+                postings[doc_id] = postings.get(doc_id, 0.0) + weight
+
+    def expand_term(self, term):
+        """Termos do vocabulário que casam com o termo da busca, com fator de peso"""
+        matches = {}
+        if term in self.postings:
+            matches[term] = 1.0
+
+        # Prefixo: faixa contígua do vocabulário ordenado
+        start = bisect.bisect_left(self.vocabulary, term)
+        for candidate in islice(self.vocabulary, start, start + self.MAX_EXPANSIONS):
+            if not candidate.startswith(term):
+                break
+            matches.setdefault(candidate, self.PREFIX_FACTOR)
+
+        if matches or len(term) < 3:
+            return matches
+
+        # Trigramas: tolerância a erros de digitação e trechos do meio da palavra
+        term_trigrams = self.trigrams(term)
+        counts = {}
+        for trigram in term_trigrams:
+            for candidate in self.trigram_terms.get(trigram, ()):
+                counts[candidate] = counts.get(candidate, 0) + 1
+        for candidate, shared in counts.items():
+            similarity = 2 * shared / (len(term_trigrams) + len(self.trigrams(candidate)))
+            if similarity >= self.MIN_TRIGRAM_SIMILARITY:
+                matches[candidate] = self.TRIGRAM_FACTOR * similarity
+        return matches
+
+    def search(self, query, limit=100, olt_name=None):
+        """Documentos que casam com todos os termos, do mais relevante ao menos"""
+        terms = self.tokenize(query)
+        if not terms:
+            return []
+
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for candidate, factor in self.expand_term(term).items():
+                for doc_id, weight in self.postings[candidate].items():
+                    score = weight * factor
+                    if score > term_scores.get(doc_id, 0.0):
+                        term_scores[doc_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    doc_id: score + term_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in term_scores
+                }
+            if not scores:
+                return []
+
+        if olt_name:
+            scores = {
+                doc_id: score
+                for doc_id, score in scores.items()
+                if self.documents[doc_id]["olt"] == olt_name
+            }
+
+        best = heapq.nsmallest(
+            limit,
+            scores.items(),
+            key=lambda item: (-item[1], len(self.documents[item[0]]["path"]), item[0]),
+        )
+        return [(self.documents[doc_id], score) for doc_id, score in best]
+
+
+class FuzzyIndex:
+    """Busca aproximada com assinaturas de trigramas pré-calculadas
+
+    Cada item é indexado pelos trigramas das palavras do seu texto. A nota
+    de um item é a fração dos trigramas da busca que ele contém, o que
+    tolera palavras fora de ordem, abreviações e erros de digitação.
+    """
+
+    MIN_SCORE = 0.5
+
+    def __init__(self):
+        self.items = []
+        # trigrama -> lista de ids de itens
+        self.postings = {}
+
+    @staticmethod
+    def signature(text):
+        trigrams = set()
+        for token in CatalogSearchIndex.tokenize(text):
+            trigrams |= CatalogSearchIndex.trigrams(token)
+        return trigrams
+
+    def add(self, text, item):
+        item_id = len(self.items)
+        self.items.append(item)
+        for trigram in self.signature(text):
+            self.postings.setdefault(trigram, []).append(item_id)
+
+    def search(self, query):
+        """Lista de (nota, item) acima da nota mínima, sem ordenação"""
+        query_trigrams = self.signature(query)
+        if not query_trigrams:
+            return []
+
+        counts = {}
+        for trigram in query_trigrams:
+            for item_id in self.postings.get(trigram, ()):
+                counts[item_id] = counts.get(item_id, 0) + 1
+
+        total = len(query_trigrams)
+        return [
+            (shared / total, self.items[item_id])
+            for item_id, shared in counts.items()
+            if shared / total >= self.MIN_SCORE
+        ]
+
+
+class TrieNode:
+    __slots__ = ("children", "bucket", "end")
+
+    def __init__(self):
+        self.children = None
+        # Enquanto pequeno, o nó guarda os sufixos numa lista ordenada
+        self.bucket = []
+        self.end = False
+
+
+class PrefixTrie:
+    """Trie de prefixos com "baldes" (burst trie)
+
+    Cada nó começa guardando os sufixos das chaves numa lista ordenada; ao
+    passar de BURST_LIMIT itens o balde estoura em nós filhos por
+    caractere. Assim a memória fica próxima à de uma lista ordenada e a
+    busca por prefixo só visita os nós do próprio prefixo.
+    """
+
+    BURST_LIMIT = 64
+
+    def __init__(self):
+        self.root = TrieNode()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, key):
+        """Inserir uma chave; retorna False se ela já existia"""
+        node = self.root
+        depth = 0
+        while True:
+            if node.bucket is not None:
+                suffix = key[depth:]
+                bucket = node.bucket
+                position = bisect.bisect_left(bucket, suffix)
+                if position < len(bucket) and bucket[position] == suffix:
+                    return False
+                bucket.insert(position, suffix)
+                self.size += 1
+                if len(bucket) > self.BURST_LIMIT:
+                    self.burst(node)
+                return True
+            if depth == len(key):
+                if node.end:
+                    return False
+                node.end = True
+                self.size += 1
+                return True
+            child = node.children.get(key[depth])
+            if child is None:
+                child = node.children[key[depth]] = TrieNode()
+            node = child
+            depth += 1
+
+    @staticmethod
+    def burst(node):
+        children = {}
+        for suffix in node.bucket:
+            if not suffix:
+                node.end = True
+                continue
+            child = children.get(suffix[0])
+            if child is None:
+                child = children[suffix[0]] = TrieNode()
+            # Os sufixos já estão em ordem, então os baldes filhos também
+            child.bucket.append(suffix[1:])
+        node.children = children
+        node.bucket = None
+
+    def complete(self, prefix, limit=10):
+        """Até limit chaves que começam com prefix, em ordem alfabética"""
+        node = self.root
+        depth = 0
+        while node.bucket is None and depth < len(prefix):
+            node = node.children.get(prefix[depth])
+            if node is None:
+                return []
+            depth += 1
+        return list(islice(self.iter_node(node, prefix[:depth], prefix[depth:]), limit))
+
+    def iter_node(self, node, path, rest=""):
+        if node.bucket is not None:
+            bucket = node.bucket
+            position = bisect.bisect_left(bucket, rest)
+            while position < len(bucket) and bucket[position].startswith(rest):
+                yield path + bucket[position]
+                position += 1
+            return
+        if node.end:
+            yield path
+        for char in sorted(node.children):
+            yield from self.iter_node(node.children[char], path + char)
+
+
+# Valores de ONU citados em comandos do histórico
+HISTORY_SN_PATTERN = re.compile(
+    r"\bsn[:\s]\s*([A-Za-z]{4}[0-9A-Fa-f]{8}|[0-9A-Fa-f]{16})\b", re.IGNORECASE
+)
+HISTORY_PON_PATTERN = re.compile(r"gpon[-_](?:olt|onu)_(\d+/\d+/\d+)")
+
+
+def format_mac(mac):
+    """MAC normalizado (12 dígitos) no formato aa:bb:cc:dd:ee:ff"""
+    return ":".join(mac[i:i + 2] for i in range(0, 12, 2))
+
+
+class OnuValueIndex:
+    """Sugestões de SN, MAC e PON ID para o preenchimento de parâmetros
+
+    Um PrefixTrie por campo, alimentado pelo inventário de ONUs e pelos
+    comandos do histórico; novas entradas entram incrementalmente.
+    """
+
+    FIELDS = ("sn", "mac", "pon_id")
+
+    def __init__(self):
+        self.tries = {field: PrefixTrie() for field in self.FIELDS}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalize(field, value):
+        if field == "sn":
+            return value.strip().upper()
+        if field == "mac":
+            return re.sub(r"[^0-9A-Fa-f]", "", value).lower()
+        return value.strip()
+
+    def add(self, field, value):
+        if value:
+            with self.lock:
+                self.tries[field].add(value)
+
+    def add_record(self, record):
+        """Indexar um registro do inventário de ONUs"""
+        with self.lock:
+            if record.get("sn"):
+                self.tries["sn"].add(record["sn"])
+            if record.get("mac"):
+                self.tries["mac"].add(record["mac"])
+            self.tries["pon_id"].add(
+                f"{record['slot']}/{record['porta']}/{record['pon']}"
+            )
+
+    def add_command(self, command):
+        """Indexar os valores de ONU citados em um comando"""
+        with self.lock:
+            for sn in HISTORY_SN_PATTERN.findall(command):
+                self.tries["sn"].add(normalize_sn(sn))
+            for mac in ONU_MAC_PATTERN.findall(command):
+                mac = normalize_mac(mac)
+                if mac:
+                    self.tries["mac"].add(mac)
+            for pon_id in HISTORY_PON_PATTERN.findall(command):
+                self.tries["pon_id"].add(pon_id)
+
+    def complete(self, field, text, limit=10):
+        prefix = self.normalize(field, text)
+        if not prefix:
+            return []
+        with self.lock:
+            matches = self.tries[field].complete(prefix, limit)
+        if field == "mac":
+            return [format_mac(mac) for mac in matches]
+        return matches
+
+
+def diff_onu_snapshots(old_records, new_records):
+    """Comparar dois snapshots de ONUs em tempo linear
+
+    As ONUs são identificadas por (slot, porta, pon, id). Retorna um dict
+    com as listas "added", "removed" e "changed" (pares antigo/novo de
+    ONUs presentes nos dois snapshots cujo estado mudou).
+    """
+    old = {OnuInventory.record_key(record): record for record in old_records}
+    new = {OnuInventory.record_key(record): record for record in new_records}
+
+    added = [record for key, record in new.items() if key not in old]
+    removed = [record for key, record in old.items() if key not in new]
+    changed = [
+        (old[key], record)
+        for key, record in new.items()
+        if key in old and old[key].get("state") != record.get("state")
+    ]
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def render_onu_batch(template, records):
+    """Repetir o bloco do modelo para cada ONU, preenchendo seus parâmetros
+
+    Parâmetros sem valor no registro ({sn} de um dump de estado, por
+    exemplo) ficam como estão.
+    """
+    if isinstance(template, list):
+        template = "\n".join(template)
+
+    blocks = []
+    for record in records:
+        values = dict(record)
+        if values.get("mac"):
+            values["mac"] = format_mac(values["mac"])
+        blocks.append(
+            re.sub(
+                r"\{(\w+)\}",
+                lambda match: values.get(match.group(1)) or match.group(0),
+                template,
+            )
+        )
+    return "\n".join(blocks)
+
+
+def build_zte_removal_batch(records):
+    """Comandos de remoção em lote (ZTE) para as ONUs informadas"""
+    commands = ["configure terminal"]
+    for record in records:
+        commands.append(
+            f"interface gpon-olt_{record['slot']}/{record['porta']}/{record['pon']}"
+        )
+        commands.append(f"no onu {record['id']}")
+        commands.append("exit")
+    return "\n".join(commands)
+
+
+# Ruído de terminal em logs de sessão
+ANSI_ESCAPE_PATTERN = re.compile(
+    r"\x1b\[[0-?]*[ -/]*[@-~]|\x1b[()][A-Za-z0-9]|\x1b[=>]"
+)
+PAGER_PATTERN = re.compile(
+    r"\s*-+\s*More\s*(?:\([^)]*\))?\s*-+\s*|--More--", re.IGNORECASE
+)
+# Prompts: ZTE-C600#, OLT(config-if)#, MA5800(config)#, <Huawei>, [Huawei]
+PROMPT_PATTERN = re.compile(
+    r"^\s*(?:[\w.\-]+(?:\([\w\-/.:]+\))?[#>]|<[\w.\-]+>|\[[\w.\-~]+\])\s?(.*)$"
+)
+
+# Valores que voltam a ser parâmetros do catálogo
+SESSION_INTERFACE_PATTERN = re.compile(
+    r"\b(gpon[-_](?:olt|onu)_)?(\d+)/(\d+)/(\d+)(?::(\d+))?\b"
+)
+# Huawei "interface gpon 0/1" (slot/porta, sem a PON)
+SESSION_BOARD_PATTERN = re.compile(r"\b(interface gpon) (\d+)/(\d+)\b(?!/)")
+# "no onu 5", "onu 5 type ..."
+SESSION_ONU_ID_PATTERN = re.compile(r"\b(onu) (\d+)\b")
+# Huawei "ont delete 0 5" (pon, id) e "ont reset 0 1 0 5" (slot, porta, pon, id)
+SESSION_ONT_PATTERN = re.compile(r"\b(ont [a-z\-]+)((?: \d+){2,4})\b")
+SESSION_SN_PATTERN = re.compile(r"\b([A-Za-z]{4}[0-9A-Fa-f]{8}|[0-9A-Fa-f]{16})\b")
+
+
+def clean_session_line(line):
+    """Remover códigos ANSI, retornos de carro, backspaces e o paginador"""
+    line = line.rstrip("\r\n")
+    # Testes rápidos evitam regex na grande maioria das linhas
+    if "\x1b" in line:
+        line = ANSI_ESCAPE_PATTERN.sub("", line)
+    if "\r" in line:
+        # O terminal reescreveu a linha: vale o que ficou por último
+        line = line.rsplit("\r", 1)[-1]
+    if "\b" in line:
+        chars = []
+        for char in line:
+            if char == "\b":
+                if chars:
+                    chars.pop()
+            else:
+                chars.append(char)
+        line = "".join(chars)
+    if "ore" in line or "ORE" in line:
+        line = PAGER_PATTERN.sub("", line)
+    return line
+
+
+def iter_session_commands(lines):
+    """Gerar os comandos digitados (linhas com prompt) de um log de sessão"""
+    for line in lines:
+        # Linhas sem caractere de prompt são saída de comando
+        if "#" not in line and ">" not in line and "]" not in line:
+            continue
+        match = PROMPT_PATTERN.match(clean_session_line(line))
+        if match:
+            command = match.group(1).strip()
+            if command:
+                yield command
+
+
+def generalize_command(command):
+    """Trocar valores concretos pelos parâmetros do catálogo
+
+    Retorna (modelo, valores): "interface gpon-olt_1/2/6" vira
+    "interface gpon-olt_{slot}/{porta}/{pon}" com os valores extraídos.
+    """
+    values = {}
+
+    def interface(match):
+        prefix, slot, porta, pon, onu_id = match.groups()
+        values.update(slot=slot, porta=porta, pon=pon)
+        text = f"{prefix or ''}{{slot}}/{{porta}}/{{pon}}"
+        if onu_id is not None:
+            values["id"] = onu_id
+            text += ":{id}"
+        return text
+
+    def board(match):
+        values.update(slot=match.group(2), porta=match.group(3))
+        return f"{match.group(1)} {{slot}}/{{porta}}"
+
+    def onu_id(match):
+        values["id"] = match.group(2)
+        return f"{match.group(1)} {{id}}"
+
+    def ont(match):
+        numbers = match.group(2).split()
+        params = ("slot", "porta", "pon", "id")[-len(numbers):]
+        values.update(zip(params, numbers))
+        return match.group(1) + "".join(f" {{{param}}}" for param in params)
+
+    def serial(match):
+        values["sn"] = match.group(1)
+        return "{sn}"
+
+    def mac(match):
+        values["mac"] = match.group(1)
+        return "{mac}"
+
+    template = SESSION_INTERFACE_PATTERN.sub(interface, command)
+    template = SESSION_BOARD_PATTERN.sub(board, template)
+    template = ONU_MAC_PATTERN.sub(mac, template)
+    template = SESSION_SN_PATTERN.sub(serial, template)
+    template = SESSION_ONU_ID_PATTERN.sub(onu_id, template)
+    template = SESSION_ONT_PATTERN.sub(ont, template)
+    return template, values
+
+
+class SessionLogConverter:
+    """Converter um log de sessão em script, lendo e gravando em fluxo
+
+    Só os modelos distintos (com contagem) ficam em memória, então logs de
+    centenas de MB são processados em memória praticamente constante.
+    """
+
+    MAX_TEMPLATES = 10000
+
+    def __init__(self, generalize=True):
+        self.generalize = generalize
+        self.templates = {}
+        self.lines = 0
+        self.commands = 0
+        self.bytes = 0
+
+    def iter_lines(self, lines):
+        for line in lines:
+            self.lines += 1
+            self.bytes += len(line)
+            yield line
+
+    def convert(self, lines, output):
+        """Escrever em output (arquivo texto) um comando por linha"""
+        for command in iter_session_commands(self.iter_lines(lines)):
+            self.commands += 1
+            if self.generalize:
+                command, _ = generalize_command(command)
+            if command in self.templates:
+                self.templates[command] += 1
+            elif len(self.templates) < self.MAX_TEMPLATES:
+                self.templates[command] = 1
+            output.write(command + "\n")
+
+    def convert_file(self, log_path, output_path):
+        with open(log_path, "r", encoding="utf-8", errors="replace") as source:
+            with open(output_path, "w", encoding="utf-8") as output:
+                self.convert(source, output)
+
+    def top_templates(self, limit=100):
+        """Modelos mais frequentes, do mais usado ao menos usado"""
+        return heapq.nlargest(limit, self.templates.items(), key=lambda item: item[1])
+
+
+class AutocompletePopup:
+    """Lista de sugestões que aparece abaixo de uma entrada"""
+
+    NAVIGATION_KEYS = ("Up", "Down", "Return", "Escape", "Tab")
+
+    def __init__(self, entry, provider, on_select=None, max_rows=8):
+        self.entry = entry
+        self.provider = provider
+        self.on_select = on_select
+        self.max_rows = max_rows
+        self.window = None
+        self.listbox = None
+        entry.bind("<KeyRelease>", self.on_key_release, add="+")
+        entry.bind("<Down>", lambda e: self.move(1), add="+")
+        entry.bind("<Up>", lambda e: self.move(-1), add="+")
+        entry.bind("<Return>", self.accept, add="+")
+        entry.bind("<Escape>", lambda e: self.hide(), add="+")
+        entry.bind("<FocusOut>", lambda e: entry.after(150, self.hide), add="+")
+        entry.bind("<Destroy>", lambda e: self.hide(), add="+")
+
+    def on_key_release(self, event):
+        if event.keysym in self.NAVIGATION_KEYS:
+            return
+        suggestions = self.provider(self.entry.get())
+        if suggestions == [self.entry.get().strip()]:
+            suggestions = []
+        if suggestions:
+            self.show(suggestions)
+        else:
+            self.hide()
+
+    def show(self, suggestions):
+        if self.window is None:
+            self.window = tk.Toplevel(self.entry)
+            self.window.overrideredirect(True)
+            self.listbox = tk.Listbox(
+                self.window, font=("Consolas", 9), activestyle="none"
+            )
+            self.listbox.pack(fill="both", expand=True)
+            self.listbox.bind("<ButtonRelease-1>", self.accept)
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *suggestions)
+        self.listbox.configure(height=min(len(suggestions), self.max_rows))
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.window.geometry(f"+{x}+{y}")
+        self.listbox.configure(width=max(len(s) for s in suggestions) + 2)
+
+    def hide(self):
+        if self.window is not None:
+            try:
+                self.window.destroy()
+            except tk.TclError:
+                pass
+            self.window = None
+            self.listbox = None
+
+    def move(self, delta):
+        if self.listbox is None:
+            return
+        selection = self.listbox.curselection()
+        index = selection[0] + delta if selection else (0 if delta > 0 else -1)
+        index %= self.listbox.size()
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+        return "break"
+
+    def accept(self, event=None):
+        if self.listbox is None:
+            return
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        value = self.listbox.get(selection[0])
+        self.hide()
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, value)
+        self.entry.icursor(tk.END)
+        self.entry.focus_set()
+        if self.on_select is not None:
+            self.on_select(value)
+        return "break"
+
+
+class VirtualListView:
+    """Treeview que cria apenas as linhas visíveis de uma lista grande
+
+    Cada linha é identificada por uma chave (usada como iid). Os valores
+    exibidos vêm de row_provider(key) -> (values, tags) e ficam em cache
+    por chave até serem invalidados.
+    """
+
+    def __init__(self, parent, columns, row_provider, style="Modern.Treeview"):
+        self.row_provider = row_provider
+        self.keys = []
+        # Chave -> posição em keys; refeito sob demanda após alterações
+        self.positions = None
+        self.row_cache = {}
+        self.offset = 0
+        self.visible_rows = 20
+        self.selected_key = None
+        # Última posição conhecida de selected_key (conferida antes do uso)
+        self.selected_index = None
+        self.select_callback = None
+
+        self.tree = ttk.Treeview(
+            parent,
+            columns=columns,
+            show="headings",
+            style=style,
+            height=self.visible_rows,
+        )
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+
+        self.tree.bind("<Configure>", self.on_configure, add="+")
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.move_selection(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self.move_selection(self.visible_rows))
+
+    def bind_select(self, callback):
+        """Registrar callback para mudanças reais de seleção"""
+        self.select_callback = callback
+
+    def get_row(self, key):
+        row = self.row_cache.get(key)
+        if row is None:
+            row = self.row_provider(key)
+            self.row_cache[key] = row
+        return row
+
+    def index_of(self, key):
+        """Posição de uma chave (ou None), sem percorrer a lista"""
+        if self.positions is None:
+            self.positions = {k: i for i, k in enumerate(self.keys)}
+        return self.positions.get(key)
+
+    def selected_position(self):
+        """Posição da linha selecionada (ou None)"""
+        if self.selected_key is None:
+            return None
+        index = self.selected_index
+        if index is None or index >= len(self.keys) or (
+            self.keys[index] != self.selected_key
+        ):
+            index = self.selected_index = self.index_of(self.selected_key)
+        return index
+
+    # Alterações nos dados
+    def set_keys(self, keys):
+        self.keys = list(keys)
+        self.positions = None
+        self.row_cache.clear()
+        self.selected_index = None
+        if self.selected_position() is None:
+            self.selected_key = None
+        self.render()
+
+    def insert_keys(self, index, keys):
+        self.keys[index:index] = keys
+        self.positions = None
+        if self.selected_index is not None and index <= self.selected_index:
+            self.selected_index += len(keys)
+        # Manter as linhas já visíveis no lugar quando a inserção é acima delas
+        if index < self.offset:
+            self.offset += len(keys)
+        self.render()
+
+    def remove_key(self, key):
+        index = self.index_of(key)
+        if index is None:
+            return
+        del self.keys[index]
+        self.positions = None
+        self.row_cache.pop(key, None)
+        if key == self.selected_key:
+            self.selected_key = None
+            self.selected_index = None
+        elif self.selected_index is not None and index < self.selected_index:
+            self.selected_index -= 1
+        if index < self.offset:
+            self.offset -= 1
+        if self.tree.exists(key):
+            self.tree.delete(key)
+        self.render()
+
+    def update_key(self, key):
+        """Recalcular os valores de uma linha após alteração da entrada"""
+        self.row_cache.pop(key, None)
+        if self.tree.exists(key):
+            values, tags = self.get_row(key)
+            self.tree.item(key, values=values, tags=tags)
+
+    # Renderização
+    def render(self):
+        """Sincronizar o Treeview com a janela visível da lista"""
+        max_offset = max(0, len(self.keys) - self.visible_rows)
+        self.offset = min(max(self.offset, 0), max_offset)
+        window = self.keys[self.offset : self.offset + self.visible_rows]
+
+        wanted = set(window)
+        stale = [iid for iid in self.tree.get_children() if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+
+        for index, key in enumerate(window):
+            if self.tree.exists(key):
+                self.tree.move(key, "", index)
+            else:
+                values, tags = self.get_row(key)
+                self.tree.insert("", index, iid=key, values=values, tags=tags)
+
+        # Restaurar a seleção quando a linha volta a ficar visível
+        if self.selected_key in wanted and self.tree.selection() != (
+            self.selected_key,
+        ):
+            self.tree.selection_set(self.selected_key)
+
+        total = len(self.keys)
+        if total:
+            self.scrollbar.set(
+                self.offset / total, min(1.0, (self.offset + len(window)) / total)
+            )
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_configure(self, event=None):
+        try:
+            row_height = int(ttk.Style().lookup(self.tree.cget("style"), "rowheight"))
+        except (ValueError, tk.TclError):
+            row_height = 20
+        # Descontar uma linha para o cabeçalho
+        rows = max(1, self.tree.winfo_height() // row_height - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    # Rolagem
+    def yview(self, *args):
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.keys))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.visible_rows
+            self.offset += step
+        self.render()
+
+    def scroll(self, rows):
+        self.offset += rows
+        self.render()
+        return "break"
+
+    def on_mousewheel(self, event):
+        # No Windows cada "clique" da roda vale 120; no macOS o delta é
+        # pequeno (±1 a ±10) e só o sinal indica a direção
+        if abs(event.delta) >= 120:
+            steps = int(event.delta / 120)
+        elif event.delta:
+            steps = 1 if event.delta > 0 else -1
+        else:
+            steps = 0
+        return self.scroll(-3 * steps)
+
+    def ensure_visible(self, index):
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_rows:
+            self.offset = index - self.visible_rows + 1
+
+    def move_selection(self, step):
+        if not self.keys:
+            return "break"
+        index = self.selected_position()
+        if index is not None:
+            index += step
+        else:
+            index = self.offset if step > 0 else self.offset + self.visible_rows - 1
+        index = min(max(index, 0), len(self.keys) - 1)
+        # on_tree_select atualiza selected_key; a posição já fica conhecida
+        self.selected_index = index
+        self.ensure_visible(index)
+        self.render()
+        self.tree.selection_set(self.keys[index])
+        self.tree.focus(self.keys[index])
+        return "break"
+
+    # Seleção
+    def on_tree_select(self, event=None):
+        selection = self.tree.selection()
+        # Linhas removidas por rolagem não alteram a seleção lógica
+        if not selection or selection[0] == self.selected_key:
+            return
+        self.selected_key = selection[0]
+        if self.select_callback is not None:
+            self.select_callback(event)
+
+
+class StartupProfiler:
+    """Cronometrar as fases da inicialização
+
+    As fases são sempre medidas (o custo é desprezível); com a variável de
+    ambiente OLT_MANAGER_PROFILE ou a opção --profile, o relatório é
+    gravado em JSON e exibido na janela de diagnóstico ao abrir.
+    """
+
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = (
+                os.environ.get("OLT_MANAGER_PROFILE", "") not in ("", "0")
+                or "--profile" in sys.argv
+            )
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = []
+        self.depth = 0
+        self.first_idle_ms = None
+        if hasattr(sys, "_MEIPASS"):
+            # Se estiver rodando como executável PyInstaller
+            exe_dir = os.path.dirname(sys.executable)
+            self.report_file = os.path.join(exe_dir, "startup_profile.json")
+        else:
+            # Se estiver rodando como script
+            self.report_file = "startup_profile.json"
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self.phases.append(
+                {
+                    "name": name,
+                    "depth": self.depth,
+                    "start_ms": round((start - self.started) * 1000, 2),
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                }
+            )
+
+    def mark_first_idle(self):
+        """Registrar quando o loop do Tk fica ocioso pela primeira vez"""
+        self.first_idle_ms = round((time.perf_counter() - self.started) * 1000, 2)
+
+    def report(self):
+        # Fases internas terminam antes das externas: ordenar pelo início
+        phases = sorted(
+            self.phases, key=lambda phase: (phase["start_ms"], phase["depth"])
+        )
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "import_ms": round((IMPORT_FINISHED - IMPORT_STARTED) * 1000, 2),
+            "init_ms": round(
+                sum(phase["duration_ms"] for phase in phases if phase["depth"] == 0), 2
+            ),
+            "first_idle_ms": self.first_idle_ms,
+            "phases": phases,
+        }
+
+    def write_report(self):
+        try:
+            report = json.dumps(self.report(), indent=2, ensure_ascii=False)
+            atomic_write_text(self.report_file, report)
+        except OSError as e:
+            print(f"Error saving startup profile: {e}")
+
+
+class UiInstrumentation:
+    """Medir o atraso do loop de eventos do Tk e a latência dos handlers
+
+    Desligada por padrão; ative com a variável de ambiente
+    OLT_MANAGER_INSTRUMENT ou a opção --instrument. Um heartbeat agendado
+    com after() mede quanto cada disparo atrasou em relação ao previsto
+    (tempo em que o loop ficou bloqueado). Os handlers decorados com
+    @instrumented registram a duração de cada chamada. Percentis são
+    calculados sobre as últimas WINDOW amostras de cada série.
+    """
+
+    HEARTBEAT_MS = 100
+    WINDOW = 500
+
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = (
+                os.environ.get("OLT_MANAGER_INSTRUMENT", "") not in ("", "0")
+                or "--instrument" in sys.argv
+            )
+        self.enabled = enabled
+        self.lag = deque(maxlen=self.WINDOW)
+        self.max_lag_ms = 0.0
+        # nome do handler -> durações recentes (ms), total de chamadas e máximo
+        self.durations = {}
+        self.calls = {}
+        self.max_ms = {}
+        self.root = None
+        self.expected = None
+        if hasattr(sys, "_MEIPASS"):
+            # Se estiver rodando como executável PyInstaller
+            exe_dir = os.path.dirname(sys.executable)
+            self.report_file = os.path.join(exe_dir, "ui_latency.json")
+        else:
+            # Se estiver rodando como script
+            self.report_file = "ui_latency.json"
+
+    def start(self, root):
+        """Iniciar o heartbeat (não faz nada com a instrumentação desligada)"""
+        if not self.enabled or self.root is not None:
+            return
+        self.root = root
+        self.schedule_heartbeat()
+
+    def schedule_heartbeat(self):
+        self.expected = time.perf_counter() + self.HEARTBEAT_MS / 1000
+        self.root.after(self.HEARTBEAT_MS, self.heartbeat)
+
+    def heartbeat(self):
+        lag_ms = max(0.0, (time.perf_counter() - self.expected) * 1000)
+        self.lag.append(lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self.schedule_heartbeat()
+
+    def record(self, name, duration_ms):
+        samples = self.durations.get(name)
+        if samples is None:
+            samples = self.durations[name] = deque(maxlen=self.WINDOW)
+            self.calls[name] = 0
+            self.max_ms[name] = 0.0
+        samples.append(duration_ms)
+        self.calls[name] += 1
+        self.max_ms[name] = max(self.max_ms[name], duration_ms)
+
+    def wrap(self, name, func):
+        """Versão cronometrada de func (a própria func se estiver desligada)"""
+        if not self.enabled:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, (time.perf_counter() - start) * 1000)
+
+        return wrapper
+
+    @staticmethod
+    def percentiles(samples):
+        """p50, p99 e quantidade de amostras de uma série (ms)"""
+        ordered = sorted(samples)
+        if not ordered:
+            return {"p50_ms": None, "p99_ms": None, "samples": 0}
+
+        def rank(p):
+            index = math.ceil(p / 100 * len(ordered)) - 1
+            return round(ordered[max(index, 0)], 2)
+
+        return {"p50_ms": rank(50), "p99_ms": rank(99), "samples": len(ordered)}
+
+    def report(self):
+        lag = self.percentiles(self.lag)
+        lag["max_ms"] = round(self.max_lag_ms, 2)
+        handlers = {}
+        for name, samples in self.durations.items():
+            stats = self.percentiles(samples)
+            stats["calls"] = self.calls[name]
+            stats["max_ms"] = round(self.max_ms[name], 2)
+            handlers[name] = stats
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "enabled": self.enabled,
+            "heartbeat_ms": self.HEARTBEAT_MS,
+            "event_loop_lag": lag,
+            "handlers": handlers,
+        }
+
+    def write_report(self):
+        try:
+            report = json.dumps(self.report(), indent=2, ensure_ascii=False)
+            atomic_write_text(self.report_file, report)
+        except OSError as e:
+            print(f"Error saving UI latency report: {e}")
+
+
+def instrumented(method):
+    """Cronometrar um handler do OLTCommandManager na UiInstrumentation"""
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = getattr(self, "instrumentation", None)
+        if instrumentation is None or not instrumentation.enabled:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            instrumentation.record(name, (time.perf_counter() - start) * 1000)
+
+    return wrapper
 
 
 class OLTCommandManager:
@@ -218,21 +3013,36 @@ class OLTCommandManager:
         self.root.title("OLT Command Manager v1.6")
         self.root.geometry("1200x800")
 
+        self.profiler = StartupProfiler()
+        self.instrumentation = UiInstrumentation()
+
         try:
             # Definir o ícone da janela
-            if hasattr(sys, "_MEIPASS"):
-                # Se estiver rodando como executável
-                icon_path = os.path.join(sys._MEIPASS, "ico.ico")
-            else:
-                # Se estiver rodando como script
-                icon_path = os.path.join("Extras", "ico.ico")
-            self.root.iconbitmap(icon_path)
+            with self.profiler.phase("ícone"):
+                if hasattr(sys, "_MEIPASS"):
+                    # Se estiver rodando como executável
+                    icon_path = os.path.join(sys._MEIPASS, "ico.ico")
+                else:
+                    # Se estiver rodando como script
+                    icon_path = os.path.join("Extras", "ico.ico")
+                self.root.iconbitmap(icon_path)
 
             # Inicializar componentes
-            self.validator = CommandValidator()
-            self.documentation = CommandDocumentation()
-            self.history = CommandHistory()
-            self.favorites = FavoriteCommands()
+            self.persistence = PersistenceService()
+            # Funções enviadas por threads de fundo para rodar na thread do Tk
+            self.ui_queue = queue.Queue()
+            with self.profiler.phase("validador e documentação"):
+                self.validator = CommandValidator()
+                self.documentation = CommandDocumentation()
+            with self.profiler.phase("histórico"):
+                self.history = CommandHistory(self.persistence)
+            with self.profiler.phase("favoritos"):
+                self.favorites = FavoriteCommands(self.persistence)
+            with self.profiler.phase("inventário de ONUs"):
+                self.onu_inventory = OnuInventory(self.persistence)
+            # Sugestões de SN/MAC/PON ID (preenchidas em segundo plano)
+            self.onu_values = OnuValueIndex()
+            self.onu_inventory.listeners.append(self.onu_values.add_record)
 
             # Dados dos comandos
             if hasattr(sys, "_MEIPASS"):
@@ -242,11 +3052,16 @@ class OLTCommandManager:
             else:
                 # Se estiver rodando como script
                 self.data_file = "olt_commands.json"
-            self.load_data()
+            # Serialização e validação do catálogo com cache por OLT
+            self.catalog_serializer = CatalogSerializer()
+            self.catalog_validator = CatalogValidator()
+            with self.profiler.phase("load_data"):
+                self.load_data()
 
             # Configuração do tema inicial antes de qualquer outra coisa
             self.theme_var = tk.StringVar(value="light")  # Default theme
-            self.setup_theme()
+            with self.profiler.phase("tema"):
+                self.setup_theme()
 
             # Carregar preferências depois de inicializar o tema
             if hasattr(sys, "_MEIPASS"):
@@ -258,21 +3073,44 @@ class OLTCommandManager:
                 self.config_file = os.path.join(
                     os.path.dirname(__file__), "config_file.json"
                 )
-            self.load_preferences()  # This will update theme_var if saved
+            # Estado do salvamento agrupado de preferências
+            self.preferences_save_job = None
+            self.last_saved_preferences = None
+            with self.profiler.phase("preferências"):
+                self.load_preferences()  # This will update theme_var if saved
 
             # Criar interface
-            self.create_main_interface()
+            with self.profiler.phase("interface"):
+                self.create_main_interface()
 
             # Aplicar tema aos widgets depois que eles existirem
-            self.update_widget_colors()
+            with self.profiler.phase("cores dos widgets"):
+                self.update_widget_colors()
 
             # Configurar evento de fechamento
             self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-            # Handle window position update on resize/move
-            self.root.bind(
-                "<Configure>", lambda e: self.root.after(1000, self.save_preferences)
-            )
+            # Processar resultados de tarefas em segundo plano
+            self.process_ui_queue()
+
+            # Indexar valores conhecidos de ONUs sem atrasar a abertura
+            self.root.after(500, self.load_onu_values)
+
+            # Fechar o perfil quando a janela estiver pronta para uso
+            self.root.after_idle(self.finish_startup_profile)
+
+            # Medir atraso do loop de eventos (só com OLT_MANAGER_INSTRUMENT)
+            self.instrumentation.start(self.root)
+
+            # Janela de diagnóstico
+            self.root.bind_all("<F12>", lambda e: self.open_diagnostics())
+
+            # Paleta de comandos
+            self.root.bind_all("<Control-p>", self.open_command_palette)
+            self.root.bind_all("<Control-P>", self.open_command_palette)
+
+            # Handle window position update on resize/move (coalesced)
+            self.root.bind("<Configure>", self.schedule_preferences_save)
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao iniciar a aplicação:\n{str(e)}")
             raise
@@ -294,6 +3132,12 @@ class OLTCommandManager:
                 "success": "#059669",  # Verde sutil
                 "warning": "#d97706",  # Laranja sutil
                 "border": "#4b5563",  # Bordas neutras
+                # Realce de sintaxe do editor JSON
+                "syntax_key": "#93c5fd",
+                "syntax_string": "#86efac",
+                "syntax_number": "#fcd34d",
+                "syntax_literal": "#c4b5fd",
+                "syntax_param": "#f9a8d4",
             },
             "light": {
                 "bg": "#f8fafc",  # Fundo muito claro neutro
@@ -307,6 +3151,12 @@ class OLTCommandManager:
                 "success": "#059669",  # Verde sutil
                 "warning": "#d97706",  # Laranja sutil
                 "border": "#e2e8f0",  # Bordas muito suaves
+                # Realce de sintaxe do editor JSON
+                "syntax_key": "#1d4ed8",
+                "syntax_string": "#15803d",
+                "syntax_number": "#b45309",
+                "syntax_literal": "#7c3aed",
+                "syntax_param": "#db2777",
             },
         }
 
@@ -524,6 +3374,10 @@ class OLTCommandManager:
             except:
                 pass
 
+        if hasattr(self, "editor_highlighter"):
+            self.editor_highlighter.set_colors(theme)
+            self.editor_text.tag_raise("json_error")
+
         # Configura cada widget existente
         for widget in widgets:
             try:
@@ -654,35 +3508,98 @@ class OLTCommandManager:
                 with open(self.data_file, "r", encoding="utf-8") as f:
                     self.data = json.load(f)
             except:
+                # Preservar o arquivo danificado antes de gravar o padrão
+                backup_corrupt_file(self.data_file)
                 self.data = default_data
-                self.save_data()
+                self.persistence.write_json(self.data_file, lambda: default_data)
         else:
             self.data = default_data
-            self.save_data()
+            self.persistence.write_json(self.data_file, lambda: default_data)
 
     def save_data(self):
-        """Salvar dados no arquivo JSON"""
-        try:
-            # Obter o conteúdo atual do editor
-            json_text = self.editor_text.get(1.0, tk.END).strip()
+        """Validar e salvar a seção em edição em segundo plano"""
+        if self.editor_saving:
+            return
+        json_text = self.editor_text.get(1.0, tk.END).strip()
+        path = self.editor_section
+        base = self.data
 
-            # Validar o JSON antes de salvar
+        def worker():
             try:
-                self.data = json.loads(json_text)
-                with open(self.data_file, "w", encoding="utf-8") as f:
-                    json.dump(self.data, f, indent=2, ensure_ascii=False)
-
-                # Atualizar a interface após salvar
-                self.populate_tree(
-                    self.olt_var.get()
-                    if self.olt_var.get()
-                    else next(iter(self.data["olts"]))
-                )
-                messagebox.showinfo("Sucesso", "Alterações salvas com sucesso!")
+                node = json.loads(json_text)
+                errors = self.catalog_validator.validate(path, node, json_text)
+                if errors:
+                    error_path, message = errors[0]
+                    line = locate_json_path(json_text, error_path)
+                    raise ValueError(f"Linha {line}: {message}")
+                data = replace_catalog_node(base, path, node)
+                text = self.catalog_serializer.serialize(data)
             except json.JSONDecodeError as e:
-                messagebox.showerror("Erro", f"JSON inválido: {str(e)}")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao salvar arquivo: {str(e)}")
+                error = f"JSON inválido: {str(e)}"
+                self.call_in_ui(lambda: self.on_section_validated(None, None, error))
+                return
+            except ValueError as e:
+                error = str(e)
+                self.call_in_ui(lambda: self.on_section_validated(None, None, error))
+                return
+            self.call_in_ui(lambda: self.on_section_validated(data, text, None))
+
+        self.editor_saving = True
+        self.editor_status.configure(text="Validando...")
+        threading.Thread(target=worker, daemon=True).start()
+
+    def on_section_validated(self, data, text, error):
+        """Aplicar a seção validada e agendar a gravação do arquivo"""
+        self.editor_saving = False
+        if error is not None:
+            self.editor_status.configure(text="")
+            messagebox.showerror("Erro", error)
+            return
+
+        self.data = data
+        self.editor_text.edit_modified(False)
+        self.editor_status.configure(text="Salvando...")
+        # Gravação atômica em segundo plano; o resultado volta pela fila da UI
+        self.persistence.write_text(
+            self.data_file,
+            lambda: text,
+            delay=0,
+            on_done=lambda error: self.call_in_ui(lambda: self.on_data_saved(error)),
+        )
+
+        # Atualizar a interface após salvar
+        self.update_editor_sections()
+        self.populate_tree(
+            self.olt_var.get()
+            if self.olt_var.get() in self.data["olts"]
+            else next(iter(self.data["olts"]))
+        )
+
+    def on_data_saved(self, error):
+        """Informar o resultado da gravação do catálogo"""
+        if hasattr(self, "editor_status"):
+            self.editor_status.configure(text="")
+        if error is None:
+            messagebox.showinfo("Sucesso", "Alterações salvas com sucesso!")
+        else:
+            messagebox.showerror("Erro", f"Erro ao salvar arquivo: {str(error)}")
+
+    def call_in_ui(self, func):
+        """Agendar func para rodar na thread do Tk (seguro a partir de outras threads)"""
+        self.ui_queue.put(func)
+
+    def process_ui_queue(self):
+        """Executar as funções enviadas por threads de fundo"""
+        while True:
+            try:
+                func = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func()
+            except Exception as e:
+                print(f"Error in UI callback: {e}")
+        self.root.after(100, self.process_ui_queue)
 
     def create_main_interface(self):
         """Criar interface principal com design moderno"""
@@ -720,25 +3637,46 @@ class OLTCommandManager:
         theme_combo.bind("<<ComboboxSelected>>", lambda e: self.apply_theme())
 
         # Container principal com abas modernas
-        notebook = ttk.Notebook(main_frame, style="TNotebook")
+        notebook = self.notebook = ttk.Notebook(main_frame, style="TNotebook")
         notebook.pack(fill="both", expand=True)
 
         # Abas minimalistas
         self.tree_frame = ttk.Frame(notebook, style="Card.TFrame")
         notebook.add(self.tree_frame, text="Navegação")
-        self.create_tree_interface()
+        with self.profiler.phase("aba Navegação"):
+            self.create_tree_interface()
 
+        # As demais abas só são montadas (e seus dados carregados) na
+        # primeira visita
         self.history_frame = ttk.Frame(notebook, style="Card.TFrame")
         notebook.add(self.history_frame, text="Histórico")
-        self.create_history_interface()
 
         self.favorites_frame = ttk.Frame(notebook, style="Card.TFrame")
         notebook.add(self.favorites_frame, text="Favoritos")
-        self.create_favorites_interface()
 
         self.editor_frame = ttk.Frame(notebook, style="Card.TFrame")
         notebook.add(self.editor_frame, text="Editor")
-        self.create_editor_interface()
+
+        self.pending_tabs = {
+            str(self.history_frame): ("aba Histórico", self.create_history_interface),
+            str(self.favorites_frame): (
+                "aba Favoritos",
+                self.create_favorites_interface,
+            ),
+            str(self.editor_frame): ("aba Editor", self.create_editor_interface),
+        }
+        notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+    @instrumented
+    def on_tab_changed(self, event=None):
+        """Montar a aba selecionada na primeira vez que ela é aberta"""
+        pending = self.pending_tabs.pop(self.notebook.select(), None)
+        if pending is None:
+            return
+        name, create_interface = pending
+        with self.profiler.phase(name):
+            create_interface()
+        self.update_widget_colors()
 
     def create_tree_interface(self):
         """Criar interface de navegação com design moderno"""
@@ -769,6 +3707,26 @@ class OLTCommandManager:
         olt_combo.pack(side="left", padx=10, pady=10)
         olt_combo.bind("<<ComboboxSelected>>", self.on_olt_selected)
 
+        # Busca instantânea em todas as OLTs
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(top_frame, textvariable=self.search_var, width=35)
+        search_entry.pack(side="right", padx=10, pady=10)
+        search_entry.bind("<KeyRelease>", self.on_search_changed)
+        search_entry.bind("<Return>", lambda e: self.on_result_select(index=0))
+        search_entry.bind("<Down>", lambda e: self.focus_search_results())
+        search_entry.bind("<Escape>", lambda e: self.clear_search())
+        ttk.Label(top_frame, text="Buscar:", style="Card.TLabel").pack(
+            side="right", pady=10
+        )
+        self.search_index = None
+        self.search_results = []
+        self.compact_catalog = None
+        # Modelo do comando exibido (árvore, favorito ou histórico)
+        self.current_template = None
+        self.palette_window = None
+        self.palette_catalog_index = None
+        self.palette_catalog_source = None
+
         # Container com painel divisível
         self.content_frame = tk.PanedWindow(self.tree_frame, orient="horizontal", sashwidth=4, bg=self.themes[self.theme_var.get()]["bg"])
         self.content_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
@@ -785,9 +3743,26 @@ class OLTCommandManager:
         )
 
         # Treeview com scrollbar integrada
-        tree_container = ttk.Frame(left_panel, style="Modern.TFrame")
+        tree_container = self.tree_container = ttk.Frame(
+            left_panel, style="Modern.TFrame"
+        )
         tree_container.pack(fill="both", expand=True, padx=0, pady=(0, 5))
 
+        # Resultados da busca (ocupam o lugar da árvore enquanto há busca)
+        self.results_frame = ttk.Frame(left_panel, style="Modern.TFrame")
+        self.results_listbox = tk.Listbox(
+            self.results_frame, font=("Segoe UI", 9), activestyle="none"
+        )
+        results_scroll = ttk.Scrollbar(
+            self.results_frame, orient="vertical", command=self.results_listbox.yview
+        )
+        self.results_listbox.configure(yscrollcommand=results_scroll.set)
+        self.results_listbox.pack(side="left", fill="both", expand=True)
+        results_scroll.pack(side="right", fill="y")
+        self.results_listbox.bind("<ButtonRelease-1>", self.on_result_select)
+        self.results_listbox.bind("<Return>", self.on_result_select)
+        self.results_listbox.bind("<Escape>", lambda e: self.clear_search())
+
         self.tree = ttk.Treeview(tree_container, show="tree", style="Modern.Treeview")
         tree_scroll = ttk.Scrollbar(
             tree_container, orient="vertical", command=self.tree.yview
@@ -806,6 +3781,9 @@ class OLTCommandManager:
 
         # Configurar evento para salvar posição da barra lateral
         self.content_frame.bind("<<SashMoved>>", self.save_sidebar_position)
+        self.content_frame.bind(
+            "<ButtonRelease-1>", self.save_sidebar_position, add="+"
+        )
 
         # Definir largura inicial do painel esquerdo (ajustável pelo usuário)
         self.root.update_idletasks()  # Forçar atualização para calcular tamanhos
@@ -883,6 +3861,27 @@ class OLTCommandManager:
             style="Accent.TButton",
         ).pack(side="left", padx=2)
 
+        ttk.Button(
+            btn_left,
+            text="Inventário ONU",
+            command=self.open_onu_inventory,
+            style="Accent.TButton",
+        ).pack(side="left", padx=2)
+
+        ttk.Button(
+            btn_left,
+            text="Comparar Snapshots",
+            command=self.open_snapshot_diff,
+            style="Accent.TButton",
+        ).pack(side="left", padx=2)
+
+        ttk.Button(
+            btn_left,
+            text="Log → Script",
+            command=self.open_log_converter,
+            style="Accent.TButton",
+        ).pack(side="left", padx=2)
+
         # Inicializar com o primeiro modelo selecionado após todos os componentes serem criados
         if self.available_olts:
             self.on_olt_selected()
@@ -978,6 +3977,37 @@ class OLTCommandManager:
             btn_frame, text="Abrir Arquivo JSON", command=self.open_json_file
         ).pack(side="left", padx=5)
 
+        # Seção em edição: catálogo completo, uma OLT ou uma categoria
+        section_frame = ttk.Frame(editor_top, style="Modern.TFrame")
+        section_frame.pack(fill="x", padx=10)
+
+        ttk.Label(section_frame, text="Seção:", style="Modern.TLabel").pack(
+            side="left"
+        )
+        self.editor_section_var = tk.StringVar()
+        self.editor_section_combo = ttk.Combobox(
+            section_frame,
+            textvariable=self.editor_section_var,
+            state="readonly",
+            width=60,
+        )
+        self.editor_section_combo.pack(side="left", padx=5)
+        self.editor_section_combo.bind(
+            "<<ComboboxSelected>>", self.on_editor_section_selected
+        )
+        self.editor_status = ttk.Label(section_frame, text="", style="Modern.TLabel")
+        self.editor_status.pack(side="left", padx=10)
+
+        # Catálogos grandes abrem uma OLT por vez
+        self.editor_section = ()
+        self.editor_saving = False
+        try:
+            large_catalog = os.path.getsize(self.data_file) > LARGE_CATALOG_BYTES
+        except OSError:
+            large_catalog = False
+        if large_catalog and self.olt_var.get() in self.data["olts"]:
+            self.editor_section = ("olts", self.olt_var.get())
+
         # Área de edição
         editor_text_frame = ttk.Frame(self.editor_frame, style="Modern.TFrame")
         editor_text_frame.pack(fill="both", expand=True, padx=5)
@@ -1001,9 +4031,140 @@ class OLTCommandManager:
         )
         self.editor_text.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
-        # Carregar dados no editor
-        self.load_editor_data()
+        # Validação em segundo plano enquanto o usuário digita
+        self.editor_errors_label = ttk.Label(
+            editor_text_frame, text="", style="Modern.TLabel"
+        )
+        self.editor_errors_label.pack(anchor="w", padx=10, pady=(0, 10))
+        self.editor_text.tag_configure(
+            "json_error",
+            background=self.themes[self.theme_var.get()]["error"],
+            foreground="white",
+        )
+        self.editor_validation_job = None
+        self.editor_validation_generation = 0
+        self.editor_text.bind("<KeyRelease>", self.schedule_editor_validation)
+        self.editor_text.bind("<<Paste>>", self.schedule_editor_validation, add="+")
+
+        # Realce de sintaxe apenas nas linhas visíveis
+        self.editor_highlighter = ViewportHighlighter(self.editor_text)
+        self.editor_highlighter.set_colors(self.themes[self.theme_var.get()])
+        self.editor_text.tag_raise("json_error")
+
+        # Carregar dados no editor (o catálogo já está em memória)
+        with self.profiler.phase("load_editor_data"):
+            self.update_editor_sections()
+            self.show_editor_section()
+
+    def get_editor_sections(self):
+        """Seções editáveis: catálogo completo, cada OLT e cada categoria"""
+        sections = {"Catálogo completo": ()}
+        for olt_name, olt in self.data.get("olts", {}).items():
+            sections[olt_name] = ("olts", olt_name)
+            if isinstance(olt, dict) and isinstance(olt.get("categories"), dict):
+                for category in olt["categories"]:
+                    sections[f"{olt_name} → {category}"] = (
+                        "olts",
+                        olt_name,
+                        "categories",
+                        category,
+                    )
+        return sections
+
+    def update_editor_sections(self):
+        """Atualizar a lista de seções (OLTs/categorias podem ter mudado)"""
+        self.editor_sections = self.get_editor_sections()
+        self.editor_section_combo.configure(values=list(self.editor_sections))
+        if self.editor_section not in self.editor_sections.values():
+            self.editor_section = ()
+        for label, path in self.editor_sections.items():
+            if path == self.editor_section:
+                self.editor_section_var.set(label)
+                break
+
+    def on_editor_section_selected(self, event=None):
+        """Trocar a seção exibida no editor"""
+        path = self.editor_sections.get(self.editor_section_var.get(), ())
+        if path == self.editor_section:
+            return
+        if self.editor_text.edit_modified() and not messagebox.askyesno(
+            "Confirmar", "Descartar as alterações não salvas desta seção?"
+        ):
+            self.update_editor_sections()
+            return
+        self.editor_section = path
+        self.show_editor_section()
+
+    def show_editor_section(self):
+        """Exibir no editor o JSON da seção atual"""
+        if self.editor_section:
+            node = get_catalog_node(self.data, self.editor_section)
+            text = json.dumps(node, indent=2, ensure_ascii=False)
+        else:
+            text = self.catalog_serializer.serialize(self.data)
+
+        self.editor_text.delete(1.0, tk.END)
+        self.editor_text.insert(1.0, text)
+        self.editor_text.edit_modified(False)
+        self.editor_text.edit_reset()
+        self.editor_highlighter.invalidate()
+        self.schedule_editor_validation()
+
+    def schedule_editor_validation(self, event=None):
+        """Validar o editor 500 ms depois da última tecla"""
+        if event is not None and event.keysym in (
+            "Up", "Down", "Left", "Right", "Prior", "Next", "Home", "End",
+        ):
+            return
+        if self.editor_validation_job is not None:
+            self.root.after_cancel(self.editor_validation_job)
+        self.editor_validation_job = self.root.after(500, self.start_editor_validation)
+
+    def start_editor_validation(self):
+        """Validar sintaxe e esquema da seção em uma thread de fundo"""
+        self.editor_validation_job = None
+        self.editor_validation_generation += 1
+        generation = self.editor_validation_generation
+        text = self.editor_text.get(1.0, tk.END)
+        path = self.editor_section
+
+        def worker():
+            try:
+                node = json.loads(text)
+            except json.JSONDecodeError as e:
+                errors = [(e.lineno, f"JSON inválido: {e.msg} (coluna {e.colno})")]
+            else:
+                errors = [
+                    (locate_json_path(text, error_path), message)
+                    for error_path, message in self.catalog_validator.validate(
+                        path, node, text
+                    )[:100]
+                ]
+            self.call_in_ui(lambda: self.show_editor_errors(generation, errors))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def show_editor_errors(self, generation, errors):
+        """Marcar as linhas com erro (ignora resultados de textos antigos)"""
+        if generation != self.editor_validation_generation:
+            return
+        self.editor_text.tag_remove("json_error", 1.0, tk.END)
+        for line, message in errors:
+            self.editor_text.tag_add("json_error", f"{line}.0", f"{line}.end")
+
+        theme = self.themes[self.theme_var.get()]
+        if errors:
+            line, message = errors[0]
+            text = f"⚠️ Linha {line}: {message}"
+            if len(errors) > 1:
+                text += f" (+{len(errors) - 1} erro(s))"
+            self.editor_errors_label.configure(text=text, foreground=theme["error"])
+        else:
+            self.editor_errors_label.configure(
+                text="✅ JSON válido", foreground=theme["success"]
+            )
 
+    @instrumented
     def on_olt_selected(self, event=None):
         """Quando uma OLT é selecionada"""
         selected_olt = self.olt_var.get()
@@ -1050,49 +4211,58 @@ class OLTCommandManager:
                 )
                 tip_label.pack(fill="x", pady=1)
 
+    def get_compact_catalog(self):
+        """Catálogo compacto da navegação (reconstruído quando self.data muda)"""
+        catalog = self.compact_catalog
+        if catalog is None or catalog.source is not self.data:
+            self.compact_catalog = CompactCatalog(self.data)
+        return self.compact_catalog
+
+    @instrumented
     def populate_tree(self, olt_name):
         """Popular a árvore com os comandos da OLT selecionada"""
         self.tree.delete(*self.tree.get_children())
 
-        if olt_name not in self.data["olts"]:
+        catalog = self.get_compact_catalog()
+        if olt_name not in catalog.olts:
             return
 
-        olt_data = self.data["olts"][olt_name]
+        for category in catalog.children(catalog.olts[olt_name]):
+            self.tree.insert(
+                "",
+                "end",
+                iid=str(category),
+                text=catalog.nodes[category].name,
+                open=True,
+            )
+            self.populate_tree_recursive(catalog, category)
 
-        for category, cat_data in olt_data["categories"].items():
-            cat_id = self.tree.insert("", "end", text=category, open=True)
-            self.populate_tree_recursive(cat_id, cat_data)
+    def populate_tree_recursive(self, catalog, parent):
+        """Popular árvore recursivamente (o iid de cada item é o id do nó)"""
+        for child in catalog.children(parent):
+            self.tree.insert(
+                str(parent), "end", iid=str(child), text=catalog.nodes[child].name
+            )
+            if not catalog.is_command(child):
+                self.populate_tree_recursive(catalog, child)
 
-    def populate_tree_recursive(self, parent, data):
-        """Popular árvore recursivamente"""
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, dict):
-                    folder_id = self.tree.insert(
-                        parent, "end", text=key, open=False
-                    )
-                    self.populate_tree_recursive(folder_id, value)
-                else:
-                    # Se o valor é uma lista, juntar com quebras de linha
-                    if isinstance(value, list):
-                        value = '\n'.join(value)
-                    self.tree.insert(parent, "end", text=key, values=(value,))
-        else:
-            self.tree.insert(parent, "end", text=f"⚡ {data}", values=(data,))
+    def get_tree_command(self, item):
+        """Comando do item da árvore (None para categorias)"""
+        return self.get_compact_catalog().command(int(item))
 
+    @instrumented
     def on_tree_select(self, event=None):
         """Quando um item da árvore é selecionado"""
         selection = self.tree.selection()
         if not selection:
             return
 
-        item = selection[0]
-        values = self.tree.item(item, "values")
-
-        if values:
-            command = values[0]
-            self.display_command(command)
+        # O iid é o id do nó no catálogo compacto
+        template = self.get_compact_catalog().parsed(int(selection[0]))
+        if template is not None:
+            self.display_command(template.text)
 
+    @instrumented
     def display_command(self, command):
         """Exibir comando na área de texto"""
 
@@ -1106,6 +4276,7 @@ class OLTCommandManager:
         # Se o comando é uma lista (array), juntar com quebras de linha
         if isinstance(command, list):
             command = '\n'.join(command)
+        self.current_template = parse_template(command)
 
         # Inserir comando (multilinha ou simples)
         self.command_text.insert(tk.END, command)
@@ -1119,12 +4290,12 @@ class OLTCommandManager:
         for widget in self.params_frame.winfo_children():
             widget.destroy()
 
-        # Encontrar parâmetros no comando
-        params = re.findall(r"\{(\w+)\}", command)
+        # Parâmetros do comando, na ordem em que aparecem
+        params = self.current_template.params
         if params:
 
             self.param_entries = {}
-            unique_params = set(params)
+            unique_params = list(params)
 
             # Se temos slot, porta e pon, vamos tratá-los especialmente
             if all(p in unique_params for p in ["slot", "porta", "pon"]):
@@ -1148,6 +4319,13 @@ class OLTCommandManager:
 
                 # Guardar as três entradas juntas
                 self.param_entries["pon_id"] = pon_id_entry
+                AutocompletePopup(
+                    pon_id_entry,
+                    lambda text: self.onu_values.complete("pon_id", text),
+                    on_select=lambda value, entry=pon_id_entry: (
+                        self.update_command_preview_pon_id(entry)
+                    ),
+                )
 
             # Processar os parâmetros restantes
             for param in unique_params:
@@ -1231,19 +4409,545 @@ class OLTCommandManager:
                             firmware_entry.insert(0, "F10-G10-NW_1.6.0.bin")
                         self.update_command_preview()  # Atualizar preview quando o firmware mudar
 
-                    # Vincular evento de seleção
-                    model_combo.bind("<<ComboboxSelected>>", update_firmware)
+                    # Vincular evento de seleção
+                    model_combo.bind("<<ComboboxSelected>>", update_firmware)
+
+                    # Definir valor inicial do firmware
+                    update_firmware()
+
+                    # Usar a entry de firmware ao invés da entry original
+                    entry = firmware_entry
+
+                # Preencher a localização da ONU a partir do inventário
+                if param in ("sn", "mac"):
+                    entry.bind(
+                        "<KeyRelease>",
+                        lambda e, entry=entry, param=param: self.autofill_onu_params(
+                            entry, param
+                        ),
+                        add="+",
+                    )
+                    entry.bind(
+                        "<<Paste>>",
+                        lambda e, entry=entry, param=param: self.root.after(
+                            50, lambda: self.autofill_onu_params(entry, param)
+                        ),
+                        add="+",
+                    )
+                    AutocompletePopup(
+                        entry,
+                        lambda text, param=param: self.onu_values.complete(
+                            param, text
+                        ),
+                        on_select=lambda value, entry=entry, param=param: (
+                            self.update_command_preview(),
+                            self.autofill_onu_params(entry, param),
+                        ),
+                    )
+
+                # Adicionar a entry aos parâmetros
+                self.param_entries[param] = entry
+
+                # logging.debug(f"Comando exibido: {command}")
+
+    def load_onu_values(self):
+        """Indexar SN/MAC/PON ID do inventário e do histórico em segundo plano
+
+        A leitura do histórico roda na thread de gravação, para nunca
+        concorrer com a rotação do arquivo; o OnuValueIndex tem trava própria.
+        """
+
+        def task():
+            for record in self.onu_inventory.snapshot()["onus"]:
+                self.onu_values.add_record(record)
+            for entry in self.history.iter_all_reversed(flush=False):
+                self.onu_values.add_command(entry["command"])
+
+        self.persistence.run_task(self.history.history_file, task, delay=0)
+
+    def autofill_onu_params(self, entry, field):
+        """Preencher PON ID/slot/porta/pon e id a partir do SN ou MAC digitado"""
+        value = entry.get().strip()
+        if not value or not hasattr(self, "param_entries"):
+            return
+        if field == "sn":
+            record = self.onu_inventory.find_by_sn(value)
+        else:
+            record = self.onu_inventory.find_by_mac(value)
+        if record is None:
+            return
+
+        values = {
+            "pon_id": f"{record['slot']}/{record['porta']}/{record['pon']}",
+            "slot": record["slot"],
+            "porta": record["porta"],
+            "pon": record["pon"],
+            "id": record["id"],
+        }
+        for param, new_value in values.items():
+            target = self.param_entries.get(param)
+            if target is not None and target.get().strip() != new_value:
+                target.delete(0, tk.END)
+                target.insert(0, new_value)
+        self.update_command_preview()
+
+    def open_onu_inventory(self):
+        """Abrir a janela de importação e consulta do inventário de ONUs"""
+        inventory_window = tk.Toplevel(self.root)
+        inventory_window.title("📋 Inventário de ONUs")
+        inventory_window.geometry("800x550")
+        inventory_window.resizable(True, True)
+
+        # Aplicar tema da janela principal
+        theme = self.themes[self.theme_var.get()]
+        inventory_window.configure(bg=theme["bg"])
+
+        main_frame = ttk.Frame(inventory_window, style="Modern.TFrame")
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+
+        ttk.Label(main_frame, text="Inventário de ONUs", style="Title.TLabel").pack(
+            anchor="w", pady=(0, 5)
+        )
+        ttk.Label(
+            main_frame,
+            text=(
+                "Importe um CSV (colunas sn, mac, slot, porta, pon, id) ou cole a "
+                "saída de 'show gpon onu baseinfo' / 'display ont info'."
+            ),
+            style="Modern.TLabel",
+            wraplength=740,
+        ).pack(anchor="w", pady=(0, 10))
+
+        input_text = scrolledtext.ScrolledText(
+            main_frame, height=15, wrap="none", font=("Consolas", 10)
+        )
+        input_text.pack(fill="both", expand=True)
+
+        status_var = tk.StringVar()
+
+        def update_status(message=""):
+            total = f"{len(self.onu_inventory)} ONUs no inventário"
+            status_var.set(f"{message} — {total}" if message else total)
+
+        def describe(stats):
+            if stats is None:
+                return "Arquivo sem alterações desde a última importação"
+            return (
+                f"{stats['added']} novas, {stats['updated']} atualizadas, "
+                f"{stats['unchanged']} sem alteração"
+            )
+
+        def run_import(job):
+            """Importar em segundo plano para não travar a interface"""
+            status_var.set("Importando...")
+
+            def worker():
+                try:
+                    message = describe(job())
+                except Exception as e:
+                    message = f"Erro na importação: {e}"
+                self.call_in_ui(
+                    lambda: inventory_window.winfo_exists() and update_status(message)
+                )
+
+            threading.Thread(target=worker, daemon=True).start()
+
+        def import_pasted():
+            text = input_text.get("1.0", tk.END).strip()
+            if text:
+                run_import(lambda: self.onu_inventory.import_text(text))
+
+        def import_file():
+            path = filedialog.askopenfilename(
+                parent=inventory_window,
+                title="Importar inventário de ONUs",
+                filetypes=[
+                    ("CSV ou texto", "*.csv *.txt *.log"),
+                    ("Todos os arquivos", "*.*"),
+                ],
+            )
+            if path:
+                run_import(lambda: self.onu_inventory.import_file(path))
+
+        def clear_inventory():
+            if messagebox.askyesno(
+                "Confirmar",
+                "Remover todas as ONUs do inventário?",
+                parent=inventory_window,
+            ):
+                self.onu_inventory.clear()
+                update_status("Inventário limpo")
+
+        btn_frame = ttk.Frame(main_frame, style="Modern.TFrame")
+        btn_frame.pack(fill="x", pady=(10, 0))
+
+        ttk.Button(
+            btn_frame,
+            text="Importar Texto",
+            command=import_pasted,
+            style="Accent.TButton",
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            btn_frame,
+            text="Importar Arquivo",
+            command=import_file,
+            style="Modern.TButton",
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            btn_frame,
+            text="Limpar Inventário",
+            command=clear_inventory,
+            style="Modern.TButton",
+        ).pack(side="left", padx=5)
+
+        ttk.Label(main_frame, textvariable=status_var, style="Modern.TLabel").pack(
+            anchor="w", pady=(10, 0)
+        )
+        update_status()
+
+        input_text.focus_set()
+
+    def open_snapshot_diff(self):
+        """Comparar dois dumps de estado e gerar comandos em lote"""
+        diff_window = tk.Toplevel(self.root)
+        diff_window.title("🔍 Comparar Snapshots de ONUs")
+        diff_window.geometry("1100x750")
+        diff_window.resizable(True, True)
+
+        # Aplicar tema da janela principal
+        theme = self.themes[self.theme_var.get()]
+        diff_window.configure(bg=theme["bg"])
+
+        main_frame = ttk.Frame(diff_window, style="Modern.TFrame")
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+
+        ttk.Label(
+            main_frame, text="Comparar Snapshots de ONUs", style="Title.TLabel"
+        ).pack(anchor="w", pady=(0, 10))
+
+        # Entradas: snapshot anterior e atual
+        input_container = ttk.Frame(main_frame, style="Modern.TFrame")
+        input_container.pack(fill="both", expand=True)
+
+        inputs = {}
+        for side, title in (("old", "Snapshot anterior:"), ("new", "Snapshot atual:")):
+            panel = ttk.Frame(input_container, style="Card.TFrame")
+            panel.pack(
+                side="left",
+                fill="both",
+                expand=True,
+                padx=(0, 10) if side == "old" else (10, 0),
+            )
+            ttk.Label(panel, text=title, style="Subtitle.TLabel").pack(
+                anchor="w", padx=15, pady=(10, 5)
+            )
+            inputs[side] = scrolledtext.ScrolledText(
+                panel, height=10, wrap="none", font=("Consolas", 10)
+            )
+            inputs[side].pack(fill="both", expand=True, padx=15, pady=(0, 15))
+
+        # Resultado da comparação
+        result_frame = ttk.Frame(main_frame, style="Modern.TFrame")
+        result_frame.pack(fill="both", expand=True, pady=(10, 0))
+
+        result_tree = ttk.Treeview(
+            result_frame,
+            columns=("change", "interface", "sn", "state"),
+            show="headings",
+            style="Modern.Treeview",
+            height=8,
+        )
+        for column, heading, width in (
+            ("change", "Mudança", 150),
+            ("interface", "Interface", 180),
+            ("sn", "SN", 180),
+            ("state", "Estado", 250),
+        ):
+            result_tree.heading(column, text=heading)
+            result_tree.column(column, width=width)
+        result_scroll = ttk.Scrollbar(
+            result_frame, orient="vertical", command=result_tree.yview
+        )
+        result_tree.configure(yscrollcommand=result_scroll.set)
+        result_tree.pack(side="left", fill="both", expand=True)
+        result_scroll.pack(side="right", fill="y")
+
+        # Geração do lote
+        batch_frame = ttk.Frame(main_frame, style="Modern.TFrame")
+        batch_frame.pack(fill="x", pady=(10, 0))
+
+        change_labels = {
+            "removed": "Removidas",
+            "changed": "Mudaram de estado",
+            "added": "Novas",
+        }
+        group_var = tk.StringVar(value=change_labels["removed"])
+        ttk.Label(batch_frame, text="ONUs:", style="Modern.TLabel").pack(side="left")
+        ttk.Combobox(
+            batch_frame,
+            textvariable=group_var,
+            values=list(change_labels.values()),
+            state="readonly",
+            width=18,
+        ).pack(side="left", padx=(5, 15))
+
+        # Modelos do catálogo que usam parâmetros de ONU
+        onu_params = re.compile(r"\{(slot|porta|pon|id|sn|mac)\}")
+        templates = {
+            f"{doc['olt']} → {' → '.join(doc['path'])}": doc["command"]
+            for doc in self.get_search_index().documents
+            if onu_params.search(doc["command"])
+        }
+        template_var = tk.StringVar()
+        ttk.Label(batch_frame, text="Modelo:", style="Modern.TLabel").pack(side="left")
+        ttk.Combobox(
+            batch_frame,
+            textvariable=template_var,
+            values=list(templates),
+            state="readonly",
+            width=60,
+        ).pack(side="left", padx=(5, 0), fill="x", expand=True)
+
+        output_text = scrolledtext.ScrolledText(
+            main_frame, height=8, wrap="none", font=("Consolas", 10)
+        )
+        output_text.pack(fill="both", expand=True, pady=(10, 0))
+
+        state = {"diff": None}
+
+        def complete_record(record):
+            """Completar SN/MAC que o dump não traz com o inventário"""
+            if record.get("sn") and record.get("mac"):
+                return record
+            known = self.onu_inventory.find_by_interface(
+                record["slot"], record["porta"], record["pon"], record["id"]
+            )
+            if known is None:
+                return record
+            merged = dict(known)
+            merged.update(record)
+            return merged
+
+        def compare():
+            old_records = parse_onu_dump(inputs["old"].get("1.0", tk.END).splitlines())
+            new_records = parse_onu_dump(inputs["new"].get("1.0", tk.END).splitlines())
+            diff = state["diff"] = diff_onu_snapshots(old_records, new_records)
+
+            result_tree.delete(*result_tree.get_children())
+            rows = [("removed", record, record) for record in diff["removed"]]
+            rows += [("changed", new, old) for old, new in diff["changed"]]
+            rows += [("added", record, None) for record in diff["added"]]
+            for change, record, old in rows:
+                record = complete_record(record)
+                if change == "changed":
+                    state_text = f"{old.get('state', '?')} → {record.get('state', '?')}"
+                else:
+                    state_text = record.get("state", "")
+                result_tree.insert(
+                    "",
+                    "end",
+                    values=(
+                        change_labels[change],
+                        f"{record['slot']}/{record['porta']}/{record['pon']}:"
+                        f"{record['id']}",
+                        record.get("sn", ""),
+                        state_text,
+                    ),
+                )
+            summary = ", ".join(
+                f"{len(diff[change])} {label.lower()}"
+                for change, label in change_labels.items()
+            )
+            summary_label.configure(text=summary)
+
+        def generate_batch():
+            if state["diff"] is None:
+                compare()
+            template = templates.get(template_var.get())
+            if template is None:
+                messagebox.showwarning(
+                    "Aviso", "Selecione um modelo de comando.", parent=diff_window
+                )
+                return
+            change = next(
+                key for key, label in change_labels.items() if label == group_var.get()
+            )
+            records = state["diff"][change]
+            if change == "changed":
+                records = [new for old, new in records]
+            output_text.delete("1.0", tk.END)
+            output_text.insert(
+                "1.0", render_onu_batch(template, map(complete_record, records))
+            )
+
+        def copy_output():
+            output_content = output_text.get("1.0", tk.END).strip()
+            if output_content:
+                diff_window.clipboard_clear()
+                diff_window.clipboard_append(output_content)
+                messagebox.showinfo(
+                    "Sucesso", "Comandos copiados para o clipboard!", parent=diff_window
+                )
+
+        btn_frame = ttk.Frame(main_frame, style="Modern.TFrame")
+        btn_frame.pack(fill="x", pady=(10, 0))
+
+        ttk.Button(
+            btn_frame, text="Comparar", command=compare, style="Accent.TButton"
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            btn_frame, text="Gerar Lote", command=generate_batch, style="Accent.TButton"
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            btn_frame, text="Copiar", command=copy_output, style="Modern.TButton"
+        ).pack(side="left", padx=5)
+        summary_label = ttk.Label(btn_frame, text="", style="Modern.TLabel")
+        summary_label.pack(side="left", padx=15)
+
+        inputs["old"].focus_set()
+
+    def open_log_converter(self):
+        """Converter um log de sessão do terminal em script reutilizável"""
+        log_window = tk.Toplevel(self.root)
+        log_window.title("📜 Log de Sessão → Script")
+        log_window.geometry("1000x650")
+        log_window.resizable(True, True)
+
+        # Aplicar tema da janela principal
+        theme = self.themes[self.theme_var.get()]
+        log_window.configure(bg=theme["bg"])
+
+        main_frame = ttk.Frame(log_window, style="Modern.TFrame")
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+
+        ttk.Label(main_frame, text="Log de Sessão → Script", style="Title.TLabel").pack(
+            anchor="w", pady=(0, 5)
+        )
+        ttk.Label(
+            main_frame,
+            text=(
+                "Remove prompts, códigos de terminal e o paginador, mantém só os "
+                "comandos digitados e troca valores por {slot}/{porta}/{pon}, "
+                "{id}, {sn} e {mac}."
+            ),
+            style="Modern.TLabel",
+            wraplength=940,
+        ).pack(anchor="w", pady=(0, 10))
+
+        generalize_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            main_frame, text="Generalizar valores em parâmetros", variable=generalize_var
+        ).pack(anchor="w", pady=(0, 10))
+
+        container = ttk.Frame(main_frame, style="Modern.TFrame")
+        container.pack(fill="both", expand=True)
+
+        left_panel = ttk.Frame(container, style="Card.TFrame")
+        left_panel.pack(side="left", fill="both", expand=True, padx=(0, 10))
+        ttk.Label(
+            left_panel, text="Início do script gerado:", style="Subtitle.TLabel"
+        ).pack(anchor="w", padx=15, pady=(10, 5))
+        script_text = scrolledtext.ScrolledText(
+            left_panel, height=15, wrap="none", font=("Consolas", 10)
+        )
+        script_text.pack(fill="both", expand=True, padx=15, pady=(0, 15))
+
+        right_panel = ttk.Frame(container, style="Card.TFrame")
+        right_panel.pack(side="right", fill="both", expand=True, padx=(10, 0))
+        ttk.Label(
+            right_panel, text="Modelos mais frequentes:", style="Subtitle.TLabel"
+        ).pack(anchor="w", padx=15, pady=(10, 5))
+        templates_list = tk.Listbox(
+            right_panel, font=("Consolas", 9), activestyle="none"
+        )
+        templates_list.pack(fill="both", expand=True, padx=15, pady=(0, 15))
+
+        status_var = tk.StringVar()
+        preview_lines = 500
+
+        def show_result(converter, output_path, elapsed):
+            if not log_window.winfo_exists():
+                return
+            with open(output_path, "r", encoding="utf-8") as f:
+                head = "".join(islice(f, preview_lines))
+            script_text.delete("1.0", tk.END)
+            script_text.insert("1.0", head)
+
+            templates_list.delete(0, tk.END)
+            for template, count in converter.top_templates(200):
+                templates_list.insert(tk.END, f"{count:>6}×  {template}")
+
+            mb = converter.bytes / (1024 * 1024)
+            status_var.set(
+                f"{converter.commands} comandos de {converter.lines} linhas "
+                f"({mb:.1f} MB em {elapsed:.1f}s) → {output_path}"
+            )
+
+        def convert_log():
+            log_path = filedialog.askopenfilename(
+                parent=log_window,
+                title="Abrir log de sessão",
+                filetypes=[
+                    ("Logs", "*.log *.txt"),
+                    ("Todos os arquivos", "*.*"),
+                ],
+            )
+            if not log_path:
+                return
+            output_path = filedialog.asksaveasfilename(
+                parent=log_window,
+                title="Salvar script",
+                defaultextension=".txt",
+                initialfile=os.path.splitext(os.path.basename(log_path))[0]
+                + "_script.txt",
+            )
+            if not output_path:
+                return
 
-                    # Definir valor inicial do firmware
-                    update_firmware()
+            converter = SessionLogConverter(generalize=generalize_var.get())
+            status_var.set("Convertendo...")
 
-                    # Usar a entry de firmware ao invés da entry original
-                    entry = firmware_entry
+            def worker():
+                start = time.perf_counter()
+                try:
+                    converter.convert_file(log_path, output_path)
+                except OSError as e:
+                    message = f"Erro ao converter: {e}"
+                    self.call_in_ui(
+                        lambda: log_window.winfo_exists() and status_var.set(message)
+                    )
+                    return
+                elapsed = time.perf_counter() - start
+                self.call_in_ui(lambda: show_result(converter, output_path, elapsed))
 
-                # Adicionar a entry aos parâmetros
-                self.param_entries[param] = entry
+            threading.Thread(target=worker, daemon=True).start()
 
-                # logging.debug(f"Comando exibido: {command}")
+        def use_as_command():
+            """Abrir o trecho selecionado (ou o script) no painel de comandos"""
+            try:
+                command = script_text.get(tk.SEL_FIRST, tk.SEL_LAST).strip()
+            except tk.TclError:
+                command = script_text.get("1.0", tk.END).strip()
+            if command:
+                self.notebook.select(self.tree_frame)
+                self.display_command(command)
+
+        btn_frame = ttk.Frame(main_frame, style="Modern.TFrame")
+        btn_frame.pack(fill="x", pady=(10, 0))
+
+        ttk.Button(
+            btn_frame, text="Converter Log...", command=convert_log, style="Accent.TButton"
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            btn_frame,
+            text="Usar como Comando",
+            command=use_as_command,
+            style="Modern.TButton",
+        ).pack(side="left", padx=5)
+
+        ttk.Label(main_frame, textvariable=status_var, style="Modern.TLabel").pack(
+            anchor="w", pady=(10, 0)
+        )
 
     def open_onu_converter(self):
         """Abrir interface do conversor de ONUs"""
@@ -1326,25 +5030,13 @@ class OLTCommandManager:
                 output_text.delete("1.0", tk.END)
                 return
 
-            lines = input_content.split("\n")
-            commands = ["configure terminal"]
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Regex para capturar: gpon-onu_1/2/6:3
-                match = re.match(r"gpon-onu_(\d+)/(\d+)/(\d+):(\d+)", line)
-
-                if match:
-                    slot, card, port, onu = match.groups()
-                    commands.append(f"interface gpon-olt_{slot}/{card}/{port}")
-                    commands.append(f"no onu {onu}")
-                    commands.append("exit")
+            # Aceita gpon-onu_1/2/6:3 e linhas de dumps de estado
+            records = parse_onu_dump(input_content.split("\n"))
 
             output_text.delete("1.0", tk.END)
-            output_text.insert("1.0", "\n".join(commands))
+            output_text.insert("1.0", build_zte_removal_batch(records))
+
+        convert_onus = self.instrumentation.wrap("convert_onus", convert_onus)
 
         def copy_output():
             """Copiar resultado para clipboard"""
@@ -1385,6 +5077,7 @@ class OLTCommandManager:
         # Focar na entrada
         input_text.focus_set()
 
+    @instrumented
     def copy_command(self):
         """Copiar comando para clipboard e adicionar ao histórico"""
         command = self.command_text.get(1.0, tk.END).strip()
@@ -1394,15 +5087,17 @@ class OLTCommandManager:
             self.root.clipboard_append(command)
 
             # Adicionar ao histórico
-            self.history.add_command(
+            entry = self.history.add_command(
                 command=command,
                 olt_model=self.olt_var.get(),
                 category=self.get_current_category(),
             )
 
+            self.onu_values.add_command(command)
+
             # Atualizar lista de histórico se estiver visível
             if hasattr(self, "history_list"):
-                self.update_history_list()
+                self.add_history_row(entry)
 
     def copy_history_command(self):
         """Copiar comando selecionado do histórico"""
@@ -1413,9 +5108,8 @@ class OLTCommandManager:
             )
             return
 
-        item = selection[0]
-        values = self.history_list.item(item)["values"]
-        comando = values[1]  # O comando está na segunda coluna
+        entry = self.history_index.get(selection[0])
+        comando = entry["command"] if entry else ""
 
         if comando:
             self.root.clipboard_clear()
@@ -1430,75 +5124,346 @@ class OLTCommandManager:
             )
             return
 
-        item = selection[0]
-        values = self.favorites_list.item(item)["values"]
-        comando = values[1]  # O comando está na segunda coluna
+        fav = self.favorites.get(selection[0])
+        comando = self.get_favorite_command_text(fav) if fav else ""
 
         if comando:
             self.root.clipboard_clear()
             self.root.clipboard_append(comando)
 
-    def search_in_data(self, data, olt_name, path, search_text, results):
-        """Buscar recursivamente nos dados"""
-        if isinstance(data, dict):
-            for key, value in data.items():
-                new_path = f"{path} → {key}" if path else key
-                self.search_in_data(value, olt_name, new_path, search_text, results)
-        elif isinstance(data, str):
-            if (
-                not search_text
-                or search_text in data.lower()
-                or search_text in path.lower()
-            ):
-                results.append({"olt": olt_name, "path": path, "command": data})
+    def get_search_index(self):
+        """Índice de busca do catálogo atual (reconstruído quando self.data muda)"""
+        if self.search_index is None or self.search_index.source is not self.data:
+            self.search_index = CatalogSearchIndex(self.data)
+        return self.search_index
 
-    def on_result_select(self, event=None):
-        """Quando um resultado é selecionado"""
-        selection = self.results_listbox.curselection()
-        if not selection:
+    @instrumented
+    def on_search_changed(self, event=None):
+        """Buscar enquanto o usuário digita"""
+        if event is not None and event.keysym in ("Return", "Down", "Escape"):
             return
 
-        result_text = self.results_listbox.get(selection[0])
-        if "Nenhum comando encontrado" in result_text:
+        query = self.search_var.get().strip()
+        if not query:
+            self.show_search_results(False)
             return
 
-        # Extrair comando do resultado
-        try:
-            command_part = result_text.split(" → ")[-1]
-            command = command_part.replace("...", "")
+        self.search_results = [
+            doc for doc, score in self.get_search_index().search(query, limit=200)
+        ]
+
+        self.results_listbox.delete(0, tk.END)
+        if self.search_results:
+            self.results_listbox.insert(
+                tk.END,
+                *(
+                    f"{doc['olt']} → {' → '.join(doc['path'])}"
+                    for doc in self.search_results
+                ),
+            )
+        else:
+            self.results_listbox.insert(tk.END, "Nenhum comando encontrado")
+        self.show_search_results(True)
+
+    def show_search_results(self, visible):
+        """Alternar entre a árvore de comandos e a lista de resultados"""
+        if visible:
+            if not self.results_frame.winfo_ismapped():
+                self.tree_container.pack_forget()
+                self.results_frame.pack(fill="both", expand=True, pady=(0, 5))
+        elif self.results_frame.winfo_ismapped():
+            self.results_frame.pack_forget()
+            self.tree_container.pack(fill="both", expand=True, padx=0, pady=(0, 5))
+
+    def clear_search(self):
+        self.search_var.set("")
+        self.search_results = []
+        self.show_search_results(False)
+
+    def focus_search_results(self):
+        if self.search_results:
+            self.results_listbox.focus_set()
+            self.results_listbox.selection_clear(0, tk.END)
+            self.results_listbox.selection_set(0)
+            self.results_listbox.activate(0)
+
+    def on_result_select(self, event=None, index=None):
+        """Quando um resultado é selecionado: abrir o comando na árvore"""
+        if index is None:
+            selection = self.results_listbox.curselection()
+            if not selection:
+                return
+            index = selection[0]
+        if index >= len(self.search_results):
+            return
 
-            # Copiar para clipboard
-            self.root.clipboard_clear()
-            self.root.clipboard_append(command)
-        except:
-            pass
+        doc = self.search_results[index]
+        self.clear_search()
 
-    def load_editor_data(self, show_message=False):
-        """Carregar dados no editor"""
-        try:
-            # Ler o arquivo diretamente
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                json_data = f.read()
+        # Trocar de OLT se o resultado for de outro modelo
+        if doc["olt"] != self.olt_var.get():
+            self.olt_var.set(doc["olt"])
+            self.on_olt_selected()
+
+        self.select_tree_path(doc["path"])
+
+    def select_tree_path(self, path):
+        """Selecionar (e revelar) o item da árvore correspondente ao caminho"""
+        item = ""
+        for segment in path:
+            match = None
+            for child in self.tree.get_children(item):
+                if self.tree.item(child, "text") == segment:
+                    match = child
+                    break
+            if match is None:
+                break
+            item = match
+
+        # Categoria que aponta direto para um comando: o comando é o filho
+        if item and self.get_tree_command(item) is None:
+            children = self.tree.get_children(item)
+            if children and len(path) == 1:
+                item = children[0]
+        if not item:
+            return
 
-            # Limpar editor e inserir novo conteúdo
-            self.editor_text.delete(1.0, tk.END)
-            self.editor_text.insert(1.0, json_data)
+        parent = self.tree.parent(item)
+        while parent:
+            self.tree.item(parent, open=True)
+            parent = self.tree.parent(parent)
+        self.tree.see(item)
+        self.tree.focus(item)
+        self.tree.selection_set(item)
+
+    def get_palette_catalog_index(self):
+        """Índice aproximado dos comandos do catálogo (reconstruído com self.data)"""
+        if (
+            self.palette_catalog_index is None
+            or self.palette_catalog_source is not self.data
+        ):
+            index = FuzzyIndex()
+            for doc in self.get_search_index().documents:
+                label = f"{doc['olt']} → {' → '.join(doc['path'])}"
+                index.add(
+                    f"{doc['olt']} {' '.join(doc['path'])}",
+                    ("catalog", label, doc),
+                )
+            self.palette_catalog_index = index
+            self.palette_catalog_source = self.data
+        return self.palette_catalog_index
 
-            # Atualizar dados em memória
-            self.data = json.loads(json_data)
+    def build_palette_dynamic_index(self):
+        """Índice aproximado de favoritos e do histórico recente"""
+        index = FuzzyIndex()
+        for fav in self.favorites.favorites:
+            index.add(
+                f"{fav['name']} {fav['olt_model']} {fav['command']}",
+                ("favorite", f"⭐ {fav['name']} ({fav['olt_model']})", fav),
+            )
 
-            # Atualizar interface
-            self.populate_tree(
-                self.olt_var.get()
-                if self.olt_var.get()
-                else next(iter(self.data["olts"]))
+        seen = set()
+        for entry in reversed(self.history.history):
+            if entry["command"] in seen:
+                continue
+            seen.add(entry["command"])
+            first_line = entry["command"].split("\n", 1)[0]
+            index.add(
+                f"{entry['olt_model']} {entry['command']}",
+                ("history", f"🕘 {first_line} ({entry['olt_model']})", entry),
             )
+        return index
 
-            # Mostrar mensagem apenas se solicitado (ao clicar no botão recarregar)
-            if show_message:
-                messagebox.showinfo("Sucesso", "Dados recarregados com sucesso!")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar arquivo: {str(e)}")
+    def open_command_palette(self, event=None):
+        """Abrir a paleta de comandos (Ctrl+P) com busca aproximada"""
+        if self.palette_window is not None and self.palette_window.winfo_exists():
+            self.palette_window.lift()
+            self.palette_window.focus_force()
+            return "break"
+
+        page_size = 50
+        catalog_index = self.get_palette_catalog_index()
+        dynamic_index = self.build_palette_dynamic_index()
+        usage = self.history.get_usage_counts()
+
+        palette = self.palette_window = tk.Toplevel(self.root)
+        palette.title("Paleta de Comandos")
+        palette.geometry("700x420")
+        palette.transient(self.root)
+
+        theme = self.themes[self.theme_var.get()]
+        palette.configure(bg=theme["bg"])
+
+        main_frame = ttk.Frame(palette, style="Modern.TFrame")
+        main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        query_var = tk.StringVar()
+        query_entry = ttk.Entry(main_frame, textvariable=query_var)
+        query_entry.pack(fill="x", pady=(0, 8))
+
+        list_frame = ttk.Frame(main_frame, style="Modern.TFrame")
+        list_frame.pack(fill="both", expand=True)
+        listbox = tk.Listbox(list_frame, font=("Segoe UI", 9), activestyle="none")
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical")
+        listbox.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        status_label = ttk.Label(main_frame, text="", style="Modern.TLabel")
+        status_label.pack(anchor="w", pady=(5, 0))
+
+        # Estado da busca atual: heap com os candidatos ainda não exibidos
+        state = {"heap": [], "shown": [], "total": 0}
+
+        def rank(score, kind, item):
+            """Nota aproximada ponderada pelo uso de cada (OLT, categoria)"""
+            if kind == "catalog":
+                key = (item["olt"], " > ".join(item["path"]))
+            else:
+                key = (item.get("olt_model"), item.get("category"))
+            count = usage.get(key, 0)
+            # Favoritos e histórico ficam um pouco à frente de empates do catálogo
+            boost = 1.1 if kind != "catalog" else 1.0
+            return score * boost * (1 + 0.2 * math.log1p(count))
+
+        def show_next_page():
+            heap = state["heap"]
+            labels = []
+            for _ in range(min(page_size, len(heap))):
+                _, _, (kind, label, item) = heapq.heappop(heap)
+                state["shown"].append((kind, item))
+                labels.append(label)
+            if labels:
+                listbox.insert(tk.END, *labels)
+            status_label.configure(
+                text=f"{len(state['shown'])} de {state['total']} resultados"
+            )
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            # Carregar a próxima página ao chegar perto do fim da lista
+            if float(last) > 0.9 and state["heap"]:
+                show_next_page()
+
+        listbox.configure(yscrollcommand=on_scroll)
+        scrollbar.configure(command=listbox.yview)
+
+        def update_results(event=None):
+            if event is not None and event.keysym in ("Up", "Down", "Return", "Escape"):
+                return
+            query = query_var.get().strip()
+            if query:
+                candidates = catalog_index.search(query) + dynamic_index.search(query)
+            else:
+                # Sem texto: favoritos e comandos recentes
+                candidates = [(1.0, item) for item in dynamic_index.items]
+
+            heap = [
+                (-rank(score, entry[0], entry[2]), position, entry)
+                for position, (score, entry) in enumerate(candidates)
+            ]
+            heapq.heapify(heap)
+            state["heap"] = heap
+            state["shown"] = []
+            state["total"] = len(heap)
+
+            listbox.delete(0, tk.END)
+            show_next_page()
+            if state["shown"]:
+                listbox.selection_set(0)
+                listbox.activate(0)
+
+        def move_selection(delta):
+            if not state["shown"]:
+                return "break"
+            selection = listbox.curselection()
+            index = selection[0] + delta if selection else 0
+            # Ao chegar na última linha carregada, exibir a próxima página
+            if index >= len(state["shown"]) - 1 and state["heap"]:
+                show_next_page()
+            index = max(0, min(index, len(state["shown"]) - 1))
+            listbox.selection_clear(0, tk.END)
+            listbox.selection_set(index)
+            listbox.activate(index)
+            listbox.see(index)
+            return "break"
+
+        def run_selected(event=None):
+            selection = listbox.curselection()
+            if not selection or selection[0] >= len(state["shown"]):
+                return "break"
+            kind, item = state["shown"][selection[0]]
+            palette.destroy()
+
+            self.notebook.select(self.tree_frame)
+            if kind == "catalog":
+                if item["olt"] != self.olt_var.get():
+                    self.olt_var.set(item["olt"])
+                    self.on_olt_selected()
+                self.select_tree_path(item["path"])
+            elif kind == "favorite":
+                self.display_command(self.get_favorite_command_text(item))
+            else:
+                self.display_command(item["command"])
+            return "break"
+
+        query_entry.bind("<KeyRelease>", update_results)
+        query_entry.bind("<Down>", lambda e: move_selection(1))
+        query_entry.bind("<Up>", lambda e: move_selection(-1))
+        query_entry.bind("<Return>", run_selected)
+        listbox.bind("<Double-Button-1>", run_selected)
+        listbox.bind("<Return>", run_selected)
+        palette.bind("<Escape>", lambda e: palette.destroy())
+
+        update_results()
+
+        # Centralizar sobre a janela principal
+        palette.update_idletasks()
+        x = self.root.winfo_rootx() + (self.root.winfo_width() - 700) // 2
+        y = self.root.winfo_rooty() + 80
+        palette.geometry(f"700x420+{max(x, 0)}+{max(y, 0)}")
+
+        query_entry.focus_set()
+        return "break"
+
+    def load_editor_data(self, show_message=False):
+        """Recarregar o catálogo do disco (leitura em segundo plano)"""
+
+        def worker():
+            try:
+                with open(self.data_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                message = f"Erro ao carregar arquivo: {str(e)}"
+                self.call_in_ui(
+                    lambda: self.on_editor_data_loaded(None, show_message, message)
+                )
+                return
+            self.call_in_ui(lambda: self.on_editor_data_loaded(data, show_message))
+
+        self.editor_status.configure(text="Carregando...")
+        threading.Thread(target=worker, daemon=True).start()
+
+    def on_editor_data_loaded(self, data, show_message, error=None):
+        self.editor_status.configure(text="")
+        if error is not None:
+            messagebox.showerror("Erro", error)
+            return
+
+        # Atualizar dados em memória
+        self.data = data
+        self.update_editor_sections()
+        self.show_editor_section()
+
+        # Atualizar interface
+        self.populate_tree(
+            self.olt_var.get()
+            if self.olt_var.get() in self.data["olts"]
+            else next(iter(self.data["olts"]))
+        )
+
+        # Mostrar mensagem apenas se solicitado (ao clicar no botão recarregar)
+        if show_message:
+            messagebox.showinfo("Sucesso", "Dados recarregados com sucesso!")
 
     def open_json_file(self):
         """Abrir arquivo JSON externo"""
@@ -1535,6 +5500,13 @@ class OLTCommandManager:
             style="Accent.TButton",
         ).pack(side="left", padx=2)
 
+        ttk.Button(
+            btn_frame,
+            text="Carregar Mais",
+            command=self.load_more_history,
+            style="Modern.TButton",
+        ).pack(side="left", padx=2)
+
         ttk.Button(
             btn_frame,
             text="Limpar Histórico",
@@ -1542,17 +5514,72 @@ class OLTCommandManager:
             style="Modern.TButton",
         ).pack(side="left", padx=2)
 
+        # Filtros de busca no histórico completo
+        search_frame = ttk.Frame(frame, style="Modern.TFrame")
+        search_frame.pack(fill="x", pady=(0, 10))
+
+        ttk.Label(search_frame, text="Buscar:", style="Modern.TLabel").pack(
+            side="left", padx=(5, 5)
+        )
+        self.history_search_var = tk.StringVar()
+        search_entry = ttk.Entry(
+            search_frame, textvariable=self.history_search_var, width=30
+        )
+        search_entry.pack(side="left", padx=(0, 10))
+        search_entry.bind("<KeyRelease>", self.schedule_history_search)
+
+        ttk.Label(search_frame, text="OLT:", style="Modern.TLabel").pack(
+            side="left", padx=(0, 5)
+        )
+        self.history_olt_var = tk.StringVar(value="Todas")
+        olt_combo = ttk.Combobox(
+            search_frame,
+            textvariable=self.history_olt_var,
+            values=["Todas"] + list(self.data["olts"].keys()),
+            state="readonly",
+            width=25,
+        )
+        olt_combo.pack(side="left", padx=(0, 10))
+        olt_combo.bind("<<ComboboxSelected>>", lambda e: self.apply_history_search())
+
+        ttk.Label(search_frame, text="Período:", style="Modern.TLabel").pack(
+            side="left", padx=(0, 5)
+        )
+        self.history_period_var = tk.StringVar(value="Todo o período")
+        period_combo = ttk.Combobox(
+            search_frame,
+            textvariable=self.history_period_var,
+            values=[
+                "Todo o período",
+                "Hoje",
+                "Últimos 7 dias",
+                "Últimos 30 dias",
+                "Mês passado",
+            ],
+            state="readonly",
+            width=15,
+        )
+        period_combo.pack(side="left", padx=(0, 10))
+        period_combo.bind(
+            "<<ComboboxSelected>>", lambda e: self.apply_history_search()
+        )
+
+        ttk.Button(
+            search_frame,
+            text="Limpar Filtros",
+            command=self.clear_history_search,
+            style="Modern.TButton",
+        ).pack(side="left", padx=2)
+
         # Frame para a lista
         list_frame = ttk.Frame(frame, style="Modern.TFrame")
         list_frame.pack(fill="both", expand=True)
 
-        # Lista de histórico com suporte a múltiplas linhas
-        self.history_list = ttk.Treeview(
-            list_frame,
-            columns=("data", "comando", "olt"),
-            show="headings",
-            style="Modern.Treeview",
+        # Lista de histórico virtualizada: só as linhas visíveis existem no Treeview
+        self.history_view = VirtualListView(
+            list_frame, ("data", "comando", "olt"), self.get_history_row
         )
+        self.history_list = self.history_view.tree
 
         # Configurar colunas com tamanhos proporcionais
         list_frame.update_idletasks()
@@ -1577,15 +5604,108 @@ class OLTCommandManager:
         self.history_list.configure(xscrollcommand=x_scrollbar.set)
 
         # Empacotamento otimizado
+        self.history_view.scrollbar.pack(side="right", fill="y")
         self.history_list.pack(side="top", fill="both", expand=True, padx=5)
         x_scrollbar.pack(side="bottom", fill="x", padx=5)
 
         # Eventos
-        self.history_list.bind("<<TreeviewSelect>>", self.on_history_select)
+        self.history_view.bind_select(self.on_history_select)
+
+        # Quantidade de entradas exibidas (aumenta com "Carregar Mais")
+        self.history_display_limit = 20
+        # Filtros ativos da busca; None exibe apenas os comandos recentes
+        self.history_filters = None
+        self.history_search_job = None
 
         # Atualizar lista
         self.update_history_list()
 
+    def load_more_history(self):
+        """Exibir entradas mais antigas, lidas do disco sob demanda"""
+        if not self.history_filters:
+            self.history_display_limit += 20
+            self.update_history_list()
+            return
+
+        # Paginação por chave: continuar a partir da última linha exibida
+        if not self.displayed_history:
+            return
+        last = self.displayed_history[-1]
+        page = self.history.search(
+            before=(last["timestamp"], last.get("id")),
+            limit=20,
+            **self.history_filters,
+        )
+        self.displayed_history.extend(page)
+        self.insert_history_rows(page)
+
+    def add_history_row(self, entry):
+        """Mostrar um comando recém-copiado sem recarregar a lista inteira"""
+        if self.history_filters:
+            # Com filtros ativos, a nova entrada pode nem fazer parte do resultado
+            self.update_history_list()
+            return
+
+        self.displayed_history.insert(0, entry)
+        self.history_index[entry["id"]] = entry
+        self.history_view.insert_keys(len(self.history_view.keys), [entry["id"]])
+
+        # Manter o mesmo número de linhas que um recarregamento completo exibiria
+        if len(self.displayed_history) > self.history_display_limit:
+            oldest = self.displayed_history.pop()
+            self.history_index.pop(oldest["id"], None)
+            self.history_view.remove_key(oldest["id"])
+
+    def schedule_history_search(self, event=None):
+        """Agendar a busca para depois que o usuário parar de digitar"""
+        if self.history_search_job is not None:
+            self.root.after_cancel(self.history_search_job)
+        self.history_search_job = self.root.after(300, self.apply_history_search)
+
+    @instrumented
+    def apply_history_search(self):
+        """Aplicar os filtros de busca ao histórico"""
+        self.history_search_job = None
+
+        filters = {}
+        text = self.history_search_var.get().strip()
+        if text:
+            filters["text"] = text
+        olt_model = self.history_olt_var.get()
+        if olt_model and olt_model != "Todas":
+            filters["olt_model"] = olt_model
+        since, until = self.get_history_period_range(self.history_period_var.get())
+        if since:
+            filters["since"] = since
+        if until:
+            filters["until"] = until
+
+        self.history_filters = filters or None
+        self.history_display_limit = 20
+        self.update_history_list()
+
+    def clear_history_search(self):
+        """Remover filtros e voltar aos comandos recentes"""
+        self.history_search_var.set("")
+        self.history_olt_var.set("Todas")
+        self.history_period_var.set("Todo o período")
+        self.apply_history_search()
+
+    def get_history_period_range(self, period):
+        """Converter o período selecionado em limites ISO (início, fim)"""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        if period == "Hoje":
+            return today.isoformat(), None
+        if period == "Últimos 7 dias":
+            return (today - timedelta(days=6)).isoformat(), None
+        if period == "Últimos 30 dias":
+            return (today - timedelta(days=29)).isoformat(), None
+        if period == "Mês passado":
+            month_start = today.replace(day=1)
+            last_month_start = (month_start - timedelta(days=1)).replace(day=1)
+            return last_month_start.isoformat(), month_start.isoformat()
+        return None, None
+
     def clear_history(self):
         """Limpar todo o histórico de comandos"""
         confirm = messagebox.askyesno(
@@ -1639,16 +5759,14 @@ class OLTCommandManager:
         list_container = ttk.Frame(frame, style="Modern.TFrame")
         list_container.pack(fill="both", expand=True)
 
-        # Lista de favoritos com suporte a múltiplas linhas
-        self.favorites_list = ttk.Treeview(
-            list_container,
-            columns=("nome", "comando", "olt"),
-            show="headings",
-            style="Modern.Treeview",
-            height=12,
+        # Lista de favoritos virtualizada: só as linhas visíveis existem no Treeview
+        self.favorites_view = VirtualListView(
+            list_container, ("nome", "comando", "olt"), self.get_favorite_row
         )
+        self.favorites_list = self.favorites_view.tree
 
         # Configurar colunas com tamanhos relativos e ajuste automático
+        self.favorites_view.scrollbar.pack(side="right", fill="y")
         self.favorites_list.pack(fill="both", expand=True, padx=5)
         list_container.update_idletasks()  # Forçar atualização de geometria
 
@@ -1668,9 +5786,9 @@ class OLTCommandManager:
         self.favorites_list.heading("olt", text="OLT")
 
         # Eventos
-        self.favorites_list.bind("<<TreeviewSelect>>", self.on_favorite_select)
+        self.favorites_view.bind_select(self.on_favorite_select)
         self.favorites_list.bind(
-            "<Configure>", lambda e: self.adjust_favorites_columns(e)
+            "<Configure>", lambda e: self.adjust_favorites_columns(e), add="+"
         )
 
         # Atualizar lista
@@ -1691,48 +5809,72 @@ class OLTCommandManager:
         self.favorites_list.column("comando", width=int(total_width * 0.55))
         self.favorites_list.column("olt", width=int(total_width * 0.20))
 
+    @instrumented
     def update_history_list(self):
         """Atualizar lista de histórico"""
-        # Limpar lista atual
-        for item in self.history_list.get_children():
-            self.history_list.delete(item)
-
         # Adicionar itens do histórico
-        for entry in self.history.get_recent_commands():
-            date = datetime.fromisoformat(entry["timestamp"]).strftime("%d/%m/%Y %H:%M")
-            self.history_list.insert(
-                "", 0, values=(date, entry["command"], entry["olt_model"])
+        self.history_index = {}
+        self.history_view.set_keys([])
+        if self.history_filters:
+            self.displayed_history = self.history.search(
+                limit=20, **self.history_filters
             )
-
+        else:
+            self.displayed_history = self.history.get_recent_commands(
+                self.history_display_limit
+            )
+        self.insert_history_rows(self.displayed_history)
+
+    def insert_history_rows(self, entries):
+        """Inserir entradas (da mais nova para a mais antiga) no topo da lista"""
+        keys = []
+        for entry in entries:
+            # O ID estável da entrada é o iid da linha
+            if entry["id"] in self.history_index:
+                continue
+            self.history_index[entry["id"]] = entry
+            keys.append(entry["id"])
+        keys.reverse()
+        self.history_view.insert_keys(0, keys)
+
+    def get_history_row(self, entry_id):
+        """Valores exibidos para uma linha do histórico"""
+        entry = self.history_index[entry_id]
+        date = datetime.fromisoformat(entry["timestamp"]).strftime("%d/%m/%Y %H:%M")
+        return (date, entry["command"], entry["olt_model"]), ()
+
+    @instrumented
     def update_favorites_list(self):
         """Atualizar lista de favoritos"""
-        # Limpar lista atual
-        for item in self.favorites_list.get_children():
-            self.favorites_list.delete(item)
+        # As linhas são montadas sob demanda, apenas quando ficam visíveis
+        self.favorites_view.set_keys(self.favorites.by_id.keys())
+
+    def get_favorite_row(self, fav_id):
+        """Valores exibidos para um favorito (guardados em cache pela lista)"""
+        fav = self.favorites.get(fav_id)
 
         # Definir altura da linha baseada no conteúdo maior
         line_height = 20  # Altura base em pixels
 
-        # Adicionar favoritos
-        for fav in self.favorites.favorites:
-            # Criar uma versão do comando com os parâmetros preenchidos
-            command = fav["command"]
-            if "params" in fav:
-                for param, value in fav["params"].items():
-                    command = command.replace(f"{{{param}}}", value)
+        # Criar uma versão do comando com os parâmetros preenchidos
+        command = self.get_favorite_command_text(fav)
 
-            # Quebrar linhas longas do comando para melhor visualização
-            wrapped_command = "\n".join(textwrap.wrap(command, width=80))
+        # Quebrar linhas longas do comando para melhor visualização
+        wrapped_command = "\n".join(textwrap.wrap(command, width=80))
 
-            # Calcular altura necessária para o item baseado no número de linhas
-            num_lines = len(wrapped_command.split("\n"))
-            height = max(line_height, line_height * num_lines)
+        # Calcular altura necessária para o item baseado no número de linhas
+        num_lines = len(wrapped_command.split("\n"))
+        height = max(line_height, line_height * num_lines)
 
-            # Inserir item com altura ajustada
-            item = self.favorites_list.insert(
-                "", "end", values=(fav["name"], wrapped_command, fav["olt_model"])
-            )
-            self.favorites_list.item(item, tags=(str(height),))
+        return (fav["name"], wrapped_command, fav["olt_model"]), (str(height),)
+
+    def get_favorite_command_text(self, fav):
+        """Comando do favorito com os parâmetros salvos preenchidos"""
+        command = fav["command"]
+        if "params" in fav:
+            for param, value in fav["params"].items():
+                command = command.replace(f"{{{param}}}", value)
+        return command
 
     def add_to_favorites(self):
         """Adicionar comando atual aos favoritos"""
@@ -1758,7 +5900,7 @@ class OLTCommandManager:
             }
 
         # Adicionar aos favoritos
-        self.favorites.add_favorite(
+        entry = self.favorites.add_favorite(
             command=command,
             name=name,
             olt_model=self.olt_var.get(),
@@ -1766,8 +5908,11 @@ class OLTCommandManager:
             params=params,
         )
 
-        # Atualizar lista
-        self.update_favorites_list()
+        # Atualizar lista apenas com a nova linha
+        if hasattr(self, "favorites_view"):
+            self.favorites_view.insert_keys(
+                len(self.favorites_view.keys), [entry["id"]]
+            )
         messagebox.showinfo("Sucesso", "Comando adicionado aos favoritos!")
 
     def remove_from_favorites(self):
@@ -1782,18 +5927,11 @@ class OLTCommandManager:
         if messagebox.askyesno(
             "Confirmar", "Deseja remover este comando dos favoritos?"
         ):
-            item = selection[0]
-            values = self.favorites_list.item(item)["values"]
-            name = values[0]
-
-            # Encontrar e remover o comando
-            for fav in self.favorites.favorites:
-                if fav["name"] == name:
-                    self.favorites.remove_favorite(fav["command"])
-                    break
+            # Remover pelo ID estável guardado no iid da linha
+            self.favorites.remove_favorite_by_id(selection[0])
 
-            # Atualizar lista
-            self.update_favorites_list()
+            # Atualizar lista removendo apenas a linha afetada
+            self.favorites_view.remove_key(selection[0])
             messagebox.showinfo("Sucesso", "Comando removido dos favoritos!")
 
     def ask_favorite_name(self):
@@ -1817,84 +5955,75 @@ class OLTCommandManager:
 
         return " > ".join(path) if path else "Geral"
 
+    @instrumented
     def on_history_select(self, event):
         """Quando um item do histórico é selecionado"""
         selection = self.history_list.selection()
         if not selection:
             return
 
-        item = selection[0]
-        values = self.history_list.item(item)["values"]
-        date = values[0]
-
-        # Encontrar o comando no histórico
-        for entry in self.history.history:
-            entry_date = datetime.fromisoformat(entry["timestamp"]).strftime(
-                "%d/%m/%Y %H:%M"
-            )
-            if entry_date == date:
-                self.display_command(entry["command"])
-                break
+        # O iid da linha é o ID estável da entrada
+        entry = self.history_index.get(selection[0])
+        if entry is not None:
+            self.display_command(entry["command"])
 
+    @instrumented
     def on_favorite_select(self, event):
         """Quando um favorito é selecionado"""
         selection = self.favorites_list.selection()
         if not selection:
             return
 
-        item = selection[0]
-        values = self.favorites_list.item(item)["values"]
-        name = values[0]
+        # O iid da linha é o ID estável do favorito
+        fav = self.favorites.get(selection[0])
+        if fav is None:
+            return
 
-        # Encontrar o comando nos favoritos
-        for fav in self.favorites.favorites:
-            if fav["name"] == name:
-                # Exibir o comando
-                self.display_command(fav["command"])
+        # Exibir o comando
+        self.display_command(fav["command"])
 
-                # Extrair parâmetros do comando
-                params = set(re.findall(r"\{(\w+)\}", fav["command"]))
+        # Extrair parâmetros do comando
+        params = self.current_template.params
 
-                # Se existem parâmetros, criar ou atualizar a interface
-                if params:
-                    # Criar frame para parâmetros se não existir
-                    if (
-                        not hasattr(self, "params_frame")
-                        or not self.params_frame.winfo_exists()
-                    ):
-                        self.params_frame = ttk.Frame(
-                            self.favorites_frame,
-                            style="Modern.TFrame",
-                        )
-                        self.params_frame.pack(fill="x", padx=10, pady=(0, 10))
-                        self.param_entries = {}
-
-                    # Limpar parâmetros anteriores
-                    for widget in self.params_frame.winfo_children():
-                        widget.destroy()
+        # Se existem parâmetros, criar ou atualizar a interface
+        if params:
+            # Criar frame para parâmetros se não existir
+            if (
+                not hasattr(self, "params_frame")
+                or not self.params_frame.winfo_exists()
+            ):
+                self.params_frame = ttk.Frame(
+                    self.favorites_frame,
+                    style="Modern.TFrame",
+                )
+                self.params_frame.pack(fill="x", padx=10, pady=(0, 10))
+                self.param_entries = {}
 
-                    # Criar campos para cada parâmetro
-                    for param in params:
-                        frame = ttk.Frame(self.params_frame, style="Modern.TFrame")
-                        frame.pack(fill="x", padx=5, pady=2)
+            # Limpar parâmetros anteriores
+            for widget in self.params_frame.winfo_children():
+                widget.destroy()
 
-                        ttk.Label(frame, text=f"{param}:", style="Modern.TLabel").pack(
-                            side="left", padx=(0, 5)
-                        )
-                        entry = ttk.Entry(frame)
-                        entry.pack(side="left", fill="x", expand=True)
+            # Criar campos para cada parâmetro
+            for param in params:
+                frame = ttk.Frame(self.params_frame, style="Modern.TFrame")
+                frame.pack(fill="x", padx=5, pady=2)
 
-                        # Salvar referência e adicionar validação
-                        self.param_entries[param] = entry
-                        entry.bind("<KeyRelease>", self.update_command_preview)
+                ttk.Label(frame, text=f"{param}:", style="Modern.TLabel").pack(
+                    side="left", padx=(0, 5)
+                )
+                entry = ttk.Entry(frame)
+                entry.pack(side="left", fill="x", expand=True)
 
-                        # Preencher valor salvo se existir
-                        if "params" in fav and param in fav["params"]:
-                            entry.insert(0, fav["params"][param])
+                # Salvar referência e adicionar validação
+                self.param_entries[param] = entry
+                entry.bind("<KeyRelease>", self.update_command_preview)
 
-                    # Atualizar preview com os parâmetros
-                    self.update_command_preview()
-                break
+                # Preencher valor salvo se existir
+                if "params" in fav and param in fav["params"]:
+                    entry.insert(0, fav["params"][param])
+
+            # Atualizar preview com os parâmetros
+            self.update_command_preview()
 
     def create_documentation_view(self):
         """Criar janela de documentação"""
@@ -1979,24 +6108,12 @@ class OLTCommandManager:
                 style="Modern.TLabel",
             ).pack(anchor="w", padx=10, pady=5)
 
-    def update_command_preview(self):
+    @instrumented
+    def update_command_preview(self, event=None):
         """Atualizar preview do comando com validação"""
-        if not hasattr(self, "param_entries"):
+        if not hasattr(self, "param_entries") or self.current_template is None:
             return
 
-        # Recuperar o comando original da última seleção na árvore
-        selection = self.tree.selection()
-        if selection:
-            item = selection[0]
-            values = self.tree.item(item, "values")
-            if values:
-                original_command = values[0]
-            else:
-                original_command = self.command_text.get(1.0, tk.END).strip()
-        else:
-            original_command = self.command_text.get(1.0, tk.END).strip()
-
-        command = original_command
         params = {}
 
         # Processar PON ID primeiro se existir
@@ -2057,44 +6174,19 @@ class OLTCommandManager:
                 )
                 label.pack(anchor="w", pady=2)
 
-        # Substituir parâmetros na ordem específica
-        param_order = ["firmware", "slot", "porta", "pon", "id", "sn", "mac", "index"]
-
-        # Primeiro substituir parâmetros na ordem definida
-        for param in param_order:
-            if param in params:
-                value = params[param]
-                if value:
-                    placeholder = f"{{{param}}}"
-                    command = command.replace(placeholder, value)
-
-        # Depois substituir quaisquer outros parâmetros que possam existir
-        for param, value in params.items():
-            if param not in param_order and value:
-                placeholder = f"{{{param}}}"
-                command = command.replace(placeholder, value)
+        # Substituir parâmetros a partir do modelo original
+        command = self.current_template.render(params)
 
         # Atualizar texto
         self.command_text.delete(1.0, tk.END)
         self.command_text.insert(1.0, command)
 
+    @instrumented
     def update_command_preview_pon_id(self, pon_id_entry):
         """Atualizar preview do comando quando o PON ID é alterado"""
-        if not hasattr(self, "param_entries"):
+        if not hasattr(self, "param_entries") or self.current_template is None:
             return
 
-        # Recuperar o comando original da última seleção na árvore
-        selection = self.tree.selection()
-        if selection:
-            item = selection[0]
-            values = self.tree.item(item, "values")
-            if values:
-                command = values[0]
-            else:
-                command = self.command_text.get(1.0, tk.END).strip()
-        else:
-            command = self.command_text.get(1.0, tk.END).strip()
-
         params = {}
         pon_id_valid = False
 
@@ -2164,11 +6256,8 @@ class OLTCommandManager:
                     )
                     label.pack(anchor="w", pady=2)
 
-        # Substituir parâmetros
-        for param, value in params.items():
-            if value:  # Substituir apenas se tiver valor
-                placeholder = f"{{{param}}}"
-                command = command.replace(placeholder, value)
+        # Substituir parâmetros a partir do modelo original
+        command = self.current_template.render(params)
 
         # Atualizar texto
         self.command_text.delete(1.0, tk.END)
@@ -2194,8 +6283,26 @@ class OLTCommandManager:
                     )
                     label.pack(anchor="w", pady=2)
 
+    def schedule_preferences_save(self, event=None):
+        """Marcar preferências como alteradas, mantendo no máximo um salvamento pendente"""
+        # <Configure> do root também chega para cada widget filho
+        if event is not None and event.widget is not self.root:
+            return
+        # O job pendente funciona como marca de "alterado": eventos seguintes
+        # não agendam outro salvamento
+        if self.preferences_save_job is None:
+            self.preferences_save_job = self.root.after(1000, self.save_preferences)
+
+    def flush_preferences(self):
+        """Salvar agora, cancelando o salvamento pendente (usado ao fechar)"""
+        if self.preferences_save_job is not None:
+            self.root.after_cancel(self.preferences_save_job)
+        # save_preferences só grava se algum valor realmente mudou
+        self.save_preferences()
+
     def save_preferences(self):
         """Salvar preferências de tema e posição da janela"""
+        self.preferences_save_job = None
         try:
             # Get current window geometry
             geometry = self.root.geometry()
@@ -2226,14 +6333,13 @@ class OLTCommandManager:
 
             preferences = {"theme": theme, "window_position": geometry, "sidebar_position": sidebar_position}
 
-            # Ensure config directory exists
-            config_dir = os.path.dirname(self.config_file)
-            if config_dir and not os.path.exists(config_dir):
-                os.makedirs(config_dir)
+            # Skip the write when nothing actually changed
+            if preferences == self.last_saved_preferences:
+                return
+            self.last_saved_preferences = preferences
 
-            # Save preferences
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(preferences, f, indent=2)
+            # Save preferences (atomic write on the persistence thread)
+            self.persistence.write_json(self.config_file, lambda: preferences)
 
         except Exception as e:
             print(f"Error saving preferences: {e}")
@@ -2241,7 +6347,7 @@ class OLTCommandManager:
     def save_sidebar_position(self, event=None):
         """Salvar posição da barra lateral quando movida"""
         try:
-            self.root.after(500, self.save_preferences)  # Salvar após 500ms para evitar salvamentos excessivos
+            self.schedule_preferences_save()
         except Exception as e:
             print(f"Error scheduling sidebar position save: {e}")
 
@@ -2272,6 +6378,7 @@ class OLTCommandManager:
             if os.path.exists(self.config_file):
                 with open(self.config_file, "r", encoding="utf-8") as f:
                     preferences = json.load(f)
+                self.last_saved_preferences = preferences
 
                 # Set theme with fallback
                 theme = preferences.get("theme", "light")
@@ -2323,12 +6430,257 @@ class OLTCommandManager:
             self.root.geometry("1200x800+100+100")
             self.apply_theme()
 
+    def finish_startup_profile(self):
+        """Chamado quando o Tk fica ocioso pela primeira vez após a abertura"""
+        self.profiler.mark_first_idle()
+        if self.profiler.enabled:
+            self.profiler.write_report()
+            self.open_diagnostics()
+
+    def open_diagnostics(self):
+        """Abrir a janela de diagnóstico (F12)"""
+        diagnostics_window = tk.Toplevel(self.root)
+        diagnostics_window.title("🩺 Diagnóstico")
+        diagnostics_window.geometry("750x450")
+        diagnostics_window.resizable(True, True)
+
+        # Aplicar tema da janela principal
+        theme = self.themes[self.theme_var.get()]
+        diagnostics_window.configure(bg=theme["bg"])
+
+        notebook = ttk.Notebook(diagnostics_window, style="TNotebook")
+        notebook.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.create_startup_diagnostics(notebook)
+        self.create_persistence_diagnostics(notebook)
+        self.create_latency_diagnostics(notebook)
+
+    def create_diagnostics_table(self, parent, columns):
+        """Tabela (Treeview) com cabeçalhos para a janela de diagnóstico"""
+        table = ttk.Treeview(
+            parent,
+            columns=[column for column, heading, width in columns],
+            show="headings",
+            style="Modern.Treeview",
+        )
+        for column, heading, width in columns:
+            table.heading(column, text=heading)
+            table.column(column, width=width, anchor="w")
+        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=table.yview)
+        table.configure(yscrollcommand=scrollbar.set)
+        table.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        return table
+
+    def create_startup_diagnostics(self, notebook):
+        """Aba com o tempo de cada fase da inicialização"""
+        frame = ttk.Frame(notebook, style="Card.TFrame")
+        notebook.add(frame, text="Inicialização")
+
+        report = self.profiler.report()
+        summary = (
+            f"Importação: {report['import_ms']:.0f} ms   "
+            f"Inicialização: {report['init_ms']:.0f} ms"
+        )
+        if report["first_idle_ms"] is not None:
+            summary += f"   Pronto para uso: {report['first_idle_ms']:.0f} ms"
+        ttk.Label(frame, text=summary, style="Card.TLabel").pack(
+            anchor="w", padx=10, pady=(10, 5)
+        )
+
+        btn_frame = ttk.Frame(frame, style="Card.TFrame")
+        btn_frame.pack(side="bottom", fill="x", padx=10, pady=(5, 10))
+
+        def save_report():
+            self.profiler.write_report()
+            messagebox.showinfo(
+                "Diagnóstico",
+                f"Relatório salvo em:\n{os.path.abspath(self.profiler.report_file)}",
+                parent=frame,
+            )
+
+        ttk.Button(
+            btn_frame, text="Salvar Relatório", command=save_report, style="Modern.TButton"
+        ).pack(side="left")
+
+        table_frame = ttk.Frame(frame, style="Card.TFrame")
+        table_frame.pack(fill="both", expand=True, padx=10)
+        table = self.create_diagnostics_table(
+            table_frame,
+            [
+                ("phase", "Fase", 300),
+                ("start", "Início (ms)", 120),
+                ("duration", "Duração (ms)", 120),
+            ],
+        )
+        for phase in report["phases"]:
+            table.insert(
+                "",
+                "end",
+                values=(
+                    "    " * phase["depth"] + phase["name"],
+                    f"{phase['start_ms']:.1f}",
+                    f"{phase['duration_ms']:.1f}",
+                ),
+            )
+
+    def create_persistence_diagnostics(self, notebook):
+        """Aba com as métricas de gravação em segundo plano"""
+        frame = ttk.Frame(notebook, style="Card.TFrame")
+        notebook.add(frame, text="Persistência")
+
+        summary_label = ttk.Label(frame, text="", style="Card.TLabel")
+        summary_label.pack(anchor="w", padx=10, pady=(10, 5))
+
+        btn_frame = ttk.Frame(frame, style="Card.TFrame")
+        btn_frame.pack(side="bottom", fill="x", padx=10, pady=(5, 10))
+
+        table_frame = ttk.Frame(frame, style="Card.TFrame")
+        table_frame.pack(fill="both", expand=True, padx=10)
+        table = self.create_diagnostics_table(
+            table_frame,
+            [
+                ("file", "Arquivo", 220),
+                ("writes", "Gravações", 80),
+                ("coalesced", "Agrupadas", 80),
+                ("avg", "Latência média (ms)", 130),
+                ("max", "Latência máx. (ms)", 120),
+                ("errors", "Erros", 60),
+            ],
+        )
+
+        def refresh():
+            metrics = self.persistence.get_metrics()
+            table.delete(*table.get_children())
+            for path, stats in sorted(metrics["files"].items()):
+                table.insert(
+                    "",
+                    "end",
+                    values=(
+                        os.path.basename(path),
+                        stats["writes"],
+                        stats["coalesced"],
+                        f"{stats['avg_latency_ms']:.1f}",
+                        f"{stats['max_latency_ms']:.1f}",
+                        stats["errors"],
+                    ),
+                )
+            summary_label.configure(text=f"Gravações pendentes: {metrics['pending']}")
+
+        ttk.Button(
+            btn_frame, text="Atualizar", command=refresh, style="Modern.TButton"
+        ).pack(side="left")
+        refresh()
+
+    def create_latency_diagnostics(self, notebook):
+        """Aba com o atraso do loop de eventos e a latência dos handlers"""
+        frame = ttk.Frame(notebook, style="Card.TFrame")
+        notebook.add(frame, text="Latência da Interface")
+
+        instrumentation = self.instrumentation
+        if not instrumentation.enabled:
+            ttk.Label(
+                frame,
+                text=(
+                    "Instrumentação desativada.\n"
+                    "Defina OLT_MANAGER_INSTRUMENT=1 ou use a opção --instrument."
+                ),
+                style="Card.TLabel",
+            ).pack(anchor="w", padx=10, pady=10)
+            return
+
+        summary_label = ttk.Label(frame, text="", style="Card.TLabel")
+        summary_label.pack(anchor="w", padx=10, pady=(10, 5))
+
+        btn_frame = ttk.Frame(frame, style="Card.TFrame")
+        btn_frame.pack(side="bottom", fill="x", padx=10, pady=(5, 10))
+
+        table_frame = ttk.Frame(frame, style="Card.TFrame")
+        table_frame.pack(fill="both", expand=True, padx=10)
+        table = self.create_diagnostics_table(
+            table_frame,
+            [
+                ("handler", "Handler", 240),
+                ("calls", "Chamadas", 80),
+                ("p50", "p50 (ms)", 90),
+                ("p99", "p99 (ms)", 90),
+                ("max", "Máx. (ms)", 90),
+            ],
+        )
+
+        def fmt(value):
+            return "-" if value is None else f"{value:.1f}"
+
+        def refresh():
+            report = instrumentation.report()
+            lag = report["event_loop_lag"]
+            summary_label.configure(
+                text=(
+                    f"Atraso do loop de eventos: p50 {fmt(lag['p50_ms'])} ms   "
+                    f"p99 {fmt(lag['p99_ms'])} ms   máx. {fmt(lag['max_ms'])} ms"
+                )
+            )
+            table.delete(*table.get_children())
+            # Os handlers mais lentos (p99) primeiro
+            for name, stats in sorted(
+                report["handlers"].items(), key=lambda item: -item[1]["p99_ms"]
+            ):
+                table.insert(
+                    "",
+                    "end",
+                    values=(
+                        name,
+                        stats["calls"],
+                        fmt(stats["p50_ms"]),
+                        fmt(stats["p99_ms"]),
+                        fmt(stats["max_ms"]),
+                    ),
+                )
+
+        # O timer fica no root: callbacks de after() registrados no frame
+        # são apagados com a janela e disparariam como "invalid command name"
+        refresh_job = None
+
+        def refresh_live():
+            nonlocal refresh_job
+            refresh()
+            refresh_job = self.root.after(1000, refresh_live)
+
+        def stop_refresh(event):
+            nonlocal refresh_job
+            if str(event.widget) == str(window) and refresh_job is not None:
+                self.root.after_cancel(refresh_job)
+                refresh_job = None
+
+        window = frame.winfo_toplevel()
+        window.bind("<Destroy>", stop_refresh, add="+")
+
+        def save_report():
+            instrumentation.write_report()
+            messagebox.showinfo(
+                "Diagnóstico",
+                f"Relatório salvo em:\n{os.path.abspath(instrumentation.report_file)}",
+                parent=frame,
+            )
+
+        ttk.Button(
+            btn_frame, text="Salvar Relatório", command=save_report, style="Modern.TButton"
+        ).pack(side="left")
+        refresh_live()
+
     def on_closing(self):
         """Evento ao fechar o programa"""
-        self.save_preferences()
+        self.flush_preferences()
+        if self.instrumentation.enabled:
+            self.instrumentation.write_report()
+        self.persistence.flush_on_exit()
         self.root.destroy()
 
 
+# Fim da importação do módulo (para o perfil de inicialização)
+IMPORT_FINISHED = time.perf_counter()
+
+
 def main():
     """Função principal"""
     root = tk.Tk()
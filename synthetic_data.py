@@ -0,0 +1,398 @@
+"""Dados sintéticos para testes de escala do OLT Command Manager
+
+Gera, de forma determinística (mesma semente, mesmos dados), catálogos com
+N OLTs, histórico e favoritos com M entradas, listas de ONUs com K linhas
+no formato de cada fabricante e logs de sessão. Os arquivos têm o mesmo
+formato dos que o aplicativo lê, então basta executar o aplicativo dentro
+do diretório gerado.
+
+Uso:
+    python synthetic_data.py saida --olts 200 --depth 3 --fanout 6
+    python synthetic_data.py saida --history 100000 --onus 50000 --log-mb 20
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+from datetime import datetime, timedelta
+
+VENDORS = ["zte", "huawei", "fiberhome"]
+
+# Linhas de modelo por fabricante; comandos são combinações destas linhas
+TEMPLATE_LINES = {
+    "zte": [
+        "configure terminal",
+        "interface gpon-olt_{slot}/{porta}/{pon}",
+        "interface gpon-onu_{slot}/{porta}/{pon}:{id}",
+        "onu {id} type ZTE-F601 sn {sn}",
+        "no onu {id}",
+        "show gpon onu detail-info gpon-onu_{slot}/{porta}/{pon}:{id}",
+        "show pon power attenuation gpon-onu_{slot}/{porta}/{pon}:{id}",
+        "show gpon onu by sn {sn}",
+        "service-port 1 vport 1 user-vlan {vlan} vlan {vlan}",
+        "pon-onu-mng gpon-onu_{slot}/{porta}/{pon}:{id}",
+        "exit",
+    ],
+    "huawei": [
+        "enable",
+        "config",
+        "interface gpon {slot}/{porta}",
+        "ont delete {pon} {id}",
+        "ont add {pon} {id} sn-auth {sn} omci ont-lineprofile-id 1",
+        "display ont info {slot} {porta} {pon} {id}",
+        "display ont optical-info {pon} {id}",
+        "display ont info by-sn {sn}",
+        "service-port vlan {vlan} gpon {slot}/{porta}/{pon} ont {id} gemport 1",
+        "quit",
+        "save",
+    ],
+    "fiberhome": [
+        "cd gpononu",
+        "show onu_list slot {slot} link {porta}",
+        "show onu_state slot {slot} link {porta} onu {id}",
+        "set whitelist phy_addr address {sn} password null action add",
+        "delete slot {slot} link {porta} onu {id}",
+        "show optic_module slot {slot} link {porta} onu {id}",
+        "show mac_list slot {slot} link {porta} onu {id}",
+        "cd ..",
+        "save",
+    ],
+}
+
+VENDOR_MODELS = {
+    "zte": "ZTE C600",
+    "huawei": "Huawei MA5800",
+    "fiberhome": "Fiberhome AN5516",
+}
+SN_PREFIXES = {"zte": "ZTEG", "huawei": "HWTC", "fiberhome": "FHTT"}
+
+CATEGORY_NAMES = [
+    "Gerenciamento de ONU", "Diagnóstico", "Configuração", "Serviços",
+    "Provisionamento", "Manutenção", "Monitoramento", "Perfis",
+]
+COMMAND_VERBS = [
+    "Consultar", "Remover", "Reiniciar", "Configurar", "Verificar",
+    "Listar", "Atualizar", "Autorizar",
+]
+COMMAND_OBJECTS = [
+    "ONU", "PON", "VLAN", "Serviço", "Perfil", "Porta", "Firmware", "Alarme",
+]
+ONU_STATES = ["working", "offline", "los", "dyinggasp", "syncmib", "logging"]
+FIRMWARES = ["F601P1N34.bin", "F10-G10-NW_1.6.0.bin"]
+
+PARAM_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+def random_sn(rng, vendor="zte"):
+    return f"{SN_PREFIXES[vendor]}{rng.getrandbits(32):08X}"
+
+
+def random_mac(rng):
+    return ":".join(f"{rng.getrandbits(8):02x}" for _ in range(6))
+
+
+def random_param(rng, param, vendor="zte"):
+    """Valor plausível (e válido para o CommandValidator) de um parâmetro"""
+    if param in ("slot", "porta"):
+        return str(rng.randint(1, 16))
+    if param == "pon":
+        return str(rng.randint(1, 8))
+    if param == "id":
+        return str(rng.randint(1, 128))
+    if param == "sn":
+        return random_sn(rng, vendor)
+    if param == "mac":
+        return random_mac(rng)
+    if param == "vlan":
+        return str(rng.randint(1, 4094))
+    if param == "firmware":
+        return rng.choice(FIRMWARES)
+    return f"valor{rng.randint(1, 99)}"
+
+
+def generate_command_tree(rng, vendor, depth, fanout, commands):
+    """Categorias com depth níveis de fanout filhos e comandos nas folhas"""
+    if depth == 0:
+        lines = TEMPLATE_LINES[vendor]
+        folder = {}
+        for i in range(commands):
+            name = (
+                f"{rng.choice(COMMAND_VERBS)} {rng.choice(COMMAND_OBJECTS)} {i + 1}"
+            )
+            folder[name] = "\n".join(rng.sample(lines, rng.randint(1, 4)))
+        return folder
+    return {
+        f"{CATEGORY_NAMES[i % len(CATEGORY_NAMES)]} {i + 1}": generate_command_tree(
+            rng, vendor, depth - 1, fanout, commands
+        )
+        for i in range(fanout)
+    }
+
+
+def generate_catalog(olts=4, depth=2, fanout=6, commands=10, models=None, seed=0):
+    """Catálogo no formato do olt_commands.json
+
+    As OLTs se dividem entre models conjuntos de comandos (por padrão um
+    por fabricante): OLTs do mesmo modelo repetem os mesmos comandos, como
+    no catálogo real. Cada OLT tem fanout**depth categorias finais com
+    commands comandos cada.
+    """
+    rng = random.Random(seed)
+    models = models or len(VENDORS)
+    model_trees = []
+    for m in range(models):
+        vendor = VENDORS[m % len(VENDORS)]
+        model_trees.append(
+            (vendor, generate_command_tree(rng, vendor, depth, fanout, commands))
+        )
+
+    catalog = {"olts": {}}
+    for o in range(olts):
+        vendor, categories = model_trees[o % models]
+        name = f"{VENDOR_MODELS[vendor]} Sintética {o + 1}"
+        catalog["olts"][name] = {
+            "description": f"OLT sintética {o + 1} ({vendor})",
+            # Cópia para que cada OLT tenha seus próprios objetos, como após
+            # json.load
+            "categories": json.loads(json.dumps(categories)),
+        }
+    return catalog
+
+
+def generate_catalog_text(size_mb, seed=0):
+    """JSON de catálogo (indent=2) com aproximadamente size_mb megabytes"""
+    # Uma OLT com os parâmetros padrão ocupa uns 45 KB no JSON formatado
+    olts = max(1, int(size_mb * 1024 * 1024 / 45000))
+    return json.dumps(
+        generate_catalog(olts, seed=seed), indent=2, ensure_ascii=False
+    )
+
+
+def iter_catalog_commands(catalog):
+    """Gerar (OLT, caminho, comando) para cada comando do catálogo"""
+    def walk(olt_name, path, node):
+        for key, value in node.items():
+            if isinstance(value, dict):
+                yield from walk(olt_name, path + [key], value)
+            else:
+                yield olt_name, path + [key], value
+
+    for olt_name, olt in catalog.get("olts", {}).items():
+        yield from walk(olt_name, [], olt.get("categories", {}))
+
+
+def vendor_of(olt_name):
+    lowered = olt_name.lower()
+    for vendor in VENDORS:
+        if vendor in lowered:
+            return vendor
+    return "zte"
+
+
+def render_command(rng, command, vendor):
+    """Preencher os parâmetros como o usuário faria antes de copiar"""
+    values = {}
+
+    def replace(match):
+        param = match.group(1)
+        if param not in values:
+            values[param] = random_param(rng, param, vendor)
+        return values[param]
+
+    return PARAM_PATTERN.sub(replace, command), values
+
+
+def random_timestamps(rng, count, start=datetime(2024, 1, 1), mean_gap=300):
+    """Timestamps ISO crescentes (intervalo médio de mean_gap segundos)"""
+    moment = start
+    for _ in range(count):
+        moment += timedelta(seconds=rng.expovariate(1 / mean_gap))
+        yield moment.isoformat()
+
+
+def generate_history(catalog, entries, seed=0):
+    """Entradas de histórico (ordem cronológica) de comandos do catálogo
+
+    Os usos se concentram em poucos comandos (distribuição de Pareto), como
+    acontece no uso real.
+    """
+    rng = random.Random(seed)
+    commands = list(iter_catalog_commands(catalog))
+    rng.shuffle(commands)
+    history = []
+    for timestamp in random_timestamps(rng, entries):
+        index = min(int(rng.paretovariate(1.2)) - 1, len(commands) - 1)
+        olt_name, path, command = commands[index]
+        text, _ = render_command(rng, command, vendor_of(olt_name))
+        history.append(
+            {
+                "id": f"{rng.getrandbits(128):032x}",
+                "command": text,
+                "olt_model": olt_name,
+                "category": " > ".join(path[:-1]) or "Geral",
+                "timestamp": timestamp,
+            }
+        )
+    return history
+
+
+def generate_favorites(catalog, entries, seed=0):
+    """Favoritos com nomes únicos e parâmetros salvos"""
+    rng = random.Random(seed)
+    commands = list(iter_catalog_commands(catalog))
+    favorites = []
+    for i, timestamp in enumerate(random_timestamps(rng, entries, mean_gap=3600)):
+        olt_name, path, command = rng.choice(commands)
+        _, params = render_command(rng, command, vendor_of(olt_name))
+        favorites.append(
+            {
+                "id": f"{rng.getrandbits(128):032x}",
+                "name": f"{path[-1]} #{i + 1}",
+                "command": command,
+                "olt_model": olt_name,
+                "category": " > ".join(path[:-1]) or "Geral",
+                "params": params,
+                "added_on": timestamp,
+            }
+        )
+    return favorites
+
+
+def generate_onu_lines(vendor, count, seed=0):
+    """Linhas de dump de estado de ONUs no formato do fabricante
+
+    zte:       gpon-onu_1/2/3:4  ZTE-F601  SN:ZTEG1234ABCD  working
+    huawei:    "display ont info": F/ S/P  ONT-ID  SN (hexadecimal)  estado
+    fiberhome: 1/2/3:4  FHTT1234ABCD  aa:bb:cc:dd:ee:ff  working
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        slot, porta = rng.randint(1, 16), rng.randint(1, 16)
+        pon, onu_id = rng.randint(1, 8), i % 128 + 1
+        state = rng.choice(ONU_STATES)
+        if vendor == "huawei":
+            sn = f"{SN_PREFIXES[vendor].encode().hex().upper()}{rng.getrandbits(32):08X}"
+            lines.append(
+                f"  {slot}/{porta:>2}/{pon}    {onu_id:<3}  {sn}  active  online  normal"
+            )
+        elif vendor == "fiberhome":
+            lines.append(
+                f"{slot}/{porta}/{pon}:{onu_id}  {random_sn(rng, vendor)}  "
+                f"{random_mac(rng)}  {state}"
+            )
+        else:
+            lines.append(
+                f"gpon-onu_{slot}/{porta}/{pon}:{onu_id}  ZTE-F601  "
+                f"SN:{random_sn(rng, vendor)}  {state}"
+            )
+    return lines
+
+
+def generate_session_log(path, size_mb, seed=0):
+    """Gerar um log de sessão sintético (prompts, saída, paginador e ANSI)"""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            slot, porta, pon = rng.randint(1, 2), rng.randint(1, 16), rng.randint(1, 16)
+            onu_id = rng.randint(1, 128)
+            sn = random_sn(rng)
+            block = [
+                "\x1b[32mZTE-C600#\x1b[0mconfigure terminal",
+                "Enter configuration commands, one per line.  End with CNTL/Z.",
+                f"ZTE-C600(config)#interface gpon-olt_{slot}/{porta}/{pon}",
+                f"ZTE-C600(config-if)#onu {onu_id} type ZTE-F601 sn {sn}",
+                "ZTE-C600(config-if)#exit",
+                f"ZTE-C600#show gpon onu detail-info gpon-onu_{slot}/{porta}/{pon}:{onu_id}",
+            ]
+            block += [
+                f"  Campo {i:02d}:            valor-{rng.getrandbits(16):04x}"
+                for i in range(20)
+            ]
+            block.append(" --More-- \b\b\b\b\b\b\b\b\b\b          \b\b\b\b\b\b\b\b\b\b")
+            block += [
+                f"  Campo {i:02d}:            valor-{rng.getrandbits(16):04x}"
+                for i in range(20, 30)
+            ]
+            text = "\r\n".join(block) + "\r\n"
+            f.write(text)
+            written += len(text)
+
+
+def write_dataset(
+    directory,
+    olts=4,
+    depth=2,
+    fanout=6,
+    commands=10,
+    history=1000,
+    favorites=100,
+    onus=1000,
+    log_mb=0,
+    seed=0,
+):
+    """Gravar um conjunto completo de arquivos no formato do aplicativo"""
+    os.makedirs(directory, exist_ok=True)
+    catalog = generate_catalog(olts, depth, fanout, commands, seed=seed)
+    with open(os.path.join(directory, "olt_commands.json"), "w", encoding="utf-8") as f:
+        json.dump(catalog, f, indent=2, ensure_ascii=False)
+
+    with open(
+        os.path.join(directory, "command_history.jsonl"), "w", encoding="utf-8"
+    ) as f:
+        for entry in generate_history(catalog, history, seed):
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    with open(
+        os.path.join(directory, "favorite_commands.json"), "w", encoding="utf-8"
+    ) as f:
+        json.dump(
+            generate_favorites(catalog, favorites, seed), f, indent=2, ensure_ascii=False
+        )
+
+    for vendor in VENDORS:
+        with open(
+            os.path.join(directory, f"onus_{vendor}.txt"), "w", encoding="utf-8"
+        ) as f:
+            f.write("\n".join(generate_onu_lines(vendor, onus, seed)) + "\n")
+
+    if log_mb:
+        generate_session_log(os.path.join(directory, "session.log"), log_mb, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerar dados sintéticos")
+    parser.add_argument("directory", help="Diretório de saída")
+    parser.add_argument("--olts", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=2, help="Níveis de categorias")
+    parser.add_argument("--fanout", type=int, default=6, help="Filhos por categoria")
+    parser.add_argument(
+        "--commands", type=int, default=10, help="Comandos por categoria final"
+    )
+    parser.add_argument("--history", type=int, default=1000, help="Entradas")
+    parser.add_argument("--favorites", type=int, default=100, help="Entradas")
+    parser.add_argument("--onus", type=int, default=1000, help="Linhas por fabricante")
+    parser.add_argument("--log-mb", type=int, default=0, help="Log de sessão (MB)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_dataset(
+        args.directory,
+        olts=args.olts,
+        depth=args.depth,
+        fanout=args.fanout,
+        commands=args.commands,
+        history=args.history,
+        favorites=args.favorites,
+        onus=args.onus,
+        log_mb=args.log_mb,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()